@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
 
 
 class BaseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "base"
+
+    def ready(self) -> None:
+        from .sqlite import configure_connection, optimize_connections
+
+        connection_created.connect(configure_connection)
+        request_finished.connect(optimize_connections)
@@ -0,0 +1,74 @@
+"""
+Async variants of views, served only under ASGI.
+
+Under WSGI an async view runs on an event loop of its own per request, which
+makes it slower than the sync view it replaces. Views therefore keep their
+sync implementation as the URL target, and an async variant registered with
+`async_variant` takes its place in the URLconf that `config.asgi` serves,
+built by `with_async_views`.
+
+Variants run their own queries with the async ORM, but render with
+`arender`, in a thread, since templates are rendered synchronously and may
+load lazy relations. The ingredient and category lists load their page
+while rendering, so that a cached fragment can skip it, which means their
+page query runs in that thread too.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import render
+from django.urls import URLPattern, URLResolver
+
+variants: dict[Callable, Callable] = {}
+
+
+def async_variant(view: Callable) -> Callable[[Callable], Callable]:
+    """Register the decorated async view to serve `view`'s URLs under ASGI."""
+
+    def register(async_view: Callable) -> Callable:
+        variants[view] = async_view
+        return async_view
+
+    return register
+
+
+async def arender(
+    request: HttpRequest, template_name: str, context: dict[str, Any]
+) -> HttpResponse:
+    """
+    Render a page in a thread where the ORM can be called synchronously, for
+    whatever the template loads lazily.
+    """
+    return await sync_to_async(render)(request, template_name, context=context)
+
+
+def with_async_views(patterns: list) -> list:
+    """
+    Copy URL patterns, replacing each view that has an async variant with
+    the variant. Names and namespaces are kept, so URLs reverse the same.
+    """
+    copied = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            copied.append(
+                URLResolver(
+                    pattern.pattern,
+                    with_async_views(pattern.url_patterns),
+                    pattern.default_kwargs,
+                    pattern.app_name,
+                    pattern.namespace,
+                )
+            )
+        else:
+            copied.append(
+                URLPattern(
+                    pattern.pattern,
+                    variants.get(pattern.callback, pattern.callback),
+                    pattern.default_args,
+                    pattern.name,
+                )
+            )
+    return copied
@@ -0,0 +1,58 @@
+import time
+from collections.abc import Iterable
+
+from django.core.cache import caches
+
+
+def make_key(*parts: object) -> str:
+    return ":".join(str(part) for part in parts)
+
+
+def household_key(household_id: object, *parts: object) -> str:
+    """
+    Keys for values that belong to one household all start with its id, so
+    that they can be told apart, and found, in any cache.
+    """
+    return make_key("household", household_id, *parts)
+
+
+def version_key(namespace: str, identifier: object) -> str:
+    return make_key("version", namespace, identifier)
+
+
+def get_versions(keys: Iterable[str]) -> dict[str, int]:
+    """
+    Return the current value of each version stamp, seeding any that are
+    missing. Stamps are seeded from the clock rather than from zero so that a
+    stamp evicted from the cache never comes back with a value an old entry
+    was stored under.
+    """
+    cache = caches["counters"]
+    keys = list(keys)
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+async def aget_versions(keys: Iterable[str]) -> dict[str, int]:
+    """See `get_versions`."""
+    cache = caches["counters"]
+    keys = list(keys)
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return versions
+
+
+def bump_version(namespace: str, identifier: object) -> None:
+    cache = caches["counters"]
+    key = version_key(namespace, identifier)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
@@ -0,0 +1,79 @@
+import threading
+from collections import Counter
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+MISSING = object()
+
+
+class CacheStats:
+    """
+    Hit and miss counts per cache, counted in this process.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counts: Counter[tuple[str, str]] = Counter()
+
+    def record(self, cache: str, hits: int = 0, misses: int = 0) -> None:
+        with self.lock:
+            self.counts[(cache, "hits")] += hits
+            self.counts[(cache, "misses")] += misses
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        with self.lock:
+            snapshot: dict[str, dict[str, int]] = {}
+            for (cache, kind), count in self.counts.items():
+                snapshot.setdefault(cache, {"hits": 0, "misses": 0})[kind] = count
+            return snapshot
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counts.clear()
+
+
+stats = CacheStats()
+
+
+class InstrumentedCacheMixin:
+    """
+    Count the hits and misses of a cache backend in `stats`, under the
+    cache's KEY_PREFIX.
+    """
+
+    # Whether the backend's `get_many` is built on `get`, which already
+    # counts each key.
+    get_many_uses_get = True
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)  # type: ignore
+        if value is MISSING:
+            stats.record(self.key_prefix, misses=1)  # type: ignore
+            return default
+        stats.record(self.key_prefix, hits=1)  # type: ignore
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)  # type: ignore
+        if not self.get_many_uses_get:
+            stats.record(
+                self.key_prefix,  # type: ignore
+                hits=len(values),
+                misses=len(keys) - len(values),
+            )
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    get_many_uses_get = False
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from base.sessions import CLEAR_BATCH_SIZE, SessionStore
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions in batches."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CLEAR_BATCH_SIZE,
+            help="Sessions to delete per transaction.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        deleted = SessionStore.clear_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions"))
@@ -0,0 +1,244 @@
+import random
+import uuid
+from dataclasses import dataclass
+from itertools import batched
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from faker import Faker
+
+from households.models import Household, HouseholdMember, HouseholdStats
+from ingredients.models import Ingredient, IngredientsCategory
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+NAME_MAX_LENGTH = Ingredient._meta.get_field("name").max_length
+
+
+@dataclass
+class SeedCounts:
+    users: int = 0
+    households: int = 0
+    memberships: int = 0
+    categories: int = 0
+    ingredients: int = 0
+
+
+class LoadSeeder:
+    """
+    Generate users, each with a household of their own holding categories
+    and ingredients, writing every table with `bulk_create`.
+
+    All values, including the uuids, come from generators seeded with
+    `seed`, so the same arguments produce the same rows. Every user shares
+    one precomputed password hash instead of paying for hashing per row.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        categories: int = 10,
+        ingredients: int = 100,
+        members: int = 0,
+        password: str = "password",
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self.seed = seed
+        self.categories = categories
+        self.ingredients = ingredients
+        self.members = members
+        self.batch_size = batch_size
+        self.password = make_password(password)
+        self.faker = Faker()
+        self.faker.seed_instance(seed)
+        self.random = random.Random(seed)
+        self.counts = SeedCounts()
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.random.getrandbits(128), version=4)
+
+    def unique_names(self, count: int, words: int) -> list[str]:
+        names: list[str] = []
+        seen: set[str] = set()
+        while len(names) < count:
+            name = " ".join(self.faker.words(words)).capitalize()
+            if name in seen:
+                name = f"{name} {len(names)}"
+            name = name[:NAME_MAX_LENGTH]
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+        return names
+
+    def email_suffix(self, index: int) -> str:
+        return f".{self.seed}.{index}@example.com"
+
+    def already_seeded(self) -> bool:
+        """
+        Whether a run with this seed already wrote its rows. Every run starts
+        at index 0, so that row is enough to tell.
+        """
+        return User.objects.filter(email__endswith=self.email_suffix(0)).exists()
+
+    def run(self, users: int) -> SeedCounts:
+        for start in range(0, users, self.batch_size):
+            with transaction.atomic():
+                self.seed_batch(start, min(self.batch_size, users - start))
+        return self.counts
+
+    def seed_batch(self, start: int, count: int) -> None:
+        users = User.objects.bulk_create(
+            User(
+                email=f"{self.faker.user_name()}{self.email_suffix(start + i)}",
+                display_name=self.faker.name(),
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=self.password,
+            )
+            for i in range(count)
+        )
+        households = Household.objects.bulk_create(
+            Household(
+                uuid=self.uuid(),
+                name=f"{user.last_name} Household",
+                created_by=user,
+            )
+            for user in users
+        )
+        HouseholdMember.objects.bulk_create(self.memberships(users, households))
+        HouseholdStats.objects.bulk_create(
+            HouseholdStats(
+                household=household,
+                ingredients_categories_count=self.categories,
+                ingredients_count=self.ingredients,
+            )
+            for household in households
+        )
+        categories = IngredientsCategory.objects.bulk_create(
+            (
+                IngredientsCategory(
+                    uuid=self.uuid(),
+                    name=name,
+                    description=self.faker.sentence(),
+                    household=household,
+                )
+                for household in households
+                for name in self.unique_names(self.categories, 1)
+            ),
+            batch_size=self.batch_size,
+        )
+        by_household: dict[int, list[IngredientsCategory]] = {}
+        for category in categories:
+            by_household.setdefault(category.household_id, []).append(category)  # type: ignore
+        for batch in batched(
+            self.new_ingredients(households, by_household), self.batch_size
+        ):
+            Ingredient.objects.bulk_create(batch)
+        self.counts.users += len(users)
+        self.counts.households += len(households)
+        self.counts.categories += len(categories)
+        self.counts.ingredients += len(households) * self.ingredients
+
+    def memberships(self, users, households):
+        for user, household in zip(users, households):
+            yield HouseholdMember(
+                household=household,
+                user=user,
+                member_type=HouseholdMember.MemberType.ADMIN,
+            )
+            self.counts.memberships += 1
+            others = self.random.sample(users, min(self.members + 1, len(users)))
+            for other in [other for other in others if other != user][: self.members]:
+                yield HouseholdMember(
+                    household=household,
+                    user=other,
+                    member_type=HouseholdMember.MemberType.MEMBER,
+                )
+                self.counts.memberships += 1
+
+    def new_ingredients(self, households, categories):
+        for household in households:
+            choices = categories.get(household.pk, [])
+            for name in self.unique_names(self.ingredients, 2):
+                yield Ingredient(
+                    uuid=self.uuid(),
+                    name=name,
+                    household=household,
+                    category=self.random.choice(choices) if choices else None,
+                )
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, households and their catalogs for load testing. The "
+        "same --seed always generates the same data, so each seed can be loaded "
+        "into a database once; use another seed to add more."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("users", type=int, help="Number of users to create.")
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=10,
+            help="Categories per household (default 10).",
+        )
+        parser.add_argument(
+            "--ingredients",
+            type=int,
+            default=100,
+            help="Ingredients per household (default 100).",
+        )
+        parser.add_argument(
+            "--members",
+            type=int,
+            default=0,
+            help=(
+                "Other users from the same batch added to each household as "
+                "members (default 0)."
+            ),
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for the random data (default 0).",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password shared by every generated user.",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options) -> None:
+        for option in ("users", "batch_size"):
+            if options[option] < 1:
+                raise CommandError(f"{option} must be at least 1")
+        for option in ("categories", "ingredients", "members"):
+            if options[option] < 0:
+                raise CommandError(f"{option} must not be negative")
+        seeder = LoadSeeder(
+            seed=options["seed"],
+            categories=options["categories"],
+            ingredients=options["ingredients"],
+            members=options["members"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+        )
+        if seeder.already_seeded():
+            raise CommandError(
+                f"Data for seed {options['seed']} is already loaded; "
+                "use another --seed to add more."
+            )
+        counts = seeder.run(options["users"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {counts.users} users, {counts.households} households, "
+                f"{counts.memberships} memberships, {counts.categories} categories "
+                f"and {counts.ingredients} ingredients"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.templating import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every project template and those of TEMPLATE_WARMUP_APPS, "
+        "failing if any of them does not compile."
+    )
+
+    def handle(self, *args, **options) -> None:
+        result = warm_templates()
+        for name, error in result.errors:
+            self.stderr.write(f"{name}: {error}")
+        if result.errors:
+            raise CommandError(f"{len(result.errors)} templates failed to compile")
+        self.stdout.write(
+            self.style.SUCCESS(f"Compiled {len(result.compiled)} templates")
+        )
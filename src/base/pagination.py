@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(values: list[Any]) -> str:
+    data = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str | None, length: int | None = None) -> list[str] | None:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or not values:
+        return None
+    if length is not None and len(values) != length:
+        return None
+    if not all(isinstance(value, str) for value in values):
+        return None
+    return values
+
+
+@dataclass
+class KeysetPage:
+    items: list[Any]
+    next_cursor: str | None
+    # The keys of the previous page's last row, for pages after the first.
+    after: list[str] | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row of the previous page
+    instead of using OFFSET, so every page costs the same no matter how deep
+    it is. The last key must be unique so that rows sharing the leading keys
+    are neither skipped nor repeated.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        keys: tuple[str, ...] = ("name", "uuid"),
+        per_page: int = PAGE_SIZE,
+    ) -> None:
+        self.queryset = queryset.order_by(*keys)
+        self.keys = keys
+        self.per_page = per_page
+
+    def _after(self, values: list[str]) -> Q:
+        condition = Q()
+        for i in reversed(range(len(self.keys))):
+            equal = {key: value for key, value in zip(self.keys[:i], values)}
+            condition = Q(**equal, **{f"{self.keys[i]}__gt": values[i]}) | condition
+        # Implied by the condition, but spelled out so that SQLite can seek
+        # to it in an index even when it cannot split the ORs.
+        return Q(**{f"{self.keys[0]}__gte": values[0]}) & condition
+
+    def seek(self, values: list[str] | None) -> tuple[QuerySet, list[str] | None]:
+        """
+        Return the rows after the row with the keys `values`, along with the
+        values, or all rows and None when the values are not valid keys.
+        """
+        if values is not None and len(values) == len(self.keys):
+            try:
+                return self.queryset.filter(self._after(values)), values
+            except (ValidationError, ValueError):
+                pass
+        return self.queryset, None
+
+    def keys_of(self, item: Any) -> list[Any]:
+        return [getattr(item, key) for key in self.keys]
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        queryset, after = self.seek(decode_cursor(cursor, len(self.keys)))
+        items = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[: self.per_page]
+            next_cursor = encode_cursor(self.keys_of(items[-1]))
+        return KeysetPage(items=items, next_cursor=next_cursor, after=after)
+
+
+class ChainedKeysetPaginator:
+    """
+    Paginate the rows of several keyset paginators one after the other, as
+    a single list. This serves orders that no single index can, such as
+    rows grouped under a nullable foreign key, by letting each part seek
+    through an index of its own. A page costs one query, or one more for
+    each part it reaches the end of. Cursors start with the position of
+    the part they continue.
+    """
+
+    def __init__(self, *paginators: KeysetPaginator, per_page: int = PAGE_SIZE):
+        self.paginators = paginators
+        self.per_page = per_page
+
+    def _start(self, cursor: str | None) -> tuple[int, list[str] | None]:
+        values = decode_cursor(cursor)
+        if values is None or not values[0].isdigit():
+            return 0, None
+        part = int(values[0])
+        if part >= len(self.paginators):
+            return 0, None
+        return part, values[1:]
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        part, values = self._start(cursor)
+        queryset, values = self.paginators[part].seek(values)
+        if values is None:
+            part, queryset = 0, self.paginators[0].queryset
+        after = None if values is None else [str(part), *values]
+        items: list[Any] = []
+        parts: list[int] = []
+        while True:
+            rows = list(queryset[: self.per_page + 1 - len(items)])
+            items.extend(rows)
+            parts.extend(part for _ in rows)
+            part += 1
+            if len(items) > self.per_page or part == len(self.paginators):
+                break
+            queryset = self.paginators[part].queryset
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[: self.per_page]
+            last = parts[self.per_page - 1]
+            keys = self.paginators[last].keys_of(items[-1])
+            next_cursor = encode_cursor([last, *keys])
+        return KeysetPage(items=items, next_cursor=next_cursor, after=after)
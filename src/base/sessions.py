@@ -0,0 +1,104 @@
+"""
+Cached, database-backed sessions that only write when their data changes.
+"""
+
+import threading
+
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+CLEAR_BATCH_SIZE = 1000
+
+
+class SessionWriteStats:
+    """
+    Sessions written and saves skipped, counted in this process.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.written = 0
+        self.skipped = 0
+
+    def record(self, written: bool) -> None:
+        with self.lock:
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+
+    def snapshot(self) -> tuple[int, int]:
+        with self.lock:
+            return self.written, self.skipped
+
+    def reset(self) -> None:
+        with self.lock:
+            self.written = self.skipped = 0
+
+
+stats = SessionWriteStats()
+
+
+class SessionStore(CachedDBStore):
+    """
+    Read sessions from the cache and write them through to the database,
+    skipping the write when the data is the same as it was loaded.
+
+    Django saves a session whenever a value is assigned to it, even the
+    value it already held, and each save takes SQLite's write lock.
+    """
+
+    _loaded: bytes | None = None
+
+    def _snapshot(self, data: dict) -> bytes:
+        return self.serializer().dumps(data)
+
+    def _unchanged(self, must_create: bool) -> bool:
+        return (
+            not must_create
+            and self.session_key is not None
+            and self._loaded is not None
+            and self._snapshot(self._get_session()) == self._loaded
+        )
+
+    def load(self) -> dict:
+        data = super().load()
+        self._loaded = self._snapshot(data) if data else None
+        return data
+
+    async def aload(self) -> dict:
+        data = await super().aload()
+        self._loaded = self._snapshot(data) if data else None
+        return data
+
+    def save(self, must_create: bool = False) -> None:
+        if self._unchanged(must_create):
+            stats.record(written=False)
+            return
+        super().save(must_create)
+        self._loaded = self._snapshot(self._session)
+        stats.record(written=True)
+
+    async def asave(self, must_create: bool = False) -> None:
+        if self._unchanged(must_create):
+            stats.record(written=False)
+            return
+        await super().asave(must_create)
+        self._loaded = self._snapshot(self._session)
+        stats.record(written=True)
+
+    @classmethod
+    def clear_expired(cls, batch_size: int = CLEAR_BATCH_SIZE) -> int:
+        """
+        Delete expired sessions a batch at a time, each in its own
+        transaction, so the write lock is never held for long. Their cache
+        entries expire on their own.
+        """
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(pk__in=keys).delete()[0]
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+
+def configure_connection(sender, connection: BaseDatabaseWrapper, **kwargs) -> None:
+    """
+    Apply `SQLITE_PRAGMAS` to a newly opened SQLite connection.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    connection.optimized_at = time.monotonic()  # type: ignore
+
+
+def optimize_connections(sender=None, **kwargs) -> None:
+    """
+    Run `PRAGMA optimize` on every open SQLite connection that has gone
+    `SQLITE_OPTIMIZE_INTERVAL` seconds without it, so that long lived
+    connections keep the query planner's statistics up to date.
+    """
+    now = time.monotonic()
+    for connection in connections.all(initialized_only=True):
+        if connection.vendor != "sqlite" or connection.connection is None:
+            continue
+        optimized_at = getattr(connection, "optimized_at", now)
+        if now - optimized_at < settings.SQLITE_OPTIMIZE_INTERVAL:
+            continue
+        if connection.in_atomic_block:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA optimize")
+        connection.optimized_at = now  # type: ignore
+
+
+def existing_triggers(connection: BaseDatabaseWrapper) -> set[str]:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        return {name for (name,) in cursor.fetchall()}
@@ -0,0 +1,36 @@
+import gzip
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".json", ".map", ".svg", ".txt", ".xml")
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Store static files under content hashed names, which can be cached
+    forever, and write a gzip copy next to each text file, which the web
+    server can send as is (for instance with nginx's `gzip_static`).
+    Copies that would not be smaller are skipped.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if isinstance(hashed_name, str):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(COMPRESSIBLE_SUFFIXES):
+                self.compress(hashed_name)
+
+    def compress(self, name: str) -> None:
+        path = Path(self.path(name))
+        content = path.read_bytes()
+        compressed = gzip.compress(content, mtime=0)
+        if len(compressed) < len(content):
+            path.with_name(path.name + ".gz").write_bytes(compressed)
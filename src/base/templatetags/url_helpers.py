@@ -1,11 +1,17 @@
 from django import template
+from django.urls import ResolverMatch
 
 register = template.Library()
 
 
-@register.simple_tag(takes_context=True)
-def current_url_name(context):
-    match = context["request"].resolver_match
+def url_name(match: ResolverMatch | None) -> str | None:
+    if match is None:
+        return None
     if match.namespace:
         return f"{match.namespace}:{match.url_name}"
     return match.url_name
+
+
+@register.simple_tag(takes_context=True)
+def current_url_name(context):
+    return url_name(context["request"].resolver_match)
@@ -0,0 +1,53 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+
+TEMPLATE_SUFFIXES = (".html", ".txt")
+
+
+@dataclass
+class WarmupResult:
+    compiled: list[str] = field(default_factory=list)
+    errors: list[tuple[str, Exception]] = field(default_factory=list)
+
+
+def template_directories() -> list[Path]:
+    engine = engines["django"].engine  # type: ignore
+    directories = [Path(directory) for directory in engine.dirs]
+    for label in settings.TEMPLATE_WARMUP_APPS:
+        directories.append(Path(apps.get_app_config(label).path) / "templates")
+    return directories
+
+
+def template_names() -> Iterator[str]:
+    seen = set()
+    for directory in template_directories():
+        for path in sorted(directory.rglob("*")):
+            if path.suffix not in TEMPLATE_SUFFIXES or not path.is_file():
+                continue
+            name = path.relative_to(directory).as_posix()
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+
+def warm_templates() -> WarmupResult:
+    """
+    Load every project template and those of `TEMPLATE_WARMUP_APPS`. With
+    the cached loader this compiles them into the process's template cache,
+    and either way it reports templates that fail to compile.
+    """
+    engine = engines["django"]
+    result = WarmupResult()
+    for name in template_names():
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as e:
+            result.errors.append((name, e))
+        else:
+            result.compiled.append(name)
+    return result
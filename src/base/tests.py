@@ -1 +1,367 @@
-# Create your tests here.
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import engines
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+
+from base.cache import bump_version, get_versions, household_key, version_key
+from base.cache_backends import stats as cache_stats
+from base.sessions import SessionStore
+from base.storage import CompressedManifestStaticFilesStorage
+from base.sqlite import configure_connection, optimize_connections
+from base.templating import warm_templates
+from households.models import Household, HouseholdMember, HouseholdStats
+from ingredients.models import Ingredient, IngredientsCategory
+
+User = get_user_model()
+
+
+def seed_load(*args) -> str:
+    stdout = StringIO()
+    call_command("seed_load", *[str(arg) for arg in args], stdout=stdout)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db
+class TestSeedLoad:
+    def test_creates_rows(self):
+        output = seed_load(
+            10,
+            "--categories",
+            3,
+            "--ingredients",
+            20,
+            "--members",
+            2,
+            "--batch-size",
+            5,
+        )
+        assert "Created 10 users" in output
+        assert User.objects.count() == 10
+        assert Household.objects.count() == 10
+        assert HouseholdMember.objects.count() == 30
+        assert IngredientsCategory.objects.count() == 30
+        assert Ingredient.objects.count() == 200
+
+    def test_every_user_administers_a_household(self):
+        seed_load(4, "--members", 1)
+        for household in Household.objects.all():
+            assert HouseholdMember.objects.get(
+                household=household, user=household.created_by
+            ).member_type == (HouseholdMember.MemberType.ADMIN)
+
+    def test_stats_match_rows(self):
+        seed_load(3, "--categories", 2, "--ingredients", 7)
+        for stats in HouseholdStats.objects.all():
+            assert stats.ingredients_categories_count == 2
+            assert stats.ingredients_count == 7
+
+    def test_users_share_password(self):
+        seed_load(2, "--password", "secret-password")
+        for user in User.objects.all():
+            assert user.check_password("secret-password")
+
+    def test_same_seed_same_data(self):
+        seed_load(2, "--seed", 7, "--ingredients", 5)
+        first = list(Ingredient.objects.order_by("pk").values_list("uuid", "name"))
+        emails = list(User.objects.order_by("pk").values_list("email", flat=True))
+        Household.objects.all().delete()
+        User.objects.all().delete()
+        seed_load(2, "--seed", 7, "--ingredients", 5)
+        assert (
+            list(Ingredient.objects.order_by("pk").values_list("uuid", "name")) == first
+        )
+        assert list(User.objects.order_by("pk").values_list("email", flat=True)) == (
+            emails
+        )
+
+    def test_rejects_loaded_seed(self):
+        seed_load(2, "--seed", 3, "--ingredients", 1)
+        with pytest.raises(CommandError, match="seed 3"):
+            seed_load(5, "--seed", 3, "--ingredients", 1)
+        seed_load(2, "--seed", 4, "--ingredients", 1)
+        assert User.objects.count() == 4
+
+    def test_rejects_zero_users(self):
+        with pytest.raises(CommandError):
+            seed_load(0)
+
+
+def pragma(name: str):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestSqliteConnection:
+    def test_pragmas_are_applied(self):
+        assert pragma("synchronous") == 1
+        assert pragma("busy_timeout") == 5000
+        assert pragma("cache_size") == -20000
+        assert pragma("temp_store") == 2
+
+    @override_settings(SQLITE_PRAGMAS={"cache_size": -1000})
+    def test_pragmas_come_from_settings(self):
+        configure_connection(sender=None, connection=connection)
+        assert pragma("cache_size") == -1000
+
+    @override_settings(SQLITE_OPTIMIZE_INTERVAL=0)
+    def test_optimize_after_interval(self, monkeypatch):
+        monkeypatch.setattr(connection, "optimized_at", 0, raising=False)
+        monkeypatch.setattr(connection, "in_atomic_block", False)
+        with CaptureQueriesContext(connection) as queries:
+            optimize_connections()
+        assert [query["sql"] for query in queries] == ["PRAGMA optimize"]
+
+    def test_no_optimize_before_interval(self, monkeypatch):
+        monkeypatch.setattr(connection, "in_atomic_block", False)
+        monkeypatch.setattr(connection, "optimized_at", time.monotonic(), raising=False)
+        with CaptureQueriesContext(connection) as queries:
+            optimize_connections()
+        assert len(queries) == 0
+
+
+CACHED_TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": settings.TEMPLATES[0]["DIRS"],
+        "OPTIONS": {
+            **settings.TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )
+            ],
+        },
+    }
+]
+
+
+class TestWarmTemplates:
+    def test_compiles_project_and_crispy_templates(self):
+        result = warm_templates()
+        assert not result.errors
+        assert "layouts/base.html" in result.compiled
+        assert "ingredients/partials/ingredients_page.html" in result.compiled
+        assert "bootstrap5/field.html" in result.compiled
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_fills_cached_loader(self):
+        result = warm_templates()
+        loader = engines["django"].engine.template_loaders[0]  # type: ignore
+        assert set(result.compiled) <= set(loader.get_template_cache)
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command("warm_templates", stdout=stdout)
+        assert "Compiled" in stdout.getvalue()
+
+
+def load_settings(**environ) -> subprocess.CompletedProcess:
+    script = (
+        "import json; from django.conf import settings; print(json.dumps({"
+        "'DEBUG': settings.DEBUG, "
+        "'CONN_MAX_AGE': settings.DATABASES['default']['CONN_MAX_AGE'], "
+        "'CACHE': settings.CACHES['default']['BACKEND'], "
+        "'SESSION_ENGINE': settings.SESSION_ENGINE, "
+        "'CACHED_TEMPLATES': 'cached.Loader' in str(settings.TEMPLATES), "
+        "'METRICS_DIR': settings.METRICS_DIR, "
+        "'STATICFILES': settings.STORAGES['staticfiles']['BACKEND']}))"
+    )
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("GROCEREEZ_", "DJANGO_", "CACHE_", "METRICS_"))
+    }
+    env.update(
+        DJANGO_SETTINGS_MODULE="config.settings", PYTHONPATH=str(settings.BASE_DIR)
+    )
+    env.update(environ)
+    return subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True
+    )
+
+
+class TestSettingsProfiles:
+    def test_production(self):
+        result = load_settings(
+            GROCEREEZ_ENV="production",
+            DJANGO_SECRET_KEY="secret",
+            DJANGO_ALLOWED_HOSTS="example.com",
+            METRICS_TOKEN="token",
+        )
+        assert json.loads(result.stdout) == {
+            "DEBUG": False,
+            "CONN_MAX_AGE": 600,
+            "CACHE": "base.cache_backends.InstrumentedRedisCache",
+            "SESSION_ENGINE": "base.sessions",
+            "CACHED_TEMPLATES": True,
+            "METRICS_DIR": "/var/tmp/grocereez-metrics",
+            "STATICFILES": "base.storage.CompressedManifestStaticFilesStorage",
+        }
+
+    def test_development(self):
+        result = load_settings(GROCEREEZ_ENV="development")
+        values = json.loads(result.stdout)
+        assert values["DEBUG"] is True
+        assert values["CONN_MAX_AGE"] == 0
+        assert values["CACHED_TEMPLATES"] is False
+        assert values["METRICS_DIR"] is None
+
+    def test_production_requires_secret_key(self):
+        result = load_settings(GROCEREEZ_ENV="production", METRICS_TOKEN="token")
+        assert "DJANGO_SECRET_KEY must be set" in result.stderr
+
+    def test_production_requires_metrics_token(self):
+        result = load_settings(
+            GROCEREEZ_ENV="production",
+            DJANGO_SECRET_KEY="secret",
+            DJANGO_ALLOWED_HOSTS="example.com",
+        )
+        assert "METRICS_TOKEN must be set" in result.stderr
+
+    def test_unknown_profile(self):
+        result = load_settings(GROCEREEZ_ENV="staging")
+        assert "GROCEREEZ_ENV must be one of" in result.stderr
+
+    def test_cache_backend(self):
+        result = load_settings(GROCEREEZ_ENV="development", CACHE_BACKEND="redis")
+        values = json.loads(result.stdout)
+        assert values["CACHE"] == "base.cache_backends.InstrumentedRedisCache"
+
+    def test_production_requires_redis(self):
+        result = load_settings(
+            GROCEREEZ_ENV="production",
+            DJANGO_SECRET_KEY="secret",
+            DJANGO_ALLOWED_HOSTS="example.com",
+            METRICS_TOKEN="token",
+            CACHE_BACKEND="file",
+        )
+        assert "CACHE_BACKEND must be redis" in result.stderr
+
+    def test_unknown_cache_backend(self):
+        result = load_settings(CACHE_BACKEND="memcached")
+        assert "CACHE_BACKEND must be one of" in result.stderr
+
+
+class TestCaches:
+    def test_named_caches_are_separate(self):
+        caches["default"].set("key", "default")
+        caches["fragments"].set("key", "fragment")
+        assert caches["default"].get("key") == "default"
+        assert caches["fragments"].get("key") == "fragment"
+
+    def test_counts_hits_and_misses(self):
+        cache = caches["default"]
+        cache.set("present", 1)
+        cache.get("present")
+        cache.get("absent")
+        cache.get("absent", "default")
+        assert cache_stats.snapshot() == {"default": {"hits": 1, "misses": 2}}
+
+    def test_get_many_counts_each_key_once(self):
+        cache = caches["fragments"]
+        cache.set("present", None)
+        assert cache.get_many(["present", "absent"]) == {"present": None}
+        assert cache_stats.snapshot() == {"fragments": {"hits": 1, "misses": 1}}
+
+    def test_versions_live_in_counters(self):
+        key = version_key("catalog", 1)
+        versions = get_versions([key])
+        bump_version("catalog", 1)
+        assert caches["counters"].get(key) == versions[key] + 1
+        assert caches["default"].get(key) is None
+
+    def test_household_key(self):
+        assert household_key(7, "fragment", "members") == "household:7:fragment:members"
+
+
+def expired_session(key: str) -> Session:
+    return Session(
+        session_key=key,
+        session_data="",
+        expire_date=timezone.now() - timedelta(days=1),
+    )
+
+
+@pytest.mark.django_db
+class TestSessions:
+    def test_unchanged_session_is_not_written(self):
+        session = SessionStore()
+        session["household"] = "a"
+        session.save()
+        session = SessionStore(session.session_key)
+        session["household"] = "a"
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        assert len(queries) == 0
+
+    def test_changed_session_is_written(self):
+        session = SessionStore()
+        session["household"] = "a"
+        session.save()
+        session = SessionStore(session.session_key)
+        session["household"] = "b"
+        session.save()
+        caches["sessions"].clear()
+        assert SessionStore(session.session_key)["household"] == "b"
+
+    def test_loaded_from_cache(self):
+        session = SessionStore()
+        session["household"] = "a"
+        session.save()
+        with CaptureQueriesContext(connection) as queries:
+            assert SessionStore(session.session_key)["household"] == "a"
+        assert len(queries) == 0
+
+    def test_clear_expired_in_batches(self):
+        Session.objects.bulk_create(expired_session(f"expired{i}") for i in range(5))
+        session = SessionStore()
+        session["household"] = "a"
+        session.save()
+        assert SessionStore.clear_expired(batch_size=2) == 5
+        assert list(Session.objects.values_list("pk", flat=True)) == [
+            session.session_key
+        ]
+
+    def test_purge_sessions_command(self):
+        Session.objects.bulk_create(expired_session(f"expired{i}") for i in range(3))
+        stdout = StringIO()
+        call_command("purge_sessions", "--batch-size", "2", stdout=stdout)
+        assert "Deleted 3 expired sessions" in stdout.getvalue()
+        assert not Session.objects.exists()
+
+
+class TestCompressedStaticFiles:
+    def test_writes_gzip_copy(self, tmp_path):
+        storage = CompressedManifestStaticFilesStorage(location=tmp_path)
+        content = b"body { color: black; }\n" * 100
+        (tmp_path / "site.css").write_bytes(content)
+        storage.compress("site.css")
+        assert gzip.decompress((tmp_path / "site.css.gz").read_bytes()) == content
+
+    def test_skips_copies_that_are_not_smaller(self, tmp_path):
+        storage = CompressedManifestStaticFilesStorage(location=tmp_path)
+        (tmp_path / "tiny.js").write_bytes(b"1")
+        storage.compress("tiny.js")
+        assert not (tmp_path / "tiny.js.gz").exists()
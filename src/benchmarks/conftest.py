@@ -0,0 +1,208 @@
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+from households.models import Household, HouseholdMember, HouseholdStats
+from ingredients.models import IngredientsCategory, Ingredient
+
+User = get_user_model()
+
+SCALES = [
+    int(scale)
+    for scale in os.environ.get("BENCHMARK_SCALES", "10,1000,50000").split(",")
+]
+REPEAT = int(os.environ.get("BENCHMARK_REPEAT", "5"))
+OUTPUT_DIR = Path(
+    os.environ.get("BENCHMARK_OUTPUT_DIR", settings.BASE_DIR.parent / ".benchmarks")
+)
+
+INGREDIENTS_PER_CATEGORY = 20
+
+
+@dataclass
+class Seeded:
+    scale: int
+    user: object
+    household: Household
+    category: IngredientsCategory
+    ingredient: Ingredient
+
+
+@dataclass
+class Measurement:
+    view: str
+    scale: int
+    queries: int
+    timings_ms: list[float] = field(default_factory=list)
+
+    @property
+    def median_ms(self) -> float:
+        return statistics.median(self.timings_ms)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "median_ms": round(self.median_ms, 3)}
+
+
+def seed(scale: int) -> Seeded:
+    """
+    Create a user with a household holding `scale` ingredients, writing rows
+    with bulk_create so that the large scales take seconds rather than
+    minutes.
+    """
+    user = User.objects.create(
+        email=f"benchmark-{scale}@example.com",
+        display_name=f"Benchmark {scale}",
+        password=make_password("benchmark"),
+    )
+    household = Household.objects.create(name=f"Benchmark {scale}", created_by=user)
+    HouseholdMember.objects.create(
+        household=household, user=user, member_type=HouseholdMember.MemberType.ADMIN
+    )
+    category_count = max(1, scale // INGREDIENTS_PER_CATEGORY)
+    categories = IngredientsCategory.objects.bulk_create(
+        IngredientsCategory(name=f"Category {i:05}", household=household)
+        for i in range(category_count)
+    )
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(
+                name=f"Ingredient {i:06}",
+                household=household,
+                category=categories[i % category_count],
+            )
+            for i in range(scale)
+        ),
+        batch_size=1000,
+    )
+    HouseholdStats.objects.filter(household=household).update(
+        ingredients_categories_count=category_count, ingredients_count=scale
+    )
+    return Seeded(
+        scale=scale,
+        user=user,
+        household=household,
+        category=categories[0],
+        ingredient=Ingredient.objects.filter(household=household).earliest("name"),
+    )
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda scale: f"{scale}")
+def seeded(request, django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        data = seed(request.param)
+    yield data
+    with django_db_blocker.unblock():
+        data.household.delete()
+        data.user.delete()  # type: ignore
+
+
+def write_part(config, name: str, results: list[dict]) -> None:
+    if results:
+        worker = getattr(config, "workerinput", {}).get("workerid", "main")
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        path = OUTPUT_DIR / f"{name}-{worker}.part.json"
+        path.write_text(json.dumps(results))
+
+
+@pytest.fixture(scope="session")
+def measurements(request):
+    collected: list[Measurement] = []
+    yield collected
+    write_part(request.config, "views", [m.as_dict() for m in collected])
+
+
+@pytest.fixture(scope="session")
+def load_results(request):
+    collected: list = []
+    yield collected
+    write_part(request.config, "concurrency", [r.as_dict() for r in collected])
+
+
+@pytest.fixture(scope="session")
+def query_plans(request):
+    collected: list[dict] = []
+    yield collected
+    write_part(request.config, "query_plans", collected)
+
+
+@pytest.fixture
+def measure(measurements, client):
+    """
+    Return a function that requests a URL once to warm caches, then
+    `REPEAT` more times, recording the query count and wall clock time.
+    Rendered fragments are cleared before each measured request, so that
+    the budgets cover the queries a page runs when they are not cached.
+    """
+
+    def measure(
+        view: str,
+        scale: int,
+        url: str,
+        status: int = 200,
+        headers: dict | None = None,
+        **params,
+    ) -> Measurement:
+        response = client.get(url, params, headers=headers)
+        assert response.status_code == status
+        measurement = Measurement(view=view, scale=scale, queries=0)
+        for _ in range(REPEAT):
+            caches["fragments"].clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, params, headers=headers)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                measurement.timings_ms.append((time.perf_counter() - start) * 1000)
+            measurement.queries = max(measurement.queries, len(queries))
+        measurements.append(measurement)
+        return measurement
+
+    return measure
+
+
+def merge_results(name: str, key: tuple[str, ...], compare: tuple[str, ...]):
+    """
+    Combine the results each worker wrote into one file, keeping the
+    `compare` fields of the previous run next to each result so regressions
+    stand out.
+    """
+    parts = sorted(OUTPUT_DIR.glob(f"{name}-*.part.json"))
+    if not parts:
+        return
+    path = OUTPUT_DIR / f"{name}.json"
+    previous = {}
+    if path.exists():
+        for result in json.loads(path.read_text()):
+            previous[tuple(result[field] for field in key)] = result
+    results = []
+    for part in parts:
+        results.extend(json.loads(part.read_text()))
+        part.unlink()
+    for result in results:
+        before = previous.get(tuple(result[field] for field in key))
+        if before:
+            for field in compare:
+                result[f"previous_{field}"] = before[field]
+    results.sort(key=lambda result: tuple(result[field] for field in key))
+    path.write_text(json.dumps(results, indent=2) + "\n")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not hasattr(session.config, "workerinput"):
+        merge_results("views", ("view", "scale"), ("queries", "median_ms"))
+        merge_results("query_plans", ("query", "scale"), ("plan",))
+        merge_results(
+            "concurrency", ("view", "scale", "mode"), ("throughput", "p99_ms")
+        )
@@ -0,0 +1,171 @@
+"""
+Throughput and latency of the views that have async variants under
+concurrent load, in three modes:
+
+- "wsgi": the sync views through the sync handler, as config.wsgi serves
+  them, which is the baseline.
+- "asgi-sync": the same sync views through the async handler.
+- "asgi": their async variants through the async handler, as config.asgi
+  serves them, see `base.async_views`.
+
+For each view, `BENCHMARK_CONCURRENCY` clients share `BENCHMARK_REQUESTS`
+requests. Sync clients each run in a thread of their own. Async clients
+run as tasks on one event loop, each request in a ThreadSensitiveContext
+of its own as under an ASGI server. Both close their database connection
+after every request, as Django does without CONN_MAX_AGE. Throughput and
+the median and 99th percentile latencies are recorded in
+`.benchmarks/concurrency.json`, next to those of the previous run, but are
+not asserted since they depend on the machine.
+
+The clients need to see the seeded rows and each other's sessions from
+their own connections, so the test commits its writes, and the database is
+flushed afterwards. The shared in-memory test database fails contending
+writers with "database table is locked" rather than waiting out
+`busy_timeout`, so like the other benchmarks this runs under
+`make benchmark` rather than in the default test run.
+"""
+
+import asyncio
+import math
+import os
+import statistics
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+import pytest
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+CONCURRENCY = int(os.environ.get("BENCHMARK_CONCURRENCY", "8"))
+REQUESTS = int(os.environ.get("BENCHMARK_REQUESTS", "100"))
+
+VIEWS = [
+    "dashboard:index",
+    "households:index",
+    "households:detail",
+    "ingredients:ingredients-list",
+    "ingredients:categories-list",
+]
+
+
+@dataclass
+class LoadResult:
+    view: str
+    scale: int
+    mode: str
+    concurrency: int
+    requests: int
+    throughput: float
+    p50_ms: float
+    p99_ms: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def shares(total: int, parts: int) -> list[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def run_sync(clients: list[Client], url: str) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+
+    def work(client: Client, count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - start)
+            connections.close_all()
+            assert response.status_code == 200
+
+    threads = [
+        threading.Thread(target=work, args=(client, count))
+        for client, count in zip(clients, shares(REQUESTS, len(clients)))
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+async def run_async(clients: list[AsyncClient], url: str) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+
+    async def work(client: AsyncClient, count: int) -> None:
+        for _ in range(count):
+            async with ThreadSensitiveContext():
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                await sync_to_async(connections.close_all)()
+            assert response.status_code == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            work(client, count)
+            for client, count in zip(clients, shares(REQUESTS, len(clients)))
+        )
+    )
+    return time.perf_counter() - start, latencies
+
+
+async def warm_async(clients: list[AsyncClient], url: str) -> None:
+    for client in clients:
+        response = await client.get(url)
+        await sync_to_async(connections.close_all)()
+        assert response.status_code == 200
+
+
+def result(view, scale, mode, elapsed, latencies) -> LoadResult:
+    assert len(latencies) == REQUESTS, f"{view} failed under {mode} load"
+    return LoadResult(
+        view=view,
+        scale=scale,
+        mode=mode,
+        concurrency=CONCURRENCY,
+        requests=REQUESTS,
+        throughput=round(REQUESTS / elapsed, 1),
+        p50_ms=round(statistics.median(latencies) * 1000, 3),
+        p99_ms=round(percentile(latencies, 0.99) * 1000, 3),
+    )
+
+
+def test_sync_and_async_under_load(seeded, load_results, settings):
+    sync_clients = [Client() for _ in range(CONCURRENCY)]
+    async_clients = [AsyncClient() for _ in range(CONCURRENCY)]
+    for client in [*sync_clients, *async_clients]:
+        client.force_login(seeded.user)
+    root_urlconf = settings.ROOT_URLCONF
+
+    for view in VIEWS:
+        args = [seeded.household.uuid] if view == "households:detail" else []
+        url = reverse(view, args=args)
+        # Warm the caches, and store each session's current household.
+        # Without this, the first requests of every async client write their
+        # sessions at once and contend for the write lock.
+        for client in sync_clients:
+            assert client.get(url).status_code == 200
+        asyncio.run(warm_async(async_clients, url))
+        elapsed, latencies = run_sync(sync_clients, url)
+        load_results.append(result(view, seeded.scale, "wsgi", elapsed, latencies))
+
+        elapsed, latencies = asyncio.run(run_async(async_clients, url))
+        load_results.append(result(view, seeded.scale, "asgi-sync", elapsed, latencies))
+
+        settings.ROOT_URLCONF = settings.ASGI_URLCONF
+        elapsed, latencies = asyncio.run(run_async(async_clients, url))
+        load_results.append(result(view, seeded.scale, "asgi", elapsed, latencies))
+        settings.ROOT_URLCONF = root_urlconf
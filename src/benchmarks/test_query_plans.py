@@ -0,0 +1,106 @@
+"""
+Query plans of the hottest queries, with and without the indexes added for
+them.
+
+Each query is explained against the seeded households, then explained again
+after dropping its index inside the test's transaction, which is rolled
+back afterwards. Both plans are recorded in `.benchmarks/query_plans.json`.
+"""
+
+import uuid
+
+from django.db import connection
+from django.db.models import QuerySet
+import pytest
+
+from households.models import Household, HouseholdMember
+from ingredients.models import IngredientsCategory
+from ingredients.views import ingredient_pages
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def explain(queryset: QuerySet, comment: str = "") -> str:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        # sqlite3 caches prepared statements by their text, and a cached
+        # EXPLAIN keeps reporting the plan it was prepared with.
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql} /* {comment} */", params)
+        return "\n".join(row[-1] for row in cursor.fetchall())
+
+
+def explain_without(index: str, queryset: QuerySet) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX "{index}"')
+    return explain(queryset, f"without {index}")
+
+
+@pytest.fixture
+def record(query_plans, seeded):
+    def record(query: str, index: str, queryset: QuerySet) -> tuple[str, str]:
+        plan = explain(queryset)
+        plan_without = explain_without(index, queryset)
+        query_plans.append(
+            {
+                "query": query,
+                "scale": seeded.scale,
+                "index": index,
+                "plan": plan,
+                "plan_without_index": plan_without,
+            }
+        )
+        return plan, plan_without
+
+    return record
+
+
+class TestQueryPlans:
+    @pytest.mark.parametrize("cursor", [None, ["Category 00000", "Ingredient"]])
+    def test_ingredients_page(self, record, seeded, cursor):
+        index = "ingredient_category_name_idx"
+        categorized = ingredient_pages(seeded.household).paginators[0]
+        values = cursor and [*cursor, str(uuid.UUID(int=0))]
+        queryset = categorized.seek(values)[0][:51]
+        plan, plan_without = record("ingredients page", index, queryset)
+        assert "USING COVERING INDEX category_household_name_idx" in plan
+        assert (
+            f"USING COVERING INDEX {index} (household_id=? AND category_id=?)" in plan
+        )
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan
+        assert index not in plan_without
+
+    def test_uncategorized_ingredients_page(self, record, seeded):
+        index = "ingredient_category_name_idx"
+        uncategorized = ingredient_pages(seeded.household).paginators[1]
+        queryset = uncategorized.seek(["Ingredient", str(uuid.UUID(int=0))])[0][:51]
+        plan, plan_without = record("uncategorized ingredients page", index, queryset)
+        assert f"INDEX {index} (household_id=? AND category_id=? AND name>?)" in plan
+        assert "TEMP B-TREE" not in plan
+        assert index not in plan_without
+
+    def test_categories_page(self, record, seeded):
+        index = "category_household_name_idx"
+        queryset = IngredientsCategory.objects.filter(
+            household=seeded.household
+        ).order_by("name", "uuid")[:51]
+        plan, plan_without = record("categories page", index, queryset)
+        assert f"USING INDEX {index}" in plan
+        assert "TEMP B-TREE" not in plan
+        assert index not in plan_without
+        assert "USE TEMP B-TREE FOR ORDER BY" in plan_without
+
+    def test_memberships(self, record, seeded):
+        index = "member_user_household_idx"
+        queryset = HouseholdMember.objects.filter(user=seeded.user).values_list(
+            "household_id", "member_type"
+        )
+        plan, plan_without = record("memberships", index, queryset)
+        assert f"USING COVERING INDEX {index}" in plan
+        assert "COVERING" not in plan_without
+
+    def test_user_households(self, record, seeded):
+        index = "member_user_household_idx"
+        queryset = Household.objects.filter(householdmember__user=seeded.user)
+        plan, plan_without = record("user households", index, queryset)
+        assert f"USING COVERING INDEX {index}" in plan
+        assert "COVERING" not in plan_without
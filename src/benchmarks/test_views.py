@@ -0,0 +1,138 @@
+"""
+Query count and latency benchmarks for every read-only view.
+
+Each view is measured against households holding 10, 1k and 50k
+ingredients (see `BENCHMARK_SCALES`). The query budget of a view does not
+depend on the scale, so a view that starts issuing a query per row fails at
+every scale above the smallest one. Timings are recorded in
+`.benchmarks/views.json`, next to those of the previous run, but are not
+asserted since they depend on the machine.
+"""
+
+from django.urls import reverse
+import pytest
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+# Authenticated requests load the user before the view runs. The session
+# comes from the cache, and so does the household once the first request
+# warmed it. Rendered fragments do not, see `measure`.
+SESSION = 1
+
+BUDGETS = {
+    "home": 0,
+    "dashboard:index": SESSION + 3,
+    "households:index": SESSION + 2,
+    "households:view-current": SESSION + 2,
+    "households:detail": SESSION + 3,
+    # The household's version and the user's roles for the fragment keys,
+    # then the page. A page that runs out of categorized ingredients goes on
+    # to the uncategorized ones, which takes one more query.
+    "ingredients:ingredients-list": SESSION + 4,
+    "ingredients:ingredients-page": SESSION + 4,
+    "ingredients:categories-list": SESSION + 3,
+    "ingredients:categories-page": SESSION + 3,
+    "ingredients:create-ingredient": SESSION + 1,
+    "ingredients:edit-ingredient": SESSION + 2,
+    "ingredients:create-category": SESSION,
+    "ingredients:edit-category": SESSION + 1,
+    "ingredients:search": SESSION + 2,
+    # Reads the household's version once the index's VERSION_TTL ran out,
+    # which building a large index under load can take.
+    "ingredients:autocomplete": SESSION + 1,
+    "ingredients:export": SESSION + 2,
+    "ingredients:import": SESSION,
+    # Answering a conditional GET only reads the household's version.
+    "not-modified": SESSION + 1,
+}
+
+
+def check(measurement) -> None:
+    budget = BUDGETS[measurement.view.partition("?")[0]]
+    assert measurement.queries <= budget, (
+        f"{measurement.view} ran {measurement.queries} queries with "
+        f"{measurement.scale} ingredients, over its budget of {budget}"
+    )
+
+
+@pytest.fixture
+def logged_in(client, seeded):
+    client.force_login(seeded.user)
+    return seeded
+
+
+class TestAnonymousViews:
+    def test_home(self, measure, seeded):
+        check(measure("home", seeded.scale, reverse("home")))
+
+
+class TestDashboardViews:
+    def test_dashboard(self, measure, logged_in):
+        check(measure("dashboard:index", logged_in.scale, reverse("dashboard:index")))
+
+
+class TestHouseholdViews:
+    @pytest.mark.parametrize("view", ["households:index", "households:view-current"])
+    def test_view(self, measure, logged_in, view):
+        check(measure(view, logged_in.scale, reverse(view)))
+
+    def test_detail(self, measure, logged_in):
+        url = reverse("households:detail", args=[logged_in.household.uuid])
+        check(measure("households:detail", logged_in.scale, url))
+
+
+class TestIngredientViews:
+    @pytest.mark.parametrize(
+        "view",
+        [
+            "ingredients:ingredients-list",
+            "ingredients:ingredients-page",
+            "ingredients:categories-list",
+            "ingredients:categories-page",
+            "ingredients:create-ingredient",
+            "ingredients:create-category",
+            "ingredients:import",
+        ],
+    )
+    def test_view(self, measure, logged_in, view):
+        check(measure(view, logged_in.scale, reverse(view)))
+
+    def test_edit_ingredient(self, measure, logged_in):
+        url = reverse("ingredients:edit-ingredient", args=[logged_in.ingredient.uuid])
+        check(measure("ingredients:edit-ingredient", logged_in.scale, url))
+
+    def test_edit_category(self, measure, logged_in):
+        url = reverse("ingredients:edit-category", args=[logged_in.category.uuid])
+        check(measure("ingredients:edit-category", logged_in.scale, url))
+
+    def test_search(self, measure, logged_in):
+        url = reverse("ingredients:search")
+        check(measure("ingredients:search", logged_in.scale, url, q="ingredient 00"))
+
+    def test_autocomplete(self, measure, logged_in):
+        url = reverse("ingredients:autocomplete")
+        check(measure("ingredients:autocomplete", logged_in.scale, url, q="ingr"))
+
+    @pytest.mark.parametrize("format", ["csv", "jsonl"])
+    def test_export(self, measure, logged_in, format):
+        url = reverse("ingredients:export")
+        view = f"ingredients:export?format={format}"
+        check(measure(view, logged_in.scale, url, format=format))
+
+
+class TestConditionalGet:
+    @pytest.mark.parametrize(
+        "view", ["ingredients:ingredients-list", "ingredients:categories-list"]
+    )
+    def test_not_modified(self, client, measure, logged_in, view):
+        url = reverse(view)
+        etag = client.get(url)["ETag"]
+        check(
+            measure(
+                f"not-modified?{view}",
+                logged_in.scale,
+                url,
+                status=304,
+                headers={"if-none-match": etag},
+            )
+        )
@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from django.core.handlers.asgi import ASGIRequest
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
+
+class AsyncViewsRequest(ASGIRequest):
+    urlconf = settings.ASGI_URLCONF
+
+
 application = get_asgi_application()
+application.request_class = AsyncViewsRequest
+
+if settings.TEMPLATE_WARMUP_ON_START:
+    from base.templating import warm_templates
+
+    warm_templates()
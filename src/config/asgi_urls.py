@@ -0,0 +1,6 @@
+from base.async_views import with_async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+# The URLconf served under ASGI, see `base.async_views`.
+urlpatterns = with_async_views(sync_urlpatterns)
@@ -1,11 +1,14 @@
 # ruff: noqa: F401, F403
 from .auth import *
+from .caches import *
 from .db import *
 from .environment import *
 from .installed_apps import *
 from .locale import *
 from .middleware import *
+from .monitoring import *
 from .security import *
 from .server import *
+from .sessions import *
 from .static_files import *
 from .templates import *
@@ -1,5 +1,7 @@
 from django.urls import reverse_lazy
 
+from .environment import ENVIRONMENT
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -18,3 +20,7 @@ AUTH_PASSWORD_VALIDATORS = [
 AUTH_USER_MODEL = "users.User"
 
 LOGIN_URL = reverse_lazy("users:login")
+
+if ENVIRONMENT == "test":
+    # Hashing passwords properly dominates the time of tests that log in.
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,75 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .environment import ENVIRONMENT
+
+CACHE_BACKENDS = {
+    "locmem": "base.cache_backends.InstrumentedLocMemCache",
+    "file": "base.cache_backends.InstrumentedFileBasedCache",
+    # Any server speaking the Redis protocol. Needs the redis package.
+    "redis": "base.cache_backends.InstrumentedRedisCache",
+}
+
+# Version stamps and invalidations must be seen by every worker, which
+# rules out a per-process cache in production. Bumping a stamp must also be
+# atomic across workers, which the file cache's read-modify-write `incr`
+# is not, so production needs Redis.
+CACHE_BACKEND = os.environ.get(
+    "CACHE_BACKEND", "redis" if ENVIRONMENT == "production" else "locmem"
+)
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, "
+        f"not {CACHE_BACKEND!r}"
+    )
+if ENVIRONMENT == "production" and CACHE_BACKEND != "redis":
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND must be redis in the production profile, since only "
+        "its increments are atomic across workers"
+    )
+
+CACHE_LOCATION = os.environ.get(
+    "CACHE_LOCATION",
+    {"file": "/var/tmp/grocereez-cache", "redis": "redis://localhost:6379/0"}.get(
+        CACHE_BACKEND, ""
+    ),
+)
+
+# Bump to invalidate every cached value, for instance when the shape of
+# cached values changes in a deploy.
+CACHE_VERSION = int(os.environ.get("CACHE_VERSION", "1"))
+
+
+def cache_settings(name: str, timeout: int | None, max_entries: int) -> dict:
+    location = {
+        "locmem": name,
+        "file": f"{CACHE_LOCATION}/{name}",
+        "redis": CACHE_LOCATION,
+    }[CACHE_BACKEND]
+    settings = {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": location,
+        # Keeps the caches apart when they share a server, and names them
+        # in the hit and miss counts.
+        "KEY_PREFIX": name,
+        "VERSION": CACHE_VERSION,
+        "TIMEOUT": timeout,
+    }
+    # Redis evicts by its own maxmemory policy, and passes OPTIONS on to
+    # its connection pool.
+    if CACHE_BACKEND != "redis":
+        settings["OPTIONS"] = {"MAX_ENTRIES": max_entries}
+    return settings
+
+
+CACHES = {
+    # Resolved per-request state, such as the current household.
+    "default": cache_settings("default", 60 * 5, 10000),
+    "sessions": cache_settings("sessions", 60 * 60 * 24 * 14, 10000),
+    # Rendered template fragments, keyed by household version.
+    "fragments": cache_settings("fragments", 60 * 60, 10000),
+    # Version stamps. They never expire, and one that is evicted anyway
+    # comes back from the clock, see `base.cache.get_versions`.
+    "counters": cache_settings("counters", None, 100000),
+}
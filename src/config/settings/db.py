@@ -1,12 +1,35 @@
 from pathlib import Path
 
-from .environment import BASE_DIR
+from .environment import BASE_DIR, ENVIRONMENT
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": Path(BASE_DIR).resolve().parent / "db.sqlite3",
+        # Keep connections open between requests in production instead of
+        # reconnecting, and re-running the pragmas below, every time.
+        "CONN_MAX_AGE": 600 if ENVIRONMENT == "production" else 0,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Take the write lock when a transaction starts, so that writers
+            # wait for `busy_timeout` instead of failing with "database is
+            # locked" when a read lock cannot be upgraded.
+            "transaction_mode": "IMMEDIATE",
+        },
     }
 }
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Applied by `base.sqlite` to every new SQLite connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,
+    "temp_store": "MEMORY",
+}
+
+# Seconds between `PRAGMA optimize` runs on a persistent connection.
+SQLITE_OPTIMIZE_INTERVAL = 60 * 60
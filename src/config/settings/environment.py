@@ -1,5 +1,28 @@
+import os
 from pathlib import Path
 
-DEBUG = True
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ("development", "production", "test")
+
+# Selects the settings profile. Each settings module reads it to pick the
+# values of its concern for that profile.
+ENVIRONMENT = os.environ.get("GROCEREEZ_ENV", "development")
+if ENVIRONMENT not in PROFILES:
+    raise ImproperlyConfigured(
+        f"GROCEREEZ_ENV must be one of {', '.join(PROFILES)}, not {ENVIRONMENT!r}"
+    )
+
+# Besides error pages, DEBUG keeps every query in `connection.queries`.
+DEBUG = ENVIRONMENT == "development"
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def required_environ(name: str) -> str:
+    try:
+        return os.environ[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"{name} must be set in the {ENVIRONMENT} profile"
+        ) from None
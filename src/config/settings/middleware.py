@@ -1,3 +1,8 @@
+# Comes first, so that profiles cover every other middleware.
+PROFILING_MIDDLEWARE = [
+    "monitoring.middleware.ProfilerMiddleware",
+]
+
 DJANGO_MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -9,7 +14,8 @@ DJANGO_MIDDLEWARE = [
 ]
 
 PROJECT_MIDDLEWARE = [
+    "monitoring.middleware.QueryInstrumentationMiddleware",
     "households.middleware.CurrentHouseholdMiddleware",
 ]
 
-MIDDLEWARE = DJANGO_MIDDLEWARE + PROJECT_MIDDLEWARE
+MIDDLEWARE = PROFILING_MIDDLEWARE + DJANGO_MIDDLEWARE + PROJECT_MIDDLEWARE
@@ -0,0 +1,59 @@
+import os
+
+from .environment import BASE_DIR, ENVIRONMENT, required_environ
+
+# Report each request's database time in a Server-Timing header.
+SERVER_TIMING = True
+
+# Statements slower than this many milliseconds are logged with their
+# query plan, see `manage.py slow_queries`. None turns the log off.
+SLOW_QUERY_THRESHOLD = (
+    None
+    if ENVIRONMENT == "test"
+    else float(os.environ.get("SLOW_QUERY_THRESHOLD", "100"))
+)
+SLOW_QUERY_LOG = os.environ.get(
+    "SLOW_QUERY_LOG", str(BASE_DIR.parent / "logs" / "slow-queries.jsonl")
+)
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# Where profiles requested by staff are saved, see
+# monitoring.middleware.ProfilerMiddleware.
+PROFILE_DIR = os.environ.get("PROFILE_DIR", str(BASE_DIR.parent / "profiles"))
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+# Each worker process writes its metrics here for /metrics to sum, see
+# monitoring.metrics. Without it, /metrics only reports the process that
+# serves it.
+if ENVIRONMENT == "production":
+    METRICS_DIR = os.environ.get("METRICS_DIR", "/var/tmp/grocereez-metrics")
+elif ENVIRONMENT == "development":
+    METRICS_DIR = os.environ.get("METRICS_DIR")
+else:
+    METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+# Households changed within this many seconds count as active.
+METRICS_ACTIVE_WINDOW = 60 * 60 * 24
+# /metrics requires an `Authorization: Bearer <token>` header with this
+# token. It is open without one, which only other profiles allow.
+if ENVIRONMENT == "production":
+    METRICS_TOKEN = required_environ("METRICS_TOKEN")
+else:
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request, see monitoring.middleware.
+        "monitoring": {
+            "handlers": ["console"],
+            "level": "WARNING" if ENVIRONMENT == "test" else "INFO",
+            "propagate": False,
+        },
+    },
+}
@@ -1,2 +1,12 @@
-SECRET_KEY = "django-insecure-bw13^)d#t17pho*e312et%f)wcb!9$5on4bb4!%r_+h+o#=8#)"
-ALLOWED_HOSTS = []
+import os
+
+from .environment import ENVIRONMENT, required_environ
+
+if ENVIRONMENT == "production":
+    SECRET_KEY = required_environ("DJANGO_SECRET_KEY")
+    ALLOWED_HOSTS = required_environ("DJANGO_ALLOWED_HOSTS").split(",")
+else:
+    SECRET_KEY = "django-insecure-bw13^)d#t17pho*e312et%f)wcb!9$5on4bb4!%r_+h+o#=8#)"
+    ALLOWED_HOSTS = [
+        host for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",") if host
+    ]
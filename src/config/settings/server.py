@@ -1,2 +1,5 @@
 ROOT_URLCONF = "config.urls"
+# Served by config.asgi, with the async variants of views, see
+# base.async_views.
+ASGI_URLCONF = "config.asgi_urls"
 WSGI_APPLICATION = "config.wsgi.application"
@@ -0,0 +1,5 @@
+# Read sessions from the cache, writing through to the database only when
+# they change.
+SESSION_ENGINE = "base.sessions"
+
+SESSION_CACHE_ALIAS = "sessions"
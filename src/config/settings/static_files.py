@@ -1 +1,15 @@
+from .environment import BASE_DIR, ENVIRONMENT
+
 STATIC_URL = "static/"
+
+STATIC_ROOT = BASE_DIR.parent / "staticfiles"
+
+if ENVIRONMENT == "production":
+    STORAGES = {
+        "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+        },
+        "staticfiles": {
+            "BACKEND": "base.storage.CompressedManifestStaticFilesStorage",
+        },
+    }
@@ -1,20 +1,36 @@
-from .environment import BASE_DIR
+from .environment import BASE_DIR, ENVIRONMENT
+
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+if ENVIRONMENT != "development":
+    # Parse each template once per process instead of on every render.
+    TEMPLATE_LOADERS = [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)]
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            "loaders": TEMPLATE_LOADERS,
         },
     },
 ]
 
+# Templates of these apps are compiled by `warm_templates` along with DIRS.
+TEMPLATE_WARMUP_APPS = ["crispy_bootstrap5"]
+
+# Compile the templates when a worker loads the application, so the first
+# requests after a deploy do not pay for parsing them.
+TEMPLATE_WARMUP_ON_START = ENVIRONMENT == "production"
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.urls import path
 
 from dashboard.views import home_view
+from monitoring.views import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -11,5 +12,6 @@ urlpatterns = [
     path("dashboard/", include("dashboard.urls", namespace="dashboard")),
     path("households/", include("households.urls", namespace="households")),
     path("ingredients/", include("ingredients.urls", namespace="ingredients")),
+    path("metrics", metrics_view, name="metrics"),
     path("", home_view, name="home"),
 ]
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
 from faker import Faker
 import pytest
 
+from base.cache_backends import stats as cache_stats
 from households.models import Household, HouseholdMember
 from ingredients.models import IngredientsCategory, Ingredient
 
@@ -9,6 +12,13 @@ faker = Faker()
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    cache_stats.reset()
+
+
 @pytest.fixture(scope="function")
 def user(db):
     email = faker.email()
@@ -1,11 +1,15 @@
 from typing import cast
 
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.http import HttpResponse
 from django.urls import reverse
 import pytest
 from pytest_django.asserts import assertContains, assertNotContains
 
+from ingredients.models import IngredientsCategory, Ingredient
+
 
 @pytest.mark.django_db
 class TestDashboard:
@@ -35,3 +39,44 @@ class TestDashboard:
         client.login(email=new_user["email"], password=new_user["password"])
         response = cast(HttpResponse, client.get(reverse("dashboard:index")))
         assertNotContains(response, "View Household")
+
+
+@pytest.mark.django_db
+class TestDashboardCounts:
+    def test_counts_follow_create_and_delete(self, client: Client, user, household):
+        client.login(email=user["email"], password=user["password"])
+        client.post(reverse("ingredients:create-category"), data={"name": "Produce"})
+        category = IngredientsCategory.objects.get(name="Produce")
+        for name in ("Apples", "Pears"):
+            client.post(
+                reverse("ingredients:create-ingredient"),
+                data={"name": name, "category": category.pk},
+            )
+        response = cast(HttpResponse, client.get(reverse("dashboard:index")))
+        assert response.context["ingredients"] == 2
+        assert response.context["ingredients_categories"] == 1
+
+        client.post(
+            reverse(
+                "ingredients:delete-ingredient",
+                kwargs={"uuid": Ingredient.objects.get(name="Apples").uuid},
+            )
+        )
+        response = cast(HttpResponse, client.get(reverse("dashboard:index")))
+        assert response.context["ingredients"] == 1
+
+        client.post(
+            reverse("ingredients:delete-category", kwargs={"uuid": category.uuid}),
+            data={"delete_ingredients": True},
+        )
+        response = cast(HttpResponse, client.get(reverse("dashboard:index")))
+        assert response.context["ingredients"] == 0
+        assert response.context["ingredients_categories"] == 0
+
+    def test_dashboard_does_not_count_rows(
+        self, client: Client, user, household, ingredient
+    ):
+        client.login(email=user["email"], password=user["password"])
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("dashboard:index"))
+        assert not any("COUNT(" in q["sql"] for q in queries)
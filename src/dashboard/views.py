@@ -3,29 +3,54 @@ from django.http import HttpRequest, HttpResponse
 from django.urls import reverse_lazy
 from django.shortcuts import render, redirect
 
-from households.models import HouseholdMember
-from households.middleware import HttpRequestWithHousehold
+from base.async_views import arender, async_variant
+from households.cache import aget_current_household, get_current_household
+from households.conditional import household_condition
+from households.membership import get_memberships
+from households.models import HouseholdMember, HouseholdStats
 
-from ingredients.models import IngredientsCategory, Ingredient
 
-
-@login_required
-def dashboard_view(request: HttpRequestWithHousehold) -> HttpResponse:
-    household = request.household
-    members = HouseholdMember.objects.filter(household=household)
-    ingredients_categories = IngredientsCategory.objects.filter(
-        household=household
-    ).count()
-    ingredients = Ingredient.objects.filter(household=household).count()
-    context = {
+def dashboard_context(household, members, stats) -> dict:
+    return {
         "household": household,
         "members": members,
-        "ingredients_categories": ingredients_categories,
-        "ingredients": ingredients,
+        "ingredients_categories": stats.ingredients_categories_count if stats else 0,
+        "ingredients": stats.ingredients_count if stats else 0,
     }
+
+
+@login_required
+@household_condition
+def dashboard_view(request: HttpRequest) -> HttpResponse:
+    household = get_current_household(request)
+    members = list(
+        HouseholdMember.objects.filter(household=household).select_related("user")
+    )
+    if household:
+        get_memberships(request.user).remember(household, members)
+    stats = HouseholdStats.objects.filter(household=household).first()
+    context = dashboard_context(household, members, stats)
     return render(request, "pages/dashboard.html", context=context)
 
 
+@async_variant(dashboard_view)
+@login_required
+@household_condition
+async def adashboard_view(request: HttpRequest) -> HttpResponse:
+    household = await aget_current_household(request)
+    members = [
+        member
+        async for member in HouseholdMember.objects.filter(
+            household=household
+        ).select_related("user")
+    ]
+    if household:
+        get_memberships(request.user).remember(household, members)
+    stats = await HouseholdStats.objects.filter(household=household).afirst()
+    context = dashboard_context(household, members, stats)
+    return await arender(request, "pages/dashboard.html", context)
+
+
 def home_view(request: HttpRequest) -> HttpResponse:
     if request.user.is_authenticated:
         return redirect(reverse_lazy("dashboard:index"))
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class HouseholdsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "households"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
+        from .versioning import ensure_version_triggers
+
+        post_migrate.connect(ensure_version_triggers, sender=self)
@@ -0,0 +1,172 @@
+from django.core.cache import cache
+from django.http import HttpRequest
+
+from base.cache import (
+    aget_versions,
+    bump_version,
+    get_versions,
+    make_key,
+    version_key,
+)
+
+from .models import Household
+
+CURRENT_HOUSEHOLD_TIMEOUT = 60 * 15
+CURRENT_HOUSEHOLD_ATTRIBUTE = "_current_household"
+
+HOUSEHOLD_NAMESPACE = "household"
+USER_NAMESPACE = "household-user"
+
+
+def current_household_key(session_key: str) -> str:
+    return make_key("households", "current", session_key)
+
+
+def invalidate_household(household: Household) -> None:
+    bump_version(HOUSEHOLD_NAMESPACE, household.uuid)
+
+
+def invalidate_user(user_id: int) -> None:
+    bump_version(USER_NAMESPACE, user_id)
+
+
+def _version_keys(user_id: int, uuid: str | None) -> list[str]:
+    keys = [version_key(USER_NAMESPACE, user_id)]
+    if uuid:
+        keys.append(version_key(HOUSEHOLD_NAMESPACE, uuid))
+    return keys
+
+
+def load_current_household(request: HttpRequest) -> Household | None:
+    uuid = request.session.get("current_household_uuid")
+    household = None
+    if uuid:
+        try:
+            household = Household.objects.get(uuid=uuid)
+        except Household.DoesNotExist:
+            pass
+    else:
+        household = Household.objects.filter(householdmember__user=request.user).first()
+        if household:
+            request.session.update({"current_household_uuid": str(household.uuid)})
+    return household
+
+
+async def aload_current_household(request: HttpRequest) -> Household | None:
+    uuid = await request.session.aget("current_household_uuid")
+    household = None
+    if uuid:
+        try:
+            household = await Household.objects.aget(uuid=uuid)
+        except Household.DoesNotExist:
+            pass
+    else:
+        household = await Household.objects.filter(
+            householdmember__user=request.user
+        ).afirst()
+        if household:
+            await request.session.aupdate(
+                {"current_household_uuid": str(household.uuid)}
+            )
+    return household
+
+
+def lookup_current_household(request: HttpRequest) -> Household | None:
+    """
+    Resolve the household for the request's session, serving it from the
+    cache while neither the household nor the user's memberships have changed
+    since it was stored.
+    """
+    session_key = request.session.session_key
+    if not session_key:
+        return load_current_household(request)
+
+    uuid = request.session.get("current_household_uuid")
+    key = current_household_key(session_key)
+    version_keys = _version_keys(request.user.pk, uuid)
+    entry = cache.get(key)
+    versions = get_versions(version_keys)
+    if (
+        entry is not None
+        and entry["uuid"] == uuid
+        and entry["versions"] == [versions[k] for k in version_keys]
+    ):
+        return entry["household"]
+
+    # Versions are read before loading so that a write racing with the load
+    # leaves the stored entry stale rather than the other way round.
+    household = load_current_household(request)
+    if request.session.get("current_household_uuid") != uuid:
+        uuid = request.session.get("current_household_uuid")
+        version_keys = _version_keys(request.user.pk, uuid)
+        versions = get_versions(version_keys)
+    cache.set(
+        key,
+        {
+            "uuid": uuid,
+            "versions": [versions[k] for k in version_keys],
+            "household": household,
+        },
+        CURRENT_HOUSEHOLD_TIMEOUT,
+    )
+    return household
+
+
+async def alookup_current_household(request: HttpRequest) -> Household | None:
+    """See `lookup_current_household`."""
+    session_key = request.session.session_key
+    if not session_key:
+        return await aload_current_household(request)
+
+    uuid = await request.session.aget("current_household_uuid")
+    key = current_household_key(session_key)
+    version_keys = _version_keys(request.user.pk, uuid)
+    entry = await cache.aget(key)
+    versions = await aget_versions(version_keys)
+    if (
+        entry is not None
+        and entry["uuid"] == uuid
+        and entry["versions"] == [versions[k] for k in version_keys]
+    ):
+        return entry["household"]
+
+    household = await aload_current_household(request)
+    if await request.session.aget("current_household_uuid") != uuid:
+        uuid = await request.session.aget("current_household_uuid")
+        version_keys = _version_keys(request.user.pk, uuid)
+        versions = await aget_versions(version_keys)
+    await cache.aset(
+        key,
+        {
+            "uuid": uuid,
+            "versions": [versions[k] for k in version_keys],
+            "household": household,
+        },
+        CURRENT_HOUSEHOLD_TIMEOUT,
+    )
+    return household
+
+
+def get_current_household(request: HttpRequest) -> Household | None:
+    """
+    Return the current household of the request's user, or None for
+    anonymous users and users without one. It is looked up on first use and
+    kept on the request, so requests that never need it never pay for it.
+    """
+    if not hasattr(request, CURRENT_HOUSEHOLD_ATTRIBUTE):
+        household = None
+        if request.user.is_authenticated:
+            household = lookup_current_household(request)
+        setattr(request, CURRENT_HOUSEHOLD_ATTRIBUTE, household)
+    return getattr(request, CURRENT_HOUSEHOLD_ATTRIBUTE)
+
+
+async def aget_current_household(request: HttpRequest) -> Household | None:
+    """See `get_current_household`."""
+    if not hasattr(request, CURRENT_HOUSEHOLD_ATTRIBUTE):
+        household = None
+        user = await request.auser()
+        if user.is_authenticated:
+            household = await alookup_current_household(request)
+        setattr(request, CURRENT_HOUSEHOLD_ATTRIBUTE, household)
+    return getattr(request, CURRENT_HOUSEHOLD_ATTRIBUTE)
@@ -0,0 +1,38 @@
+from functools import wraps
+from typing import Callable
+from uuid import UUID
+
+from django.db.models import Model
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseForbidden
+
+from .cache import get_current_household
+
+
+def household_object(
+    model: type[Model], argument: str, forbidden_message: str
+) -> Callable:
+    """
+    Resolve a view's `uuid` URL argument to the current household's instance
+    of `model` with a single lookup, and pass it to the view as `argument`
+    instead. A uuid belonging to another household is forbidden and an
+    unknown uuid is not found; telling the two apart costs a second query
+    only when the lookup misses.
+    """
+
+    def decorator(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+        @wraps(view)
+        def wrapper(request: HttpRequest, uuid: UUID, *args, **kwargs) -> HttpResponse:
+            manager = model._default_manager
+            household = get_current_household(request)
+            try:
+                instance = manager.for_household(household).get(uuid=uuid)  # type: ignore
+            except model.DoesNotExist:  # type: ignore
+                if manager.filter(uuid=uuid).exists():
+                    return HttpResponseForbidden(forbidden_message)
+                raise Http404(f"No {model._meta.verbose_name} matches the given query.")
+            kwargs[argument] = instance
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,80 @@
+from itertools import batched
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Model, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from households.models import Household, HouseholdStats
+from ingredients.models import Ingredient, IngredientsCategory
+
+BATCH_SIZE = 1000
+
+
+def count_for_household(model: type[Model]) -> Coalesce:
+    return Coalesce(
+        Subquery(
+            model.objects.filter(household=OuterRef("pk"))  # type: ignore
+            .order_by()
+            .values("household")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    help = "Recount the denormalized per-household counters from scratch."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--household",
+            action="append",
+            dest="households",
+            metavar="UUID",
+            help="Only rebuild the given household. May be repeated.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        households = Household.objects.all()
+        if options["households"]:
+            uuids = []
+            for value in options["households"]:
+                try:
+                    uuids.append(uuid.UUID(value))
+                except ValueError:
+                    raise CommandError(f"Not a household UUID: {value}")
+            households = households.filter(uuid__in=uuids)
+        households = households.annotate(
+            ingredients_categories=count_for_household(IngredientsCategory),
+            ingredients=count_for_household(Ingredient),
+        ).values_list("pk", "ingredients_categories", "ingredients")
+
+        rebuilt = 0
+        with transaction.atomic():
+            for batch in batched(
+                households.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE
+            ):
+                HouseholdStats.objects.bulk_create(
+                    [
+                        HouseholdStats(
+                            household_id=pk,
+                            ingredients_categories_count=categories,
+                            ingredients_count=ingredients,
+                        )
+                        for pk, categories, ingredients in batch
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["household"],
+                    update_fields=["ingredients_categories_count", "ingredients_count"],
+                )
+                # Pages showing the counts are cached by version, see
+                # `households.conditional`.
+                HouseholdStats.objects.filter(
+                    household_id__in=[pk for pk, _, _ in batch]
+                ).update(version=F("version") + 1, modified_at=timezone.now())
+                rebuilt += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} households"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from households.versioning import create_version_triggers, drop_version_triggers
+
+
+class Command(BaseCommand):
+    help = "Recreate the triggers that bump household versions on writes."
+
+    def handle(self, *args, **options) -> None:
+        if connection.vendor != "sqlite":
+            raise CommandError("The version triggers require SQLite.")
+        with transaction.atomic(), connection.cursor() as cursor:
+            drop_version_triggers(cursor.execute)
+            create_version_triggers(cursor.execute)
+        self.stdout.write(self.style.SUCCESS("Rebuilt the household version triggers"))
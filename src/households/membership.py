@@ -0,0 +1,67 @@
+from collections.abc import Iterable
+
+from django.contrib.auth.models import AbstractBaseUser, AnonymousUser
+from django.utils.functional import cached_property
+
+from .models import Household, HouseholdMember
+
+CACHE_ATTRIBUTE = "_household_memberships"
+
+
+class Memberships:
+    """
+    All of a user's household memberships, loaded with one query the first
+    time a role is checked and reused for every later check.
+    """
+
+    def __init__(self, user: AbstractBaseUser | AnonymousUser) -> None:
+        self.user = user
+        self.known_roles: dict[int, str | None] = {}
+
+    def remember(
+        self, household: Household, members: Iterable[HouseholdMember]
+    ) -> None:
+        """
+        Record the user's role in `household` from a member list a view has
+        already loaded, so that checking it does not need a query.
+        """
+        self.known_roles[household.pk] = next(
+            (m.member_type for m in members if m.user_id == self.user.pk),  # type: ignore
+            None,
+        )
+
+    @cached_property
+    def member_types(self) -> dict[int, str]:
+        if not self.user.is_authenticated:
+            return {}
+        return dict(
+            HouseholdMember.objects.filter(user=self.user).values_list(
+                "household_id", "member_type"
+            )
+        )
+
+    def role(self, household: Household | None) -> str | None:
+        if household is None:
+            return None
+        if household.pk in self.known_roles:
+            return self.known_roles[household.pk]
+        return self.member_types.get(household.pk)
+
+    def is_member(self, household: Household | None) -> bool:
+        return self.role(household) is not None
+
+    def is_admin(self, household: Household | None) -> bool:
+        return self.role(household) == HouseholdMember.MemberType.ADMIN
+
+
+def get_memberships(user: AbstractBaseUser | AnonymousUser) -> Memberships:
+    """
+    Return the memberships resolver for `user`, stored on the user object so
+    that it lives exactly as long as the request that loaded the user.
+    """
+    try:
+        return getattr(user, CACHE_ATTRIBUTE)
+    except AttributeError:
+        memberships = Memberships(user)
+        setattr(user, CACHE_ATTRIBUTE, memberships)
+        return memberships
@@ -1,41 +1,35 @@
 from typing import Callable
-from django.http import HttpRequest, HttpResponse
-
-from .models import Household
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
 
-class HttpRequestWithHousehold(HttpRequest):
-    household: Household | None
 
-    def __init__(self, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
+class CurrentHouseholdMiddleware:
+    """
+    Loads the user up front under ASGI, so that async views and the sync
+    code they call can both look up the current household with
+    `households.cache.aget_current_household` or `get_current_household`,
+    which resolve it on first use.
+    """
 
+    sync_capable = True
+    async_capable = True
 
-class CurrentHouseholdMiddleware:
-    def __init__(
-        self, get_response: Callable[[HttpRequestWithHousehold], HttpResponse]
-    ):
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request: HttpRequestWithHousehold) -> HttpResponse:
-        if request.user.is_authenticated:
-            uuid = request.session.get("current_household_uuid")
-            household = None
-            if uuid:
-                try:
-                    household = Household.objects.get(uuid=uuid)
-                except Household.DoesNotExist:
-                    pass
-            else:
-                household = Household.objects.filter(
-                    householdmember__user=request.user
-                ).first()
-                if household:
-                    request.session.update(
-                        {"current_household_uuid": str(household.uuid)}
-                    )
-
-            request.household = household
-
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)  # type: ignore
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        # Load the user here, since sync code further on, such as templates
+        # and context processors, cannot load it from an async context.
+        request.user = await request.auser()  # type: ignore
+
+        response = await self.get_response(request)  # type: ignore
+        return response
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_for_household(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(household=OuterRef("pk"))
+            .order_by()
+            .values("household")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+def create_household_stats(apps, schema_editor):
+    Household = apps.get_model("households", "Household")
+    HouseholdStats = apps.get_model("households", "HouseholdStats")
+    IngredientsCategory = apps.get_model("ingredients", "IngredientsCategory")
+    Ingredient = apps.get_model("ingredients", "Ingredient")
+    households = Household.objects.annotate(
+        ingredients_categories_count=count_for_household(IngredientsCategory),
+        ingredients_count=count_for_household(Ingredient),
+    )
+    HouseholdStats.objects.bulk_create(
+        HouseholdStats(
+            household_id=h.pk,
+            ingredients_categories_count=h.ingredients_categories_count,
+            ingredients_count=h.ingredients_count,
+        )
+        for h in households.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0004_alter_householdmember_options"),
+        ("ingredients", "0005_ingredient"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HouseholdStats",
+            fields=[
+                (
+                    "household",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="households.household",
+                    ),
+                ),
+                (
+                    "ingredients_categories_count",
+                    models.PositiveIntegerField(default=0),
+                ),
+                ("ingredients_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Household Stats",
+                "verbose_name_plural": "Household Stats",
+            },
+        ),
+        migrations.RunPython(create_household_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0005_householdstats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="householdmember",
+            index=models.Index(
+                fields=["user", "household", "member_type"],
+                name="member_user_household_idx",
+            ),
+        ),
+    ]
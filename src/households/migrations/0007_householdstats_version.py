@@ -0,0 +1,153 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# A frozen copy of the triggers in `households.versioning` as they were
+# when this migration was written.
+CREATE_TRIGGERS = [
+    """
+CREATE TRIGGER households_householdmember_version_insert
+AFTER INSERT ON households_householdmember BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.household_id;
+END
+    """,
+    """
+CREATE TRIGGER households_householdmember_version_delete
+AFTER DELETE ON households_householdmember BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.household_id;
+END
+    """,
+    """
+CREATE TRIGGER households_householdmember_version_update
+AFTER UPDATE ON households_householdmember BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.household_id;
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.household_id
+        AND OLD.household_id IS NOT NEW.household_id;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredientscategory_version_insert
+AFTER INSERT ON ingredients_ingredientscategory BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.household_id;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredientscategory_version_delete
+AFTER DELETE ON ingredients_ingredientscategory BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.household_id;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredientscategory_version_update
+AFTER UPDATE ON ingredients_ingredientscategory BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.household_id;
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.household_id
+        AND OLD.household_id IS NOT NEW.household_id;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredient_version_insert
+AFTER INSERT ON ingredients_ingredient BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.household_id;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredient_version_delete
+AFTER DELETE ON ingredients_ingredient BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.household_id;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredient_version_update
+AFTER UPDATE ON ingredients_ingredient BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.household_id;
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.household_id
+        AND OLD.household_id IS NOT NEW.household_id;
+END
+    """,
+    """
+CREATE TRIGGER households_household_version_update
+AFTER UPDATE ON households_household BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = NEW.id;
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = OLD.id
+        AND OLD.id IS NOT NEW.id;
+END
+    """,
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS households_householdmember_version_insert",
+    "DROP TRIGGER IF EXISTS households_householdmember_version_delete",
+    "DROP TRIGGER IF EXISTS households_householdmember_version_update",
+    "DROP TRIGGER IF EXISTS ingredients_ingredientscategory_version_insert",
+    "DROP TRIGGER IF EXISTS ingredients_ingredientscategory_version_delete",
+    "DROP TRIGGER IF EXISTS ingredients_ingredientscategory_version_update",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_version_insert",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_version_delete",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_version_update",
+    "DROP TRIGGER IF EXISTS households_household_version_update",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0006_access_pattern_indexes"),
+        ("ingredients", "0007_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="householdstats",
+            name="modified_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="householdstats",
+            name="version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
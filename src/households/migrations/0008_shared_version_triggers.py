@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# A frozen copy of the triggers in `households.versioning` as they were
+# when this migration was written.
+CREATE_TRIGGERS = [
+    """
+CREATE TRIGGER ingredients_ingredient_version_shared_insert
+AFTER INSERT ON ingredients_ingredient WHEN NEW.is_system BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now');
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredient_version_shared_delete
+AFTER DELETE ON ingredients_ingredient WHEN OLD.is_system BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now');
+END
+    """,
+    """
+CREATE TRIGGER ingredients_ingredient_version_shared_update
+AFTER UPDATE ON ingredients_ingredient WHEN OLD.is_system OR NEW.is_system BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now');
+END
+    """,
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_version_shared_insert",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_version_shared_delete",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_version_shared_update",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0007_householdstats_version"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# A frozen copy of the trigger in `households.versioning` as it was when
+# this migration was written.
+CREATE_TRIGGERS = [
+    """
+CREATE TRIGGER users_user_version_update
+AFTER UPDATE OF display_name, email ON users_user
+WHEN OLD.display_name IS NOT NEW.display_name OR OLD.email IS NOT NEW.email
+BEGIN
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id IN (
+        SELECT household_id FROM households_householdmember
+        WHERE user_id = NEW.id
+    );
+END
+    """,
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS users_user_version_update",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0008_shared_version_triggers"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -1,9 +1,24 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
 from base.models import BaseModel
 
 
+class HouseholdScopedQuerySet(models.QuerySet):
+    """
+    Queries for models that belong to a household through a `household`
+    foreign key.
+    """
+
+    def for_household(self, household: "Household | None") -> models.QuerySet:
+        if household is None:
+            return self.none()
+        return self.filter(household_id=household.pk)
+
+
 class Household(BaseModel):
     pass
     name = models.CharField(max_length=150, blank=False, null=False)
@@ -15,7 +30,9 @@ class Household(BaseModel):
     )
 
     def user_is_admin(self, user):
-        return HouseholdMember.objects.filter(household=self, user=user).exists()
+        from .membership import get_memberships
+
+        return get_memberships(user).is_admin(self)
 
     def clean(self) -> None:
         super().clean()
@@ -45,5 +62,71 @@ class HouseholdMember(models.Model):
 
     class Meta:
         unique_together = ("household", "user")
+        indexes = [
+            # Covers looking up a user's households and roles without
+            # reading the table.
+            models.Index(
+                fields=["user", "household", "member_type"],
+                name="member_user_household_idx",
+            ),
+        ]
         verbose_name = "Household Memnber"
         verbose_name_plural = "Household Members"
+
+
+class HouseholdStats(models.Model):
+    """
+    Denormalized per-household counters, so that pages such as the dashboard
+    can show totals without counting rows on every request.
+    """
+
+    household = models.OneToOneField(
+        Household,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    ingredients_categories_count = models.PositiveIntegerField(default=0)
+    ingredients_count = models.PositiveIntegerField(default=0)
+    # Bumped by database triggers on every write to the household, its
+    # members or its catalog, see `households.versioning`.
+    version = models.PositiveBigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def adjust(
+        cls,
+        household: Household,
+        ingredients_categories: int = 0,
+        ingredients: int = 0,
+    ) -> None:
+        """
+        Apply deltas to the counters in a single UPDATE. Call it inside the
+        same transaction as the write it accounts for.
+        """
+        changes = {}
+        if ingredients_categories:
+            changes["ingredients_categories_count"] = Greatest(
+                F("ingredients_categories_count") + ingredients_categories, 0
+            )
+        if ingredients:
+            changes["ingredients_count"] = Greatest(
+                F("ingredients_count") + ingredients, 0
+            )
+        if changes:
+            cls.objects.filter(household=household).update(**changes)
+
+    @classmethod
+    def version_of(cls, household: Household) -> int | None:
+        return (
+            cls.objects.filter(household=household)
+            .values_list("version", flat=True)
+            .first()
+        )
+
+    def __str__(self) -> str:
+        return f"{self.household} stats"
+
+    class Meta:
+        verbose_name = "Household Stats"
+        verbose_name_plural = "Household Stats"
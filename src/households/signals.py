@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_household, invalidate_user
+from .models import Household, HouseholdMember, HouseholdStats
+
+
+@receiver(post_save, sender=Household)
+@receiver(post_delete, sender=Household)
+def household_changed(sender, instance: Household, **kwargs) -> None:
+    invalidate_household(instance)
+
+
+@receiver(post_save, sender=Household)
+def create_household_stats(
+    sender, instance: Household, created: bool, raw: bool, **kwargs
+) -> None:
+    if created and not raw:
+        HouseholdStats.objects.create(household=instance)
+
+
+@receiver(post_save, sender=HouseholdMember)
+@receiver(post_delete, sender=HouseholdMember)
+def membership_changed(sender, instance: HouseholdMember, **kwargs) -> None:
+    invalidate_user(instance.user_id)  # type: ignore
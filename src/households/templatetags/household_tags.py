@@ -1,16 +1,93 @@
 from django import template
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
 from django.template import RequestContext
 
-from ..models import Household, HouseholdMember
+from base.cache import household_key
+
+from ..conditional import get_household_version
+from ..membership import get_memberships
+from ..models import Household
+
+FRAGMENT_TIMEOUT = 60 * 60
 
 register = template.Library()
 
 
 @register.simple_tag(takes_context=True)
 def user_is_household_admin(context: RequestContext, household: Household):
-    try:
-        return HouseholdMember.objects.get(
-            household=household, user=context["user"]
-        ).is_admin()
-    except HouseholdMember.DoesNotExist:
-        return False
+    return get_memberships(context["user"]).is_admin(household)
+
+
+class HouseholdCacheNode(template.Node):
+    def __init__(
+        self,
+        nodelist: template.NodeList,
+        fragment_name: str,
+        household: template.base.FilterExpression,
+        vary_on: list[template.base.FilterExpression],
+        per_user: bool,
+    ) -> None:
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.household = household
+        self.vary_on = vary_on
+        self.per_user = per_user
+
+    def render(self, context) -> str:
+        request = context.get("request")
+        household = self.household.resolve(context)
+        if request is None or household is None:
+            return self.nodelist.render(context)
+        version = get_household_version(request, household)
+        if version is None:
+            return self.nodelist.render(context)
+        user = context["user"]
+        vary_on = [version, get_memberships(user).role(household)]
+        if self.per_user:
+            vary_on.append(user.pk)
+        vary_on.extend(var.resolve(context) for var in self.vary_on)
+        key = household_key(
+            household.pk,
+            make_template_fragment_key(self.fragment_name, vary_on),
+        )
+        cache = caches["fragments"]
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            cache.set(key, fragment, FRAGMENT_TIMEOUT)
+        return fragment
+
+
+@register.tag
+def household_cache(parser, token) -> HouseholdCacheNode:
+    """
+    Cache a fragment until its household changes, for each member role:
+
+        {% household_cache "name" household [vary_on ...] [per_user] %}
+        ...
+        {% endhousehold_cache %}
+
+    The key includes the household's version, which every write to the
+    household or its rows bumps, so fragments never need to be invalidated
+    by hand. Add `per_user` to fragments that differ between members of
+    the same role. Fragments are rendered uncached without a household.
+    """
+    nodelist = parser.parse(("endhousehold_cache",))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"{bits[0]} takes at least a fragment name and a household."
+        )
+    fragment_name = bits[1].strip("\"'")
+    per_user = bits[-1] == "per_user"
+    if per_user:
+        bits = bits[:-1]
+    return HouseholdCacheNode(
+        nodelist,
+        fragment_name,
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+        per_user,
+    )
@@ -1,17 +1,32 @@
+from io import StringIO
 from typing import cast
 import uuid
 from unittest.mock import Mock
 
+from asgiref.sync import async_to_sync, iscoroutinefunction
 from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.http import HttpResponse
 from django.test import Client, RequestFactory
-from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.html import escape
 import pytest
 from pytest_django.asserts import assertRedirects, assertContains
 
+from base.sqlite import existing_triggers
+from dashboard.views import adashboard_view, dashboard_view
+from ingredients.models import Ingredient, IngredientsCategory
+
 from .forms import HouseholdCreateForm
-from .middleware import CurrentHouseholdMiddleware, HttpRequestWithHousehold
-from .models import Household, HouseholdMember
+from .membership import get_memberships
+from .cache import aget_current_household, get_current_household
+from .middleware import CurrentHouseholdMiddleware
+from .models import Household, HouseholdMember, HouseholdStats
+from .versioning import ensure_version_triggers
 
 
 @pytest.mark.django_db
@@ -194,32 +209,477 @@ class TestAddMember:
 
 
 @pytest.mark.django_db
-class TestCurrentHouseholdMiddleware:
-    def test_middleware_adds_nothing_for_anon_user(
-        self, client: Client, user, household
-    ):
-        factory = RequestFactory()
-        request = cast(HttpRequestWithHousehold, factory.get(reverse("home")))
+class TestCurrentHousehold:
+    def test_none_for_anon_user(self, django_assert_num_queries):
+        request = RequestFactory().get(reverse("home"))
         request.user = Mock()
         request.user.is_authenticated = False
-        mock_get_response = Mock(return_value=Mock(status_code=200))
-        middleware = CurrentHouseholdMiddleware(mock_get_response)
-        response = middleware(request)
-        assert response.status_code == 200
-        assert not hasattr(request, "household")
+        with django_assert_num_queries(0):
+            assert get_current_household(request) is None
 
-    def test_middleware_adds_household(self, client: Client, user, household):
-        factory = RequestFactory()
-        request = cast(
-            HttpRequestWithHousehold, factory.get(reverse("dashboard:index"))
-        )
+    def test_household_from_session(self, user, household):
+        request = RequestFactory().get(reverse("dashboard:index"))
         request.user = user["user"]
         request.session = SessionStore()
         request.session.update({"current_household_uuid": str(household.uuid)})
-        # request.user.is_authenticated = True  # type: ignore
-        mock_get_response = Mock(return_value=Mock(status_code=200))
-        middleware = CurrentHouseholdMiddleware(mock_get_response)
-        response = middleware(request)
+        assert get_current_household(request) == household
+
+    def test_middleware_resolves_household_lazily(
+        self, django_assert_num_queries, user, household
+    ):
+        request = RequestFactory().get(reverse("dashboard:index"))
+        request.user = user["user"]
+        request.session = SessionStore()
+        request.session.update({"current_household_uuid": str(household.uuid)})
+        request.session.create()
+        middleware = CurrentHouseholdMiddleware(Mock(return_value=HttpResponse()))
+        with django_assert_num_queries(0):
+            middleware(request)
+        with django_assert_num_queries(1):
+            assert get_current_household(request) == household
+        with django_assert_num_queries(0):
+            assert get_current_household(request) == household
+        assert type(request) is WSGIRequest
+
+    def test_serves_household_from_cache(
+        self, django_assert_num_queries, user, household
+    ):
+        session = SessionStore()
+        session.update({"current_household_uuid": str(household.uuid)})
+        session.create()
+
+        def get_household():
+            request = RequestFactory().get(reverse("home"))
+            request.user = user["user"]
+            request.session = session
+            return get_current_household(request)
+
+        assert get_household() == household
+        with django_assert_num_queries(0):
+            assert get_household() == household
+
+        household.name = "Renamed Household"
+        household.save()
+        with django_assert_num_queries(1):
+            assert cast(Household, get_household()).name == "Renamed Household"
+
+        HouseholdMember.objects.filter(household=household).delete()
+        household.delete()
+        with django_assert_num_queries(1):
+            assert get_household() is None
+
+    def test_cache_invalidated_by_membership(
+        self, django_assert_num_queries, new_user, household_name
+    ):
+        session = SessionStore()
+        session.create()
+
+        def get_household():
+            request = RequestFactory().get(reverse("home"))
+            request.user = new_user["user"]
+            request.session = session
+            return get_current_household(request)
+
+        assert get_household() is None
+        with django_assert_num_queries(0):
+            assert get_household() is None
+
+        h = Household.objects.create(name=household_name, created_by=new_user["user"])
+        HouseholdMember.objects.create(household=h, user=new_user["user"])
+        assert get_household() == h
+
+    def test_async_middleware(self, django_assert_num_queries, user, household):
+        session = SessionStore()
+        session.update({"current_household_uuid": str(household.uuid)})
+        session.create()
+
+        async def get_response(request):
+            return HttpResponse()
+
+        async def auser():
+            return user["user"]
+
+        async def get_household():
+            middleware = CurrentHouseholdMiddleware(get_response)
+            assert iscoroutinefunction(middleware)
+            request = RequestFactory().get(reverse("home"))
+            request.session = session
+            request.auser = auser  # type: ignore
+            await middleware(request)
+            return request, await aget_current_household(request)
+
+        request, current = async_to_sync(get_household)()
+        assert current == household
+        assert request.user == user["user"]
+        with django_assert_num_queries(0):
+            assert get_current_household(request) == household
+            assert async_to_sync(get_household)()[1] == household
+
+
+@pytest.mark.django_db
+class TestHouseholdStats:
+    def test_stats_created_with_household(self, user, household_name):
+        h = Household.objects.create(name=household_name, created_by=user["user"])
+        stats = HouseholdStats.objects.get(household=h)
+        assert stats.ingredients_count == 0
+        assert stats.ingredients_categories_count == 0
+
+    def test_adjust_never_goes_negative(self, household):
+        HouseholdStats.adjust(household, ingredients=-5)
+        assert HouseholdStats.objects.get(household=household).ingredients_count == 0
+
+    def test_rebuild_command_recounts(self, household, ingredients_category):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ingredient {i}", household=household) for i in range(3)
+        )
+        IngredientsCategory.objects.create(name="Produce", household=household)
+        HouseholdStats.objects.filter(household=household).delete()
+        call_command("rebuild_household_stats", stdout=StringIO())
+        stats = HouseholdStats.objects.get(household=household)
+        assert stats.ingredients_count == 3
+        assert stats.ingredients_categories_count == 2
+
+    def test_rebuild_command_bumps_version(self, household):
+        before = household_version(household)
+        HouseholdStats.objects.filter(household=household).update(ingredients_count=7)
+        call_command(
+            "rebuild_household_stats",
+            household=[str(household.uuid)],
+            stdout=StringIO(),
+        )
+        stats = HouseholdStats.objects.get(household=household)
+        assert stats.ingredients_count == 0
+        assert stats.version == before + 1
+
+    def test_rebuild_command_rejects_bad_uuids(self):
+        with pytest.raises(CommandError):
+            call_command("rebuild_household_stats", household=["not-a-uuid"])
+
+
+@pytest.mark.django_db
+class TestMemberships:
+    def test_user_is_admin_checks_role(self, user, new_user, household):
+        HouseholdMember.objects.create(household=household, user=new_user["user"])
+        assert household.user_is_admin(user["user"])
+        assert not household.user_is_admin(new_user["user"])
+
+    def test_memberships_loaded_once(self, django_assert_num_queries, user, household):
+        other = Household.objects.create(name="Other Household")
+        memberships = get_memberships(user["user"])
+        with django_assert_num_queries(1):
+            assert memberships.is_admin(household)
+            assert not memberships.is_member(other)
+            assert household.user_is_admin(user["user"])
+        assert get_memberships(user["user"]) is memberships
+
+    @pytest.mark.parametrize("url_name", ["dashboard:index", "households:view-current"])
+    def test_role_check_reuses_member_list(
+        self, client: Client, user, household, url_name
+    ):
+        client.login(email=user["email"], password=user["password"])
+        client.get(reverse(url_name))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse(url_name))
+        assertContains(response, "Add a new member")
+        member_queries = [
+            q for q in queries if HouseholdMember._meta.db_table in q["sql"]
+        ]
+        assert len(member_queries) == 1
+
+    def test_detail_not_found_for_non_member(self, client: Client, new_user, household):
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(
+            reverse("households:detail", kwargs={"uuid": household.uuid})
+        )
+        assert response.status_code == 404
+
+
+def household_version(household: Household) -> int:
+    return HouseholdStats.objects.get(household=household).version
+
+
+@pytest.mark.django_db
+class TestHouseholdVersion:
+    def test_bumped_by_ingredient_writes(
+        self, household: Household, ingredients_category: IngredientsCategory
+    ):
+        before = household_version(household)
+        ingredient = Ingredient.objects.create(name="Salt", household=household)
+        ingredient.name = "Sea salt"
+        ingredient.save()
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=f"Spice {i}", household=household) for i in range(3)]
+        )
+        Ingredient.objects.filter(household=household).delete()
+        assert household_version(household) == before + 1 + 1 + 3 + 4
+
+    def test_bumped_by_category_writes(self, household: Household):
+        before = household_version(household)
+        category = IngredientsCategory.objects.create(
+            name="Bakery", household=household
+        )
+        category.delete()
+        assert household_version(household) == before + 2
+
+    def test_bumped_by_membership_and_household_writes(
+        self, household: Household, new_user
+    ):
+        before = household_version(household)
+        HouseholdMember.objects.create(household=household, user=new_user["user"])
+        household.name = "Renamed"
+        household.save()
+        assert household_version(household) == before + 2
+
+    def test_moving_a_row_bumps_both_households(
+        self, household: Household, ingredient: Ingredient, new_user
+    ):
+        other = Household.objects.create(name="Other", created_by=new_user["user"])
+        before, other_before = household_version(household), household_version(other)
+        Ingredient.objects.filter(pk=ingredient.pk).update(household=other)
+        assert household_version(household) == before + 1
+        assert household_version(other) == other_before + 1
+
+    def test_other_households_untouched(
+        self, household: Household, new_user, ingredient: Ingredient
+    ):
+        other = Household.objects.create(name="Other", created_by=new_user["user"])
+        before = household_version(other)
+        Ingredient.objects.create(name="Pepper", household=household)
+        assert household_version(other) == before
+
+    def test_system_rows_bump_every_household(self, household: Household, new_user):
+        other = Household.objects.create(name="Other", created_by=new_user["user"])
+        before, other_before = household_version(household), household_version(other)
+        ingredient = Ingredient.objects.create(name="Salt", is_system=True)
+        ingredient.name = "Sea salt"
+        ingredient.save()
+        ingredient.delete()
+        assert household_version(household) == before + 3
+        assert household_version(other) == other_before + 3
+
+    def test_member_profile_changes_bump_their_households(
+        self, household: Household, user, new_user
+    ):
+        other = Household.objects.create(name="Other", created_by=new_user["user"])
+        before, other_before = household_version(household), household_version(other)
+        member = user["user"]
+        member.display_name = "Renamed"
+        member.save()
+        member.last_login = timezone.now()
+        member.save(update_fields=["last_login"])
+        member.email = "renamed@example.com"
+        member.save(update_fields=["email"])
+        assert household_version(household) == before + 2
+        assert household_version(other) == other_before
+
+    def test_rebuild_version_triggers(self, household: Household):
+        call_command("rebuild_version_triggers", stdout=StringIO())
+        before = household_version(household)
+        Ingredient.objects.create(name="Salt", household=household)
+        assert household_version(household) == before + 1
+
+    def test_migrate_restores_missing_triggers(self, household: Household):
+        # What Django leaves behind when it rebuilds the table to alter it.
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER ingredients_ingredient_version_insert")
+        before = household_version(household)
+        Ingredient.objects.create(name="Salt", household=household)
+        assert household_version(household) == before
+        call_command("migrate", verbosity=0)
+        assert household_version(household) == before + 1
+        Ingredient.objects.create(name="Pepper", household=household)
+        assert household_version(household) == before + 2
+        call_command("migrate", verbosity=0)
+        assert household_version(household) == before + 2
+
+    def test_ensure_triggers_skips_missing_tables(self, monkeypatch):
+        # As after `migrate households 0004` or `migrate households zero`.
+        table_names = connection.introspection.table_names
+        monkeypatch.setattr(
+            connection.introspection,
+            "table_names",
+            lambda *args, **kwargs: [
+                name
+                for name in table_names(*args, **kwargs)
+                if name != "households_householdstats"
+            ],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER ingredients_ingredient_version_insert")
+        ensure_version_triggers()
+        assert "ingredients_ingredient_version_insert" not in existing_triggers(
+            connection
+        )
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    @pytest.mark.parametrize(
+        "url_name",
+        [
+            "dashboard:index",
+            "households:view-current",
+            "ingredients:ingredients-list",
+            "ingredients:ingredients-page",
+            "ingredients:categories-list",
+            "ingredients:categories-page",
+        ],
+    )
+    def test_not_modified_until_household_changes(
+        self, client: Client, user, household: Household, url_name
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse(url_name)
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response["ETag"]
+        response = client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 304
+        Ingredient.objects.create(name="Salt", household=household)
+        response = client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_not_modified_since(self, client: Client, user, household: Household):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("ingredients:ingredients-list")
+        last_modified = client.get(url)["Last-Modified"]
+        response = client.get(url, headers={"if-modified-since": last_modified})
+        assert response.status_code == 304
+
+    def test_not_modified_skips_view_queries(
+        self, client: Client, user, household: Household, ingredient: Ingredient
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("ingredients:ingredients-list")
+        etag = client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == 304
+        assert not [q for q in queries if Ingredient._meta.db_table in q["sql"]]
+
+    def test_etag_differs_between_users(
+        self, client: Client, user, new_user, household: Household
+    ):
+        HouseholdMember.objects.create(household=household, user=new_user["user"])
+        url = reverse("households:detail", kwargs={"uuid": household.uuid})
+        client.login(email=user["email"], password=user["password"])
+        etag = client.get(url)["ETag"]
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(url, headers={"if-none-match": etag})
         assert response.status_code == 200
-        assert hasattr(request, "household")
-        assert request.household == household
+
+    def test_detail_not_found_for_non_member(
+        self, client: Client, user, new_user, household: Household
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("households:detail", kwargs={"uuid": household.uuid})
+        last_modified = client.get(url)["Last-Modified"]
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(url, headers={"if-modified-since": last_modified})
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestHouseholdCacheTag:
+    def test_list_served_from_cache(
+        self, client: Client, user, household: Household, ingredient: Ingredient
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("ingredients:ingredients-list")
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assertContains(response, ingredient.name)
+        assert not [q for q in queries if Ingredient._meta.db_table in q["sql"]]
+
+    def test_list_rendered_again_after_write(
+        self, client: Client, user, household: Household, ingredient: Ingredient
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("ingredients:ingredients-list")
+        client.get(url)
+        Ingredient.objects.create(name="Saffron", household=household)
+        assertContains(client.get(url), "Saffron")
+
+    def test_fragments_vary_by_role(
+        self, client: Client, user, new_user, household: Household
+    ):
+        HouseholdMember.objects.create(household=household, user=new_user["user"])
+        add_member_url = reverse("households:add-member")
+        client.login(email=user["email"], password=user["password"])
+        assertContains(client.get(reverse("dashboard:index")), add_member_url)
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(reverse("dashboard:index"))
+        assert add_member_url not in response.content.decode()
+
+    def test_per_user_fragments(
+        self, client: Client, user, new_user, household: Household
+    ):
+        HouseholdMember.objects.create(
+            household=household,
+            user=new_user["user"],
+            member_type=HouseholdMember.MemberType.ADMIN,
+        )
+        url = reverse("households:detail", kwargs={"uuid": household.uuid})
+        client.login(email=user["email"], password=user["password"])
+        assertContains(client.get(url), escape(new_user["display_name"]))
+        client.login(email=new_user["email"], password=new_user["password"])
+        assertContains(client.get(url), escape(user["user"].display_name))
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """The async variants of views, served under ASGI."""
+
+    @pytest.fixture
+    def get(self, settings, async_client, user):
+        settings.ROOT_URLCONF = settings.ASGI_URLCONF
+        async_client.force_login(user["user"])
+        return async_to_sync(async_client.get)
+
+    def test_served_only_under_asgi(self, settings):
+        url = reverse("dashboard:index")
+        assert resolve(url).func is dashboard_view
+        assert resolve(url, settings.ASGI_URLCONF).func is adashboard_view
+
+    @pytest.mark.parametrize(
+        "url_name, shows",
+        [
+            ("dashboard:index", "household"),
+            ("households:index", "household"),
+            ("ingredients:ingredients-list", "ingredient"),
+            ("ingredients:categories-list", "ingredients_category"),
+        ],
+    )
+    def test_view(self, request, get, household: Household, url_name, shows):
+        item = request.getfixturevalue(shows)
+        assertContains(get(reverse(url_name)), escape(item.name))
+
+    def test_detail(self, get, household: Household, new_user):
+        HouseholdMember.objects.create(household=household, user=new_user["user"])
+        response = get(reverse("households:detail", kwargs={"uuid": household.uuid}))
+        assertContains(response, escape(new_user["display_name"]))
+
+    def test_detail_not_found(self, get):
+        response = get(reverse("households:detail", kwargs={"uuid": uuid.uuid4()}))
+        assert response.status_code == 404
+
+    def test_not_modified(self, get, household: Household):
+        url = reverse("ingredients:ingredients-list")
+        etag = get(url)["ETag"]
+        assert get(url, headers={"if-none-match": etag}).status_code == 304
+
+    def test_index_prefetches_members(
+        self, client: Client, user, new_user, household: Household
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("households:index")
+        client.get(url)
+        with CaptureQueriesContext(connection) as one_member:
+            client.get(url)
+        HouseholdMember.objects.create(household=household, user=new_user["user"])
+        with CaptureQueriesContext(connection) as two_members:
+            response = client.get(url)
+        assertContains(response, escape(new_user["display_name"]))
+        assert len(two_members) == len(one_member)
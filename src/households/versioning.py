@@ -0,0 +1,151 @@
+from typing import Callable
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from base.sqlite import existing_triggers
+
+# Every write to a household's rows bumps the version in its stats row.
+# Triggers catch the writes Django sends no signals for, such as
+# `bulk_create`, queryset deletes and cascades, without adding delete
+# signal receivers that would stop Django deleting rows in bulk. Migrations
+# create the triggers from frozen copies of these statements. Django
+# rebuilds a SQLite table to alter it, which drops its triggers, so
+# `ensure_version_triggers` recreates them after every migration.
+BUMP = """
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id = {household}
+"""
+
+BUMP_ALL = """
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+"""
+
+TABLES = {
+    "households_householdmember": "household_id",
+    "ingredients_ingredientscategory": "household_id",
+    "ingredients_ingredient": "household_id",
+    "households_household": "id",
+}
+
+# Rows flagged by these columns are shared by every household, and so bump
+# every household's version.
+SHARED_TABLES = {
+    "ingredients_ingredient": "is_system",
+}
+
+# Household pages render their members' names and addresses, so changing
+# them bumps the version of every household the user belongs to.
+MEMBER_COLUMNS = ("display_name", "email")
+
+BUMP_MEMBERSHIPS = """
+    UPDATE households_householdstats
+    SET version = version + 1,
+        modified_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE household_id IN (
+        SELECT household_id FROM households_householdmember
+        WHERE user_id = NEW.id
+    )
+"""
+
+
+def trigger_name(table: str, event: str) -> str:
+    return f"{table}_version_{event}"
+
+
+def triggers() -> list[tuple[str, str]]:
+    statements = []
+    for table, column in TABLES.items():
+        bump_new = BUMP.format(household=f"NEW.{column}")
+        bump_old = BUMP.format(household=f"OLD.{column}")
+        if table != "households_household":
+            # A household's own row is inserted before its stats row exists
+            # and deleting it deletes the stats row too.
+            statements.append(
+                (
+                    trigger_name(table, "insert"),
+                    f"AFTER INSERT ON {table} BEGIN {bump_new}; END",
+                )
+            )
+            statements.append(
+                (
+                    trigger_name(table, "delete"),
+                    f"AFTER DELETE ON {table} BEGIN {bump_old}; END",
+                )
+            )
+        statements.append(
+            (
+                trigger_name(table, "update"),
+                f"AFTER UPDATE ON {table} BEGIN {bump_new}; "
+                f"{bump_old} AND OLD.{column} IS NOT NEW.{column}; END",
+            )
+        )
+    for table, flag in SHARED_TABLES.items():
+        statements.extend(
+            [
+                (
+                    trigger_name(table, "shared_insert"),
+                    f"AFTER INSERT ON {table} WHEN NEW.{flag} BEGIN {BUMP_ALL}; END",
+                ),
+                (
+                    trigger_name(table, "shared_delete"),
+                    f"AFTER DELETE ON {table} WHEN OLD.{flag} BEGIN {BUMP_ALL}; END",
+                ),
+                (
+                    trigger_name(table, "shared_update"),
+                    f"AFTER UPDATE ON {table} WHEN OLD.{flag} OR NEW.{flag} "
+                    f"BEGIN {BUMP_ALL}; END",
+                ),
+            ]
+        )
+    changed = " OR ".join(
+        f"OLD.{column} IS NOT NEW.{column}" for column in MEMBER_COLUMNS
+    )
+    statements.append(
+        (
+            trigger_name("users_user", "update"),
+            f"AFTER UPDATE OF {', '.join(MEMBER_COLUMNS)} ON users_user "
+            f"WHEN {changed} BEGIN {BUMP_MEMBERSHIPS}; END",
+        )
+    )
+    return statements
+
+
+def create_version_triggers(execute: Callable[[str], object]) -> None:
+    for name, body in triggers():
+        execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_version_triggers(execute: Callable[[str], object]) -> None:
+    for name, _ in triggers():
+        execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def ensure_version_triggers(using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """
+    Recreate any missing version trigger, as after a migration that rebuilt
+    one of the tables. Writes made without it bumped no version, so every
+    household's version is bumped once more. Receives `post_migrate`, and
+    does nothing before the versions' migration or while any of the tables
+    is migrated away.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    tables = {"households_householdstats", "users_user", *TABLES}
+    if not tables <= set(connection.introspection.table_names()):
+        return
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(
+            cursor, "households_householdstats"
+        )
+    if "version" not in {column.name for column in columns}:
+        return
+    if {name for name, _ in triggers()} <= existing_triggers(connection):
+        return
+    with transaction.atomic(using), connection.cursor() as cursor:
+        create_version_triggers(cursor.execute)
+        cursor.execute(BUMP_ALL)
@@ -2,24 +2,43 @@ from uuid import UUID
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import render, redirect, get_object_or_404
+from django.db.models import Prefetch, QuerySet
+from django.http import Http404, HttpRequest, HttpResponse
+from django.shortcuts import render, redirect, aget_object_or_404, get_object_or_404
 from django.urls import reverse_lazy
 
+from base.async_views import arender, async_variant
+
+from .cache import get_current_household
+from .conditional import household_condition
 from .forms import HouseholdCreateForm, AddHouseholdMemberForm
+from .membership import get_memberships
 from .models import Household, HouseholdMember
-from .middleware import HttpRequestWithHousehold
 
 User = get_user_model()
 
 
+def member_households(user) -> QuerySet[Household]:
+    members = HouseholdMember.objects.select_related("user")
+    return Household.objects.filter(householdmember__user=user).prefetch_related(
+        Prefetch("householdmember_set", queryset=members)
+    )
+
+
 @login_required
 def index(request: HttpRequest) -> HttpResponse:
-    households = Household.objects.filter(householdmember__user=request.user)
-    context = {"households": households}
+    context = {"households": list(member_households(request.user))}
     return render(request, "households/index.html", context=context)
 
 
+@async_variant(index)
+@login_required
+async def aindex(request: HttpRequest) -> HttpResponse:
+    households = [household async for household in member_households(request.user)]
+    context = {"households": households}
+    return await arender(request, "households/index.html", context)
+
+
 @login_required
 def create(request: HttpRequest) -> HttpResponse:
     form = HouseholdCreateForm()
@@ -50,26 +69,56 @@ def create(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
+@household_condition
 def detail(request: HttpRequest, uuid: UUID) -> HttpResponse:
-    households = Household.objects.filter(householdmember__user=request.user)
-    household = get_object_or_404(households, uuid=uuid)
-    members = HouseholdMember.objects.filter(household=household)
+    household = get_object_or_404(Household, uuid=uuid)
+    members = list(
+        HouseholdMember.objects.filter(household=household).select_related("user")
+    )
+    memberships = get_memberships(request.user)
+    memberships.remember(household, members)
+    if not memberships.is_member(household):
+        raise Http404
     context = {"household": household, "members": members}
     return render(request, "households/detail.html", context=context)
 
 
+@async_variant(detail)
+@login_required
+@household_condition
+async def adetail(request: HttpRequest, uuid: UUID) -> HttpResponse:
+    household = await aget_object_or_404(Household, uuid=uuid)
+    members = [
+        member
+        async for member in HouseholdMember.objects.filter(
+            household=household
+        ).select_related("user")
+    ]
+    memberships = get_memberships(request.user)
+    memberships.remember(household, members)
+    if not memberships.is_member(household):
+        raise Http404
+    context = {"household": household, "members": members}
+    return await arender(request, "households/detail.html", context)
+
+
 @login_required
-def current_household_detail(request: HttpRequestWithHousehold) -> HttpResponse:
-    household = request.household
-    members = HouseholdMember.objects.filter(household=household)
+@household_condition
+def current_household_detail(request: HttpRequest) -> HttpResponse:
+    household = get_current_household(request)
+    members = list(
+        HouseholdMember.objects.filter(household=household).select_related("user")
+    )
+    if household:
+        get_memberships(request.user).remember(household, members)
     context = {"household": household, "members": members}
     return render(request, "households/detail.html", context=context)
 
 
 @login_required
-def add_member(request: HttpRequestWithHousehold) -> HttpResponse:
+def add_member(request: HttpRequest) -> HttpResponse:
     form = AddHouseholdMemberForm()
-    household = request.household
+    household = get_current_household(request)
     if request.method == "POST":
         form = AddHouseholdMemberForm(request.POST)
         if form.is_valid():
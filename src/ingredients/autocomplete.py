@@ -0,0 +1,105 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Iterable
+from itertools import islice
+
+from django.db.models import Q
+
+from households.models import Household, HouseholdStats
+
+from .models import Ingredient
+
+SUGGESTION_LIMIT = 10
+MAX_HOUSEHOLDS = 256
+# Seconds an index is served before its household's version is read again.
+VERSION_TTL = 2
+
+
+class PrefixIndex:
+    """
+    Case-insensitive prefix lookups over a fixed set of names, using binary
+    search over the sorted, case-folded names.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self.entries = sorted({(name.casefold(), name) for name in names})
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, prefix: str, limit: int = SUGGESTION_LIMIT) -> list[str]:
+        key = prefix.strip().casefold()
+        if not key:
+            return []
+        suggestions = []
+        position = bisect_left(self.entries, (key,))
+        for folded, name in islice(self.entries, position, None):
+            if not folded.startswith(key) or len(suggestions) == limit:
+                break
+            if not suggestions or suggestions[-1] != name:
+                suggestions.append(name)
+        return suggestions
+
+
+class PrefixIndexCache:
+    """
+    An in-process LRU of per-household prefix indexes. Each index remembers
+    the household version it was built from, which every write to the
+    household's ingredients or to the system ingredients bumps, and is
+    rebuilt once that version moves on. The version is read again at most
+    every `version_ttl` seconds rather than on every keystroke, which bounds
+    how long a write goes unseen.
+    """
+
+    def __init__(
+        self, max_households: int = MAX_HOUSEHOLDS, version_ttl: float = VERSION_TTL
+    ):
+        self.max_households = max_households
+        self.version_ttl = version_ttl
+        self.indexes: OrderedDict[int, tuple[int | None, float, PrefixIndex]] = (
+            OrderedDict()
+        )
+        self.lock = threading.Lock()
+
+    def get(self, household: Household) -> PrefixIndex:
+        with self.lock:
+            entry = self.indexes.get(household.pk)
+            if entry is not None and time.monotonic() - entry[1] < self.version_ttl:
+                self.indexes.move_to_end(household.pk)
+                return entry[2]
+
+        checked_at = time.monotonic()
+        version = HouseholdStats.version_of(household)
+        if entry is not None and entry[0] == version:
+            index = entry[2]
+        else:
+            # The version is read before the names, so that a write racing
+            # with the build leaves the index stale rather than the other
+            # way round.
+            index = build_index(household)
+        with self.lock:
+            self.indexes[household.pk] = (version, checked_at, index)
+            self.indexes.move_to_end(household.pk)
+            while len(self.indexes) > self.max_households:
+                self.indexes.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self.lock:
+            self.indexes.clear()
+
+
+def build_index(household: Household) -> PrefixIndex:
+    names = Ingredient.objects.filter(
+        Q(household=household) | Q(is_system=True)
+    ).values_list("name", flat=True)
+    return PrefixIndex(names.iterator())
+
+
+indexes = PrefixIndexCache()
+
+
+def suggest(household: Household, prefix: str, limit: int = SUGGESTION_LIMIT):
+    return indexes.get(household).lookup(prefix, limit)
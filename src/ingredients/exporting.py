@@ -0,0 +1,91 @@
+import csv
+import json
+from collections.abc import AsyncIterator, Callable, Iterator
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from households.models import Household
+
+from .models import IngredientsCategory, Ingredient
+
+CHUNK_SIZE = 2000
+
+FIELDS = ("kind", "name", "category", "description")
+
+# Format name to (content type, file extension).
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/jsonl", "jsonl"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def iter_catalog(household: Household) -> Iterator[tuple[str, str, str, str]]:
+    """
+    Yield every category and then every ingredient of a household as rows of
+    `FIELDS`, reading them from the database in chunks. Rows use the layout
+    the importer reads, so an export can be imported into another household.
+    """
+    categories = (
+        IngredientsCategory.objects.for_household(household)
+        .order_by("name")
+        .values_list("name", "description")
+    )
+    for name, description in categories.iterator(chunk_size=CHUNK_SIZE):
+        yield ("category", name, "", description or "")
+    ingredients = (
+        Ingredient.objects.for_household(household)
+        .order_by("name", "uuid")
+        .values_list("name", "category__name")
+    )
+    for name, category in ingredients.iterator(chunk_size=CHUNK_SIZE):
+        yield ("ingredient", name, category or "", "")
+
+
+async def aiter_catalog(
+    household: Household,
+) -> AsyncIterator[tuple[str, str, str, str]]:
+    """
+    See `iter_catalog`. Each chunk is read in a thread where the ORM can be
+    called synchronously, since `QuerySet.aiterator` runs the query of a
+    `values_list` in the event loop.
+    """
+    rows = iter_catalog(household)
+    next_chunk = sync_to_async(lambda: list(islice(rows, CHUNK_SIZE)))
+    while chunk := await next_chunk():
+        for row in chunk:
+            yield row
+
+
+class Echo:
+    """A file-like object that hands back whatever is written to it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def line_writer(format: str) -> Callable[[tuple], str]:
+    if format == "csv":
+        return csv.writer(Echo()).writerow
+    return lambda row: json.dumps(dict(zip(FIELDS, row))) + "\n"
+
+
+def export_catalog(household: Household, format: str) -> Iterator[str]:
+    write = line_writer(format)
+    if format == "csv":
+        yield write(FIELDS)
+    for row in iter_catalog(household):
+        yield write(row)
+
+
+async def aexport_catalog(household: Household, format: str) -> AsyncIterator[str]:
+    """
+    See `export_catalog`. Under ASGI, Django reads a sync iterator to the
+    end before sending any of it, so only this one streams there.
+    """
+    write = line_writer(format)
+    if format == "csv":
+        yield write(FIELDS)
+    async for row in aiter_catalog(household):
+        yield write(row)
@@ -2,6 +2,7 @@ from typing import Any
 from django import forms
 
 from households.models import Household
+from .importing import detect_format
 from .models import IngredientsCategory, Ingredient
 
 
@@ -28,8 +29,8 @@ class IngredientForm(forms.ModelForm):
 
     def __init__(self, household: Household, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self.fields["category"].queryset = IngredientsCategory.objects.filter(  # type: ignore
-            household=household
+        self.fields["category"].queryset = (  # type: ignore
+            IngredientsCategory.objects.for_household(household)
         )
 
     def clean(self) -> dict[str, Any]:
@@ -40,3 +41,23 @@ class IngredientForm(forms.ModelForm):
     class Meta:
         model = Ingredient
         fields = ("name", "category")
+
+
+class CatalogImportForm(forms.Form):
+    file = forms.FileField(
+        label="File",
+        help_text="CSV with a header row, a JSON array, or JSON Lines.",
+    )
+    format = forms.ChoiceField(
+        choices=[("", "Detect from file name"), ("csv", "CSV"), ("json", "JSON")],
+        required=False,
+    )
+
+    def clean(self) -> dict[str, Any]:
+        cleaned_data = super().clean()
+        uploaded = cleaned_data.get("file")
+        if uploaded and not cleaned_data.get("format"):
+            cleaned_data["format"] = detect_format(uploaded.name)
+            if cleaned_data["format"] is None:
+                self.add_error("format", "Choose the format of this file.")
+        return cleaned_data
@@ -0,0 +1,294 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import IO, Any
+
+from django.db import IntegrityError, transaction
+
+from households.models import Household, HouseholdStats
+
+from .models import IngredientsCategory, Ingredient
+
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+# Characters read ahead to complete one JSON item before giving up on it.
+MAX_ITEM_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+NAME_MAX_LENGTH = Ingredient._meta.get_field("name").max_length
+DESCRIPTION_MAX_LENGTH = IngredientsCategory._meta.get_field("description").max_length
+
+
+class ImportFormatError(ValueError):
+    """The file as a whole could not be parsed."""
+
+
+def detect_format(filename: str) -> str | None:
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("json", "jsonl", "ndjson"):
+        return "json"
+    return None
+
+
+def text_stream(stream: IO[bytes]) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def iter_csv_rows(stream: IO[str]) -> Iterator[tuple[int, Any]]:
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None or "name" not in reader.fieldnames:
+        raise ImportFormatError("CSV files need a header row with a name column.")
+    for row in reader:
+        yield reader.line_num, row
+
+
+@dataclass
+class MalformedItem:
+    """Stands in for a JSON item that could not be decoded."""
+
+    message: str
+
+
+def iter_json_rows(stream: IO[str]) -> Iterator[tuple[int, Any]]:
+    """
+    Yield the items of a JSON array, or of whitespace separated JSON values
+    such as JSON Lines, decoding one item at a time so that memory use does
+    not grow with the size of the file. An item that cannot be decoded
+    within `MAX_ITEM_SIZE` characters is yielded as a `MalformedItem`, and
+    reading resumes on the next line.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(lambda: stream.read(CHUNK_SIZE), "")
+    buffer = ""
+    position = 0
+    in_array = None
+    # Inside an array, what may come next: an "item" after a comma, an
+    # "item or end" after the opening bracket, a "comma or end" after an
+    # item, "any" of those after a malformed item, and only whitespace once
+    # the array has "ended".
+    expect = "item or end"
+    index = 0
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position == len(buffer):
+            chunk = next(chunks, None)
+            if chunk is None:
+                if in_array and expect != "ended":
+                    raise ImportFormatError("The JSON array is not terminated.")
+                return
+            buffer, position = chunk, 0
+            continue
+        character = buffer[position]
+        if in_array is None:
+            in_array = character == "["
+            if in_array:
+                position += 1
+                continue
+        if in_array:
+            if expect == "ended":
+                raise ImportFormatError("The file goes on after the JSON array.")
+            if character == "]" and expect != "item":
+                expect = "ended"
+                position += 1
+                continue
+            if character == "," and expect in ("comma or end", "any"):
+                expect = "item"
+                position += 1
+                continue
+            if expect == "comma or end":
+                raise ImportFormatError(f"Item {index} is not followed by a comma.")
+            if character in ",]":
+                raise ImportFormatError(f"Item {index + 1} is missing.")
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if len(buffer) - position <= MAX_ITEM_SIZE:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+            index += 1
+            message = f"not valid JSON, or longer than {MAX_ITEM_SIZE} characters"
+            yield index, MalformedItem(message)
+            # Items start on a new line in JSON Lines, and in arrays written
+            # one item per line.
+            position = buffer.find("\n", position)
+            while position == -1:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    if in_array:
+                        raise ImportFormatError("The JSON array is not terminated.")
+                    return
+                buffer, position = chunk, chunk.find("\n")
+            expect = "any"
+            continue
+        index += 1
+        yield index, value
+        position = end
+        expect = "comma or end"
+
+
+def iter_rows(stream: IO[bytes], format: str) -> Iterator[tuple[int, Any]]:
+    if format == "csv":
+        rows = iter_csv_rows(text_stream(stream))
+    elif format == "json":
+        rows = iter_json_rows(text_stream(stream))
+    else:
+        raise ImportFormatError(f"Unsupported format: {format}")
+    try:
+        yield from rows
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFormatError(f"The file could not be read: {e}") from e
+
+
+@dataclass
+class RowError:
+    row: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"Row {self.row}: {self.message}"
+
+
+@dataclass
+class ImportResult:
+    created_categories: int = 0
+    created_ingredients: int = 0
+    skipped: int = 0
+    error_count: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+    def add_error(self, row: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(row, message))
+
+
+def clean_text(row: dict, key: str, max_length: int | None) -> str:
+    value = row.get(key)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be text")
+    value = value.strip()
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{key} must be at most {max_length} characters")
+    return value
+
+
+class CatalogImporter:
+    """
+    Import categories and ingredients into a household in one pass.
+
+    Each row is either a category (`kind` is "category") or an ingredient,
+    the default. Ingredient rows name their category, which is created on
+    first use. Rows that already exist are skipped and invalid rows are
+    reported without stopping the import. Ingredients are written with
+    `bulk_create` in batches, all inside a single transaction.
+    """
+
+    def __init__(self, household: Household, batch_size: int = BATCH_SIZE) -> None:
+        self.household = household
+        self.batch_size = batch_size
+
+    def run(self, rows: Iterator[tuple[int, Any]]) -> ImportResult:
+        self.result = ImportResult()
+        with transaction.atomic():
+            self.categories = dict(
+                IngredientsCategory.objects.for_household(self.household).values_list(
+                    "name", "pk"
+                )
+            )
+            self.existing = set(
+                Ingredient.objects.for_household(self.household).values_list(
+                    "name", "category_id"
+                )
+            )
+            self.pending: list[Ingredient] = []
+            for row_number, row in rows:
+                try:
+                    self.import_row(row)
+                except ValueError as e:
+                    self.result.add_error(row_number, str(e))
+            self.flush()
+            HouseholdStats.adjust(
+                self.household,
+                ingredients_categories=self.result.created_categories,
+                ingredients=self.result.created_ingredients,
+            )
+        return self.result
+
+    def import_row(self, row: Any) -> None:
+        if isinstance(row, MalformedItem):
+            raise ValueError(row.message)
+        if not isinstance(row, dict):
+            raise ValueError("expected an object with a name")
+        kind = clean_text(row, "kind", None).lower() or "ingredient"
+        name = clean_text(row, "name", NAME_MAX_LENGTH)
+        if not name:
+            raise ValueError("name is required")
+        if kind == "category":
+            description = clean_text(row, "description", DESCRIPTION_MAX_LENGTH)
+            if name in self.categories:
+                self.result.skipped += 1
+            else:
+                self.create_category(name, description)
+        elif kind == "ingredient":
+            category_name = clean_text(row, "category", NAME_MAX_LENGTH)
+            category_id = None
+            if category_name:
+                category_id = self.categories.get(category_name)
+                if category_id is None:
+                    category_id = self.create_category(category_name, "")
+            self.add_ingredient(name, category_id)
+        else:
+            raise ValueError(f"unknown kind {kind!r}")
+
+    def create_category(self, name: str, description: str) -> int:
+        try:
+            with transaction.atomic():
+                category = IngredientsCategory.objects.create(
+                    name=name,
+                    description=description or None,
+                    household=self.household,
+                )
+        except IntegrityError as e:
+            raise ValueError(f"category {name!r} could not be created") from e
+        self.categories[name] = category.pk
+        self.result.created_categories += 1
+        return category.pk
+
+    def add_ingredient(self, name: str, category_id: int | None) -> None:
+        if (name, category_id) in self.existing:
+            self.result.skipped += 1
+            return
+        self.existing.add((name, category_id))
+        self.pending.append(
+            Ingredient(name=name, category_id=category_id, household=self.household)
+        )
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        # Rows are deduplicated against the household before they get here,
+        # and the import's transaction holds the write lock, so every row is
+        # new.
+        Ingredient.objects.bulk_create(self.pending, batch_size=self.batch_size)
+        self.result.created_ingredients += len(self.pending)
+        self.pending = []
+
+
+def import_catalog(
+    household: Household,
+    stream: IO[bytes],
+    format: str,
+    batch_size: int = BATCH_SIZE,
+) -> ImportResult:
+    return CatalogImporter(household, batch_size).run(iter_rows(stream, format))
@@ -0,0 +1,51 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from households.models import Household
+from ingredients.importing import (
+    BATCH_SIZE,
+    ImportFormatError,
+    detect_format,
+    import_catalog,
+)
+
+
+class Command(BaseCommand):
+    help = "Import ingredients and categories into a household from CSV or JSON."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("household", metavar="HOUSEHOLD_UUID")
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "json"])
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options) -> None:
+        try:
+            household = Household.objects.get(uuid=options["household"])
+        except (Household.DoesNotExist, ValidationError):
+            raise CommandError(f"No household with UUID {options['household']}")
+        format = options["format"] or detect_format(options["path"])
+        if format is None:
+            raise CommandError("Could not tell the file format; pass --format.")
+
+        try:
+            with open(options["path"], "rb") as stream:
+                result = import_catalog(
+                    household, stream, format, batch_size=options["batch_size"]
+                )
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(str(error))
+        if result.error_count > len(result.errors):
+            self.stderr.write(
+                f"... and {result.error_count - len(result.errors)} more errors"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created_ingredients} ingredients and "
+                f"{result.created_categories} categories "
+                f"({result.skipped} skipped, {result.error_count} errors)"
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ingredients.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the ingredient search index and its triggers from the tables."
+
+    def handle(self, *args, **options) -> None:
+        if connection.vendor != "sqlite":
+            raise CommandError("The search index requires SQLite.")
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the ingredient search index"))
@@ -0,0 +1,88 @@
+from django.db import migrations
+
+# A frozen copy of the statements in `ingredients.search` as they were when
+# this migration was written.
+CREATE = [
+    """
+CREATE VIRTUAL TABLE ingredients_search USING fts5(
+    household,
+    name,
+    description,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+    """,
+    """
+CREATE TRIGGER ingredients_search_ingredient_insert
+AFTER INSERT ON ingredients_ingredient BEGIN
+    INSERT INTO ingredients_search (rowid, household, name, description)
+    VALUES (NEW.id * 2, NEW.household_id, NEW.name, '');
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_ingredient_update
+AFTER UPDATE OF name, household_id ON ingredients_ingredient BEGIN
+    UPDATE ingredients_search SET household = NEW.household_id, name = NEW.name
+    WHERE rowid = NEW.id * 2;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_ingredient_delete
+AFTER DELETE ON ingredients_ingredient BEGIN
+    DELETE FROM ingredients_search WHERE rowid = OLD.id * 2;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_category_insert
+AFTER INSERT ON ingredients_ingredientscategory BEGIN
+    INSERT INTO ingredients_search (rowid, household, name, description)
+    VALUES (NEW.id * 2 + 1, NEW.household_id, NEW.name, coalesce(NEW.description, ''));
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_category_update
+AFTER UPDATE OF name, description, household_id ON ingredients_ingredientscategory
+BEGIN
+    UPDATE ingredients_search SET
+        household = NEW.household_id,
+        name = NEW.name,
+        description = coalesce(NEW.description, '')
+    WHERE rowid = NEW.id * 2 + 1;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_category_delete
+AFTER DELETE ON ingredients_ingredientscategory BEGIN
+    DELETE FROM ingredients_search WHERE rowid = OLD.id * 2 + 1;
+END
+    """,
+    """
+INSERT INTO ingredients_search (rowid, household, name, description)
+SELECT id * 2, household_id, name, '' FROM ingredients_ingredient
+    """,
+    """
+INSERT INTO ingredients_search (rowid, household, name, description)
+SELECT id * 2 + 1, household_id, name, coalesce(description, '')
+FROM ingredients_ingredientscategory
+    """,
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS ingredients_search_ingredient_insert",
+    "DROP TRIGGER IF EXISTS ingredients_search_ingredient_update",
+    "DROP TRIGGER IF EXISTS ingredients_search_ingredient_delete",
+    "DROP TRIGGER IF EXISTS ingredients_search_category_insert",
+    "DROP TRIGGER IF EXISTS ingredients_search_category_update",
+    "DROP TRIGGER IF EXISTS ingredients_search_category_delete",
+    "DROP TABLE IF EXISTS ingredients_search",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ingredients", "0005_ingredient"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE, DROP),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0006_access_pattern_indexes"),
+        ("ingredients", "0006_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["household", "name", "uuid"],
+                name="ingredient_household_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ingredientscategory",
+            index=models.Index(
+                fields=["household", "name", "uuid"], name="category_household_name_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("households", "0007_householdstats_version"),
+        ("ingredients", "0007_access_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["household", "category", "name", "uuid"],
+                name="ingredient_category_name_idx",
+            ),
+        ),
+    ]
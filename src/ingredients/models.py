@@ -1,7 +1,7 @@
 from django.db import models
 
 from base.models import BaseModel
-from households.models import Household
+from households.models import Household, HouseholdScopedQuerySet
 
 
 class IngredientsCategory(BaseModel):
@@ -27,6 +27,8 @@ class IngredientsCategory(BaseModel):
         default=False,
     )
 
+    objects = HouseholdScopedQuerySet.as_manager()
+
     def clean(self) -> None:
         super().clean()
         self.name = self.name.strip()
@@ -38,6 +40,14 @@ class IngredientsCategory(BaseModel):
 
     class Meta:  # type: ignore
         unique_together = ("name", "household")
+        indexes = [
+            # Matches the household's categories in list order, see
+            # `KeysetPaginator`.
+            models.Index(
+                fields=["household", "name", "uuid"],
+                name="category_household_name_idx",
+            ),
+        ]
         verbose_name_plural = "Ingredient Categories"
 
 
@@ -65,6 +75,8 @@ class Ingredient(BaseModel):
         default=False,
     )
 
+    objects = HouseholdScopedQuerySet.as_manager()
+
     def clean(self) -> None:
         super().clean()
         self.name = self.name.strip()
@@ -74,3 +86,17 @@ class Ingredient(BaseModel):
 
     class Meta:  # type: ignore
         unique_together = ("name", "household", "category")
+        indexes = [
+            # Matches the household's ingredients in list order, see
+            # `KeysetPaginator`.
+            models.Index(
+                fields=["household", "name", "uuid"],
+                name="ingredient_household_name_idx",
+            ),
+            # Matches each category's ingredients, and the uncategorized
+            # ones, in list order, see `ingredients.views.ingredient_pages`.
+            models.Index(
+                fields=["household", "category", "name", "uuid"],
+                name="ingredient_category_name_idx",
+            ),
+        ]
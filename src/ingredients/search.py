@@ -0,0 +1,190 @@
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+from base.sqlite import existing_triggers
+from households.models import Household
+
+from .models import Ingredient, IngredientsCategory
+
+SEARCH_LIMIT = 50
+
+# Ingredients and categories share one index. Each row's rowid encodes the
+# table it came from (ingredients even, categories odd), so triggers can
+# find their row without a scan. The index is created by a migration from
+# a frozen copy of these statements. Django rebuilds a SQLite table to
+# alter it, which drops its triggers, so `ensure_search_index` rebuilds the
+# index after any migration that leaves one missing.
+SCHEMA = [
+    """
+CREATE VIRTUAL TABLE ingredients_search USING fts5(
+    household,
+    name,
+    description,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+    """,
+    """
+CREATE TRIGGER ingredients_search_ingredient_insert
+AFTER INSERT ON ingredients_ingredient BEGIN
+    INSERT INTO ingredients_search (rowid, household, name, description)
+    VALUES (NEW.id * 2, NEW.household_id, NEW.name, '');
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_ingredient_update
+AFTER UPDATE OF name, household_id ON ingredients_ingredient BEGIN
+    UPDATE ingredients_search SET household = NEW.household_id, name = NEW.name
+    WHERE rowid = NEW.id * 2;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_ingredient_delete
+AFTER DELETE ON ingredients_ingredient BEGIN
+    DELETE FROM ingredients_search WHERE rowid = OLD.id * 2;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_category_insert
+AFTER INSERT ON ingredients_ingredientscategory BEGIN
+    INSERT INTO ingredients_search (rowid, household, name, description)
+    VALUES (NEW.id * 2 + 1, NEW.household_id, NEW.name, coalesce(NEW.description, ''));
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_category_update
+AFTER UPDATE OF name, description, household_id ON ingredients_ingredientscategory
+BEGIN
+    UPDATE ingredients_search SET
+        household = NEW.household_id,
+        name = NEW.name,
+        description = coalesce(NEW.description, '')
+    WHERE rowid = NEW.id * 2 + 1;
+END
+    """,
+    """
+CREATE TRIGGER ingredients_search_category_delete
+AFTER DELETE ON ingredients_ingredientscategory BEGIN
+    DELETE FROM ingredients_search WHERE rowid = OLD.id * 2 + 1;
+END
+    """,
+]
+
+POPULATE = [
+    "DELETE FROM ingredients_search",
+    """
+INSERT INTO ingredients_search (rowid, household, name, description)
+SELECT id * 2, household_id, name, '' FROM ingredients_ingredient
+    """,
+    """
+INSERT INTO ingredients_search (rowid, household, name, description)
+SELECT id * 2 + 1, household_id, name, coalesce(description, '')
+FROM ingredients_ingredientscategory
+    """,
+]
+
+TRIGGERS = [
+    "ingredients_search_ingredient_insert",
+    "ingredients_search_ingredient_update",
+    "ingredients_search_ingredient_delete",
+    "ingredients_search_category_insert",
+    "ingredients_search_category_update",
+    "ingredients_search_category_delete",
+]
+
+DROP = [f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS] + [
+    "DROP TABLE IF EXISTS ingredients_search",
+]
+
+
+def create_search_index(execute: Callable[[str], object]) -> None:
+    for statement in SCHEMA + POPULATE:
+        execute(statement)
+
+
+def drop_search_index(execute: Callable[[str], object]) -> None:
+    for statement in DROP:
+        execute(statement)
+
+
+def rebuild_search_index(using: str = DEFAULT_DB_ALIAS) -> None:
+    with transaction.atomic(using), connections[using].cursor() as cursor:
+        drop_search_index(cursor.execute)
+        create_search_index(cursor.execute)
+        cursor.execute(
+            "INSERT INTO ingredients_search (ingredients_search) VALUES ('optimize')"
+        )
+
+
+def ensure_search_index(using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """
+    Rebuild the search index when any of its triggers is missing, as it is
+    after a migration that rebuilt one of the tables. Rows written in the
+    meantime were not indexed, so the index is refilled from the tables.
+    Receives `post_migrate`, and does nothing before the index's migration.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    if "ingredients_search" not in connection.introspection.table_names():
+        return
+    if not set(TRIGGERS) <= existing_triggers(connection):
+        rebuild_search_index(using)
+
+
+def match_expression(household: Household, query: str) -> str | None:
+    """
+    Turn free text into an FTS5 query that prefix-matches every word against
+    the name and description columns of the household's rows.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    words = " AND ".join(f'"{term}"*' for term in terms)
+    return f'household:"{household.pk}" AND {{name description}}: ({words})'
+
+
+@dataclass
+class SearchResult:
+    item: Ingredient | IngredientsCategory
+    rank: float
+
+    @property
+    def is_category(self) -> bool:
+        return isinstance(self.item, IngredientsCategory)
+
+
+def search_catalog(
+    household: Household, query: str, limit: int = SEARCH_LIMIT
+) -> list[SearchResult]:
+    """
+    Search a household's ingredients and categories, best matches first.
+    """
+    expression = match_expression(household, query)
+    if expression is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid, bm25(ingredients_search, 0.0, 10.0, 1.0) AS rank "
+            "FROM ingredients_search WHERE ingredients_search MATCH %s "
+            "ORDER BY rank LIMIT %s",
+            [expression, limit],
+        )
+        hits = cursor.fetchall()
+
+    ingredients = Ingredient.objects.select_related("category").in_bulk(
+        [rowid // 2 for rowid, _ in hits if rowid % 2 == 0]
+    )
+    categories = IngredientsCategory.objects.in_bulk(
+        [rowid // 2 for rowid, _ in hits if rowid % 2 == 1]
+    )
+    results = []
+    for rowid, rank in hits:
+        items = categories if rowid % 2 else ingredients
+        item = items.get(rowid // 2)
+        if item is not None:
+            results.append(SearchResult(item=item, rank=rank))
+    return results
@@ -0,0 +1,116 @@
+from django.test import Client
+from django.urls import reverse
+import pytest
+
+from households.models import Household
+
+from ..autocomplete import PrefixIndex, PrefixIndexCache, indexes, suggest
+from ..models import IngredientsCategory, Ingredient
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    indexes.clear()
+
+
+@pytest.fixture
+def no_version_ttl(monkeypatch):
+    monkeypatch.setattr(indexes, "version_ttl", 0)
+
+
+class TestPrefixIndex:
+    def test_lookup_is_case_insensitive_and_sorted(self):
+        index = PrefixIndex(["tomato", "Tofu", "Toast", "rice", "Tomatillo"])
+        assert index.lookup("to") == ["Toast", "Tofu", "Tomatillo", "tomato"]
+        assert index.lookup("TOM") == ["Tomatillo", "tomato"]
+        assert index.lookup("x") == []
+        assert index.lookup("  ") == []
+
+    def test_lookup_respects_limit_and_duplicates(self):
+        index = PrefixIndex(["Salt", "Salt", "Salsa", "Salami"])
+        assert len(index) == 3
+        assert index.lookup("sal", limit=2) == ["Salami", "Salsa"]
+
+
+@pytest.mark.django_db
+class TestSuggest:
+    def test_includes_system_catalog_only_for_household(
+        self, household: Household, ingredient: Ingredient
+    ):
+        other = Household.objects.create(name="Other Household")
+        Ingredient.objects.create(name="Basil", household=other)
+        Ingredient.objects.create(name="Bay Leaves", is_system=True)
+        Ingredient.objects.create(name="Bananas", household=household)
+        assert suggest(household, "ba") == ["Bananas", "Bay Leaves"]
+
+    def test_lookups_within_the_ttl_run_no_queries(
+        self, django_assert_num_queries, household: Household, ingredient: Ingredient
+    ):
+        suggest(household, ingredient.name[:1])
+        with django_assert_num_queries(0):
+            assert suggest(household, ingredient.name) == [ingredient.name]
+
+    def test_lookups_after_the_ttl_only_read_the_version(
+        self,
+        django_assert_num_queries,
+        no_version_ttl,
+        household: Household,
+        ingredient: Ingredient,
+    ):
+        suggest(household, ingredient.name[:1])
+        with django_assert_num_queries(1):
+            assert suggest(household, ingredient.name) == [ingredient.name]
+
+    def test_rebuilt_after_catalog_changes(
+        self,
+        no_version_ttl,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+    ):
+        assert suggest(household, "cum") == []
+        client.login(email=user["email"], password=user["password"])
+        client.post(
+            reverse("ingredients:create-ingredient"),
+            data={"name": "Cumin", "category": ingredients_category.pk},
+        )
+        assert suggest(household, "cum") == ["Cumin"]
+
+    def test_rebuilt_after_system_changes(self, no_version_ttl, household: Household):
+        other = Household.objects.create(name="Other Household")
+        assert suggest(household, "cum") == []
+        assert suggest(other, "cum") == []
+        system = Ingredient.objects.create(name="Cumin", is_system=True)
+        assert suggest(household, "cum") == ["Cumin"]
+        assert suggest(other, "cum") == ["Cumin"]
+        system.name = "Caraway"
+        system.save()
+        assert suggest(household, "car") == ["Caraway"]
+        assert suggest(other, "cum") == []
+
+    def test_lru_bounds_households(self, household: Household):
+        cache = PrefixIndexCache(max_households=2)
+        households = [household] + [
+            Household.objects.create(name=f"Household {i}") for i in range(2)
+        ]
+        for h in households:
+            cache.get(h)
+        assert list(cache.indexes) == [h.pk for h in households[1:]]
+
+
+@pytest.mark.django_db
+class TestAutocompleteView:
+    def test_returns_suggestions(
+        self, client: Client, user, household: Household, ingredient: Ingredient
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(
+            reverse("ingredients:autocomplete"), {"q": ingredient.name[:2]}
+        )
+        assert ingredient.name in response.json()["suggestions"]
+
+    def test_empty_without_household(self, client: Client, new_user):
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(reverse("ingredients:autocomplete"), {"q": "a"})
+        assert response.json() == {"suggestions": []}
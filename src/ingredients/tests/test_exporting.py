@@ -0,0 +1,108 @@
+from io import BytesIO
+import csv
+import json
+
+from asgiref.sync import async_to_sync
+from django.http import StreamingHttpResponse
+from django.test import Client
+from django.urls import reverse
+import pytest
+
+from households.models import Household
+
+from ..importing import import_catalog
+from ..models import IngredientsCategory, Ingredient
+
+
+def content(response: StreamingHttpResponse) -> str:
+    return b"".join(response.streaming_content).decode("utf-8")  # type: ignore
+
+
+@pytest.mark.django_db
+class TestExportView:
+    def test_exports_csv(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+        ingredient: Ingredient,
+    ):
+        Ingredient.objects.create(name="Salt", household=household)
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:export"))
+        assert isinstance(response, StreamingHttpResponse)
+        assert response["Content-Type"] == "text/csv"
+        assert "attachment" in response["Content-Disposition"]
+        rows = list(csv.reader(content(response).splitlines()))
+        assert rows[0] == ["kind", "name", "category", "description"]
+        assert ["category", "Dry Goods", "", "Pasta and stuff"] in rows
+        assert ["ingredient", ingredient.name, "Dry Goods", ""] in rows
+        assert ["ingredient", "Salt", "", ""] in rows
+
+    @pytest.mark.parametrize("format", ["jsonl", "ndjson"])
+    def test_exports_json_lines(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredient: Ingredient,
+        format,
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:export"), {"format": format})
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        assert {
+            "kind": "ingredient",
+            "name": ingredient.name,
+            "category": "Dry Goods",
+            "description": "",
+        } in rows
+
+    def test_export_is_scoped_to_household(
+        self, client: Client, user, household: Household
+    ):
+        other = Household.objects.create(name="Other Household")
+        Ingredient.objects.create(name="Basil", household=other)
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:export"))
+        assert "Basil" not in content(response)
+
+    def test_streams_asynchronously_under_asgi(
+        self, settings, async_client, user, household: Household, ingredient
+    ):
+        settings.ROOT_URLCONF = settings.ASGI_URLCONF
+        async_client.force_login(user["user"])
+
+        async def export() -> str:
+            response = await async_client.get(reverse("ingredients:export"))
+            assert response.is_async
+            chunks = [chunk async for chunk in response.streaming_content]
+            return b"".join(chunks).decode("utf-8")
+
+        rows = list(csv.reader(async_to_sync(export)().splitlines()))
+        assert rows[0] == ["kind", "name", "category", "description"]
+        assert ["ingredient", ingredient.name, "Dry Goods", ""] in rows
+
+    def test_unknown_format_not_found(self, client: Client, user, household: Household):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:export"), {"format": "xml"})
+        assert response.status_code == 404
+
+    def test_export_round_trips_through_import(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+        ingredient: Ingredient,
+    ):
+        client.login(email=user["email"], password=user["password"])
+        exported = content(client.get(reverse("ingredients:export")))
+        other = Household.objects.create(name="Other Household")
+        result = import_catalog(other, BytesIO(exported.encode()), "csv")
+        assert result.error_count == 0
+        assert result.created_categories == 1
+        category = IngredientsCategory.objects.get(household=other)
+        assert category.description == ingredients_category.description
+        assert Ingredient.objects.get(household=other).category == category
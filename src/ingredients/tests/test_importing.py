@@ -0,0 +1,197 @@
+from io import BytesIO, StringIO
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import Client
+from django.urls import reverse
+import pytest
+from pytest_django.asserts import assertContains
+
+from households.models import Household, HouseholdStats
+
+from ..importing import (
+    CatalogImporter,
+    ImportFormatError,
+    MalformedItem,
+    import_catalog,
+    iter_json_rows,
+)
+from ..models import IngredientsCategory, Ingredient
+
+CSV = b"""kind,name,category,description
+category,Dairy,,Milk and cheese
+,Milk,Dairy,
+,Cheddar,Dairy,
+,Apples,Produce,
+,Salt,,
+"""
+
+
+class TestJsonRows:
+    @pytest.mark.parametrize(
+        "text",
+        [
+            '[{"name": "a"}, {"name": "b"},\n {"name": "c"}]',
+            '{"name": "a"}\n{"name": "b"}\n\n{"name": "c"}\n',
+        ],
+    )
+    def test_reads_arrays_and_lines(self, text):
+        rows = list(iter_json_rows(StringIO(text)))
+        assert rows == [(1, {"name": "a"}), (2, {"name": "b"}), (3, {"name": "c"})]
+
+    def test_reads_items_split_across_chunks(self, monkeypatch):
+        monkeypatch.setattr("ingredients.importing.CHUNK_SIZE", 7)
+        items = [
+            {"name": f"Ingredient {i}", "category": "Dry Goods"} for i in range(50)
+        ]
+        rows = list(iter_json_rows(StringIO(json.dumps(items))))
+        assert [row for _, row in rows] == items
+
+    def test_skips_malformed_lines(self, monkeypatch):
+        monkeypatch.setattr("ingredients.importing.CHUNK_SIZE", 7)
+        monkeypatch.setattr("ingredients.importing.MAX_ITEM_SIZE", 20)
+        text = '{"name": "a"}\n{"name": "b' + "x" * 1000 + '\n{"name": "c"}\n{"na'
+        rows = list(iter_json_rows(StringIO(text)))
+        assert [row for _, row in rows][::2] == [{"name": "a"}, {"name": "c"}]
+        assert [index for index, row in rows if isinstance(row, MalformedItem)] == [
+            2,
+            4,
+        ]
+
+    def test_bounds_lookahead_for_malformed_items(self, monkeypatch):
+        monkeypatch.setattr("ingredients.importing.CHUNK_SIZE", 10)
+        monkeypatch.setattr("ingredients.importing.MAX_ITEM_SIZE", 100)
+        stream = StringIO('[{"name": ' + "x" * 100000 + "\n]")
+        rows = iter_json_rows(stream)
+        index, row = next(rows)
+        assert index == 1 and isinstance(row, MalformedItem)
+        assert stream.tell() <= 120
+
+    def test_reports_malformed_array_items_anywhere(self):
+        text = '[\n{"name": "a"},\n{"name": \n{"name": "c"},\n{"name": \n]'
+        rows = list(iter_json_rows(StringIO(text)))
+        assert [index for index, row in rows if isinstance(row, MalformedItem)] == [
+            2,
+            4,
+        ]
+        assert rows[2] == (3, {"name": "c"})
+
+    @pytest.mark.parametrize(
+        "text",
+        ['[{"name": "a"} {"name": "b"}]', '[{"name": "a"},]', '[{"name": "a"}] []'],
+    )
+    def test_rejects_malformed_arrays(self, text):
+        with pytest.raises(ImportFormatError):
+            list(iter_json_rows(StringIO(text)))
+
+    def test_rejects_truncated_json(self):
+        with pytest.raises(ImportFormatError):
+            list(iter_json_rows(StringIO('[{"name": "a"}, {"name": ')))
+
+
+@pytest.mark.django_db
+class TestImportCatalog:
+    def test_imports_csv(self, household: Household, ingredients_category):
+        result = import_catalog(household, BytesIO(CSV), "csv")
+        assert result.created_categories == 2
+        assert result.created_ingredients == 4
+        assert result.error_count == 0
+        dairy = IngredientsCategory.objects.get(household=household, name="Dairy")
+        assert dairy.description == "Milk and cheese"
+        assert set(
+            Ingredient.objects.filter(category=dairy).values_list("name", flat=True)
+        ) == {"Milk", "Cheddar"}
+        assert Ingredient.objects.get(name="Salt").category is None
+        stats = HouseholdStats.objects.get(household=household)
+        assert stats.ingredients_count == 4
+        assert stats.ingredients_categories_count == 2
+
+    def test_skips_existing_rows(self, household: Household, ingredient: Ingredient):
+        rows = [
+            {"name": ingredient.name, "category": ingredient.category.name},  # type: ignore
+            {"name": "Salt"},
+            {"name": "Salt"},
+        ]
+        result = import_catalog(household, BytesIO(json.dumps(rows).encode()), "json")
+        assert result.created_ingredients == 1
+        assert result.skipped == 2
+        assert Ingredient.objects.filter(household=household).count() == 2
+
+    def test_reports_conflicting_categories(self, household: Household):
+        def rows():
+            # Another import of the same category commits after this one
+            # started.
+            IngredientsCategory.objects.create(name="Dairy", household=household)
+            yield 1, {"kind": "category", "name": "Dairy"}
+            yield 2, {"name": "Salt"}
+
+        result = CatalogImporter(household).run(rows())
+        assert [error.row for error in result.errors] == [1]
+        assert result.created_categories == 0
+        assert result.created_ingredients == 1
+
+    def test_reports_row_errors(self, household: Household):
+        rows = [{"name": ""}, {"name": "x" * 41}, {"name": "Ok"}, ["not", "a", "row"]]
+        result = import_catalog(household, BytesIO(json.dumps(rows).encode()), "json")
+        assert result.created_ingredients == 1
+        assert [error.row for error in result.errors] == [1, 2, 4]
+
+    def test_reports_malformed_json_lines(self, household: Household):
+        lines = b'{"name": "Salt"}\n{"name": \n{"name": "Pepper"}\n'
+        result = import_catalog(household, BytesIO(lines), "json")
+        assert result.created_ingredients == 2
+        assert [error.row for error in result.errors] == [2]
+
+    def test_batches_inserts(self, household: Household, django_assert_max_num_queries):
+        rows = "\n".join(json.dumps({"name": f"Ingredient {i}"}) for i in range(250))
+        with django_assert_max_num_queries(14):
+            result = import_catalog(
+                household, BytesIO(rows.encode()), "json", batch_size=100
+            )
+        assert result.created_ingredients == 250
+
+    def test_csv_needs_name_column(self, household: Household):
+        with pytest.raises(ImportFormatError):
+            import_catalog(household, BytesIO(b"title\nMilk\n"), "csv")
+
+
+@pytest.mark.django_db
+class TestImportView:
+    def test_upload_imports_file(self, client: Client, user, household: Household):
+        client.login(email=user["email"], password=user["password"])
+        response = client.post(
+            reverse("ingredients:import"),
+            {"file": SimpleUploadedFile("catalog.csv", CSV)},
+        )
+        assert response.status_code == 200
+        assert response.context["result"].created_ingredients == 4
+        assertContains(response, "Added 4 ingredients")
+
+    def test_upload_reports_unreadable_file(
+        self, client: Client, user, household: Household
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = client.post(
+            reverse("ingredients:import"),
+            {"file": SimpleUploadedFile("catalog.json", b"[{")},
+        )
+        assert response.context["form"].errors["file"]
+        assert not Ingredient.objects.exists()
+
+
+@pytest.mark.django_db
+class TestImportCommand:
+    def test_imports_file(self, tmp_path, household: Household):
+        path = tmp_path / "catalog.csv"
+        path.write_bytes(CSV)
+        call_command(
+            "import_catalog", str(household.uuid), str(path), stdout=StringIO()
+        )
+        assert Ingredient.objects.filter(household=household).count() == 4
+
+    def test_unknown_household(self, tmp_path):
+        path = tmp_path / "catalog.csv"
+        path.write_bytes(CSV)
+        with pytest.raises(CommandError):
+            call_command("import_catalog", "not-a-uuid", str(path))
@@ -1,13 +1,18 @@
 from typing import cast
+from uuid import uuid4
 
+from django.core.cache import caches
+from django.db import connection
 from django.db.utils import IntegrityError
 from django.http import HttpResponse, HttpResponseForbidden
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from faker import Faker
 import pytest
 from pytest_django.asserts import assertContains, assertRedirects
 
+from base.pagination import PAGE_SIZE
 from households.models import Household
 
 from ..forms import IngredientForm
@@ -142,6 +147,173 @@ class TestIngredientList:
         response = client.get(reverse("ingredients:ingredients-list"))
         assertContains(response, "Uncategorized")
 
+    def test_ingredients_grouped_by_category(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+    ):
+        produce = IngredientsCategory.objects.create(
+            name="Produce", household=household
+        )
+        Ingredient.objects.create(name="Pasta", household=household)
+        Ingredient.objects.create(
+            name="Rice", household=household, category=ingredients_category
+        )
+        Ingredient.objects.create(name="Apples", household=household, category=produce)
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:ingredients-list"))
+        groups = [
+            (category.name if category else None, [i.name for i in items])
+            for category, items, _ in response.context["ingredient_groups"]
+        ]
+        assert groups == [
+            ("Dry Goods", ["Rice"]),
+            ("Produce", ["Apples"]),
+            (None, ["Pasta"]),
+        ]
+
+    def test_ingredients_groups_continue_across_pages(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+    ):
+        produce = IngredientsCategory.objects.create(
+            name="Produce", household=household
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(
+                name=f"Ingredient {i:03}",
+                household=household,
+                category=ingredients_category,
+            )
+            for i in range(PAGE_SIZE + 5)
+        )
+        Ingredient.objects.create(name="Apples", household=household, category=produce)
+        Ingredient.objects.create(name="Pasta", household=household)
+        client.login(email=user["email"], password=user["password"])
+        first = client.get(reverse("ingredients:ingredients-list"))
+        second = client.get(
+            reverse("ingredients:ingredients-page"),
+            {"cursor": first.context["page"].next_cursor},
+        )
+        groups = [
+            (category.name if category else None, len(items), continued)
+            for response in (first, second)
+            for category, items, continued in response.context["ingredient_groups"]
+        ]
+        assert groups == [
+            ("Dry Goods", PAGE_SIZE, False),
+            ("Dry Goods", 5, True),
+            ("Produce", 1, False),
+            (None, 1, False),
+        ]
+        heading = '<h2 class="h6 mb-0">Dry Goods</h2>'
+        assert first.content.decode().count(heading) == 1
+        assert heading not in second.content.decode()
+
+    def test_ingredients_list_query_count_independent_of_size(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+        ingredient: Ingredient,
+    ):
+        client.login(email=user["email"], password=user["password"])
+        client.get(reverse("ingredients:ingredients-list"))
+        # Render the list every time rather than from the fragment cache.
+        caches["fragments"].clear()
+        with CaptureQueriesContext(connection) as single:
+            client.get(reverse("ingredients:ingredients-list"))
+
+        categories = IngredientsCategory.objects.bulk_create(
+            IngredientsCategory(name=f"Category {i}", household=household)
+            for i in range(10)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(
+                name=f"Ingredient {i}",
+                household=household,
+                category=categories[i % 10] if i % 7 else None,
+            )
+            for i in range(100)
+        )
+        caches["fragments"].clear()
+        with CaptureQueriesContext(connection) as many:
+            response = client.get(reverse("ingredients:ingredients-list"))
+        assert len(response.context["ingredients"]) == PAGE_SIZE
+        # A short list also reads the uncategorized ingredients, which a full
+        # page of categorized ones never gets to.
+        assert len(many) == len(single) - 1
+        ingredient_queries = [q for q in many if Ingredient._meta.db_table in q["sql"]]
+        assert len(ingredient_queries) == 1
+
+    def test_ingredients_list_paginates_by_cursor(
+        self,
+        client: Client,
+        user,
+        household: Household,
+    ):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ingredient {i:03}", household=household)
+            for i in range(PAGE_SIZE + 10)
+        )
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:ingredients-list"))
+        first = [i.name for i in response.context["ingredients"]]
+        page = response.context["page"]
+        assert len(first) == PAGE_SIZE
+        assert page.has_next
+        assertContains(response, "data-next-page")
+
+        response = client.get(
+            reverse("ingredients:ingredients-page"), {"cursor": page.next_cursor}
+        )
+        second = [i.name for i in response.context["ingredients"]]
+        assert len(second) == 10
+        assert not response.context["page"].has_next
+        assert sorted(first + second) == first + second
+        assert "<html" not in response.content.decode("utf-8")
+
+    def test_ingredients_list_cursor_breaks_name_ties_by_uuid(
+        self,
+        client: Client,
+        user,
+        household: Household,
+    ):
+        Ingredient.objects.bulk_create(
+            Ingredient(name="Salt", household=household) for _ in range(PAGE_SIZE + 1)
+        )
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:ingredients-list"))
+        first = {i.uuid for i in response.context["ingredients"]}
+        response = client.get(
+            reverse("ingredients:ingredients-page"),
+            {"cursor": response.context["page"].next_cursor},
+        )
+        second = {i.uuid for i in response.context["ingredients"]}
+        assert len(first) == PAGE_SIZE
+        assert len(second) == 1
+        assert first.isdisjoint(second)
+
+    def test_ingredients_list_ignores_invalid_cursor(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredient: Ingredient,
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(
+            reverse("ingredients:ingredients-list"), {"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 200
+        assertContains(response, ingredient.name)
+
 
 @pytest.mark.django_db
 class TestIngredientDelete:
@@ -303,3 +475,48 @@ class TestIngredientEdit:
         assertRedirects(response, reverse("ingredients:ingredients-list"))
         ingredient = Ingredient.objects.get(uuid=ingredient.uuid)
         assert ingredient.name == new_name
+
+    def test_edit_unknown_ingredient_not_found(
+        self, client: Client, user, household: Household
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(
+            reverse("ingredients:edit-ingredient", kwargs={"uuid": uuid4()})
+        )
+        assert response.status_code == 404
+
+    def test_edit_looks_up_ingredient_in_household(
+        self,
+        client: Client,
+        user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+        ingredient: Ingredient,
+    ):
+        client.login(email=user["email"], password=user["password"])
+        url = reverse("ingredients:edit-ingredient", kwargs={"uuid": ingredient.uuid})
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        lookups = [
+            q["sql"]
+            for q in queries
+            if q["sql"].startswith(f'SELECT "{Ingredient._meta.db_table}"')
+        ]
+        assert len(lookups) == 1
+        assert '"household_id" =' in lookups[0]
+        assert not [q for q in queries if Household._meta.db_table in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestIngredientForHousehold:
+    def test_only_household_ingredients(
+        self, household: Household, ingredient: Ingredient, new_user
+    ):
+        other = Household.objects.create(name="Other", created_by=new_user["user"])
+        Ingredient.objects.create(name="Other ingredient", household=other)
+        assert list(Ingredient.objects.for_household(household)) == [ingredient]
+
+    def test_no_household_matches_nothing(self, ingredient: Ingredient):
+        Ingredient.objects.create(name="System ingredient", is_system=True)
+        assert not Ingredient.objects.for_household(None).exists()
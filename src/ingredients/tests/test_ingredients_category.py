@@ -1,4 +1,5 @@
 from typing import cast
+from uuid import uuid4
 
 from django.db.utils import IntegrityError
 from django.http import HttpResponse, HttpResponseForbidden
@@ -8,6 +9,7 @@ from faker import Faker
 import pytest
 from pytest_django.asserts import assertContains, assertRedirects
 
+from base.pagination import PAGE_SIZE
 from households.models import Household
 
 from ..forms import IngredientsCategoryForm
@@ -92,6 +94,26 @@ class TestIngredientsCategoryList:
         assert not response.context["ingredients_categories"]
         assertContains(response, "no ingredients categories")
 
+    def test_ingredients_categories_list_paginates_by_cursor(
+        self, client: Client, user, household: Household
+    ):
+        IngredientsCategory.objects.bulk_create(
+            IngredientsCategory(name=f"Category {i:03}", household=household)
+            for i in range(PAGE_SIZE + 5)
+        )
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("ingredients:categories-list"))
+        first = response.context["ingredients_categories"]
+        assert len(first) == PAGE_SIZE
+        response = client.get(
+            reverse("ingredients:categories-page"),
+            {"cursor": response.context["page"].next_cursor},
+        )
+        second = response.context["ingredients_categories"]
+        assert len(second) == 5
+        assert not response.context["page"].has_next
+        assert {ic.uuid for ic in first}.isdisjoint({ic.uuid for ic in second})
+
 
 @pytest.mark.django_db
 class TestIngredientsCategoryDelete:
@@ -294,3 +316,29 @@ class TestIngredientsCategoryEdit:
         ic = IngredientsCategory.objects.get(uuid=ingredients_category.uuid)
         assert ic.name == new_name
         assert ic.description == new_description
+
+    def test_edit_form_forbidden_not_household_user(
+        self,
+        client: Client,
+        user,
+        new_user,
+        household: Household,
+        ingredients_category: IngredientsCategory,
+    ):
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(
+            reverse(
+                "ingredients:edit-category",
+                kwargs={"uuid": ingredients_category.uuid},
+            )
+        )
+        assert isinstance(response, HttpResponseForbidden)
+
+    def test_edit_unknown_category_not_found(
+        self, client: Client, user, household: Household
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(
+            reverse("ingredients:edit-category", kwargs={"uuid": uuid4()})
+        )
+        assert response.status_code == 404
@@ -0,0 +1,105 @@
+from io import StringIO
+from typing import cast
+
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import reverse
+import pytest
+from pytest_django.asserts import assertContains
+
+from households.models import Household
+
+from ..models import IngredientsCategory, Ingredient
+from ..search import search_catalog
+
+
+def names(results):
+    return [result.item.name for result in results]
+
+
+@pytest.mark.django_db
+class TestSearchCatalog:
+    def test_prefix_matches_ingredients_and_categories(
+        self, household: Household, ingredients_category: IngredientsCategory
+    ):
+        Ingredient.objects.create(
+            name="Tomato Paste", household=household, category=ingredients_category
+        )
+        Ingredient.objects.create(name="Tofu", household=household)
+        Ingredient.objects.create(name="Rice", household=household)
+        IngredientsCategory.objects.create(
+            name="Canned", description="Tomatoes and beans", household=household
+        )
+        assert set(names(search_catalog(household, "tom"))) == {
+            "Tomato Paste",
+            "Canned",
+        }
+        assert names(search_catalog(household, "to pa")) == ["Tomato Paste"]
+
+    def test_name_matches_rank_above_description_matches(self, household: Household):
+        IngredientsCategory.objects.create(
+            name="Canned", description="Tomatoes and beans", household=household
+        )
+        Ingredient.objects.create(name="Tomatoes", household=household)
+        assert names(search_catalog(household, "tomatoes")) == ["Tomatoes", "Canned"]
+
+    def test_scoped_to_household(self, household: Household):
+        other = Household.objects.create(name="Other Household")
+        Ingredient.objects.create(name="Basil", household=other)
+        assert search_catalog(household, "basil") == []
+
+    def test_index_follows_updates_and_deletes(
+        self, household: Household, ingredient: Ingredient
+    ):
+        ingredient.name = "Oregano"
+        ingredient.save()
+        assert names(search_catalog(household, "oreg")) == ["Oregano"]
+        ingredient.delete()
+        assert search_catalog(household, "oreg") == []
+
+    def test_ignores_query_syntax(self, household: Household, ingredient: Ingredient):
+        assert search_catalog(household, '" OR * NEAR(') == []
+        assert search_catalog(household, "") == []
+
+    def test_rebuild_command(self, household: Household, ingredient: Ingredient):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM ingredients_search")
+        assert search_catalog(household, ingredient.name) == []
+        call_command("rebuild_search_index", stdout=StringIO())
+        assert names(search_catalog(household, ingredient.name)) == [ingredient.name]
+
+    def test_migrate_restores_missing_triggers(self, household: Household):
+        # What Django leaves behind when it rebuilds the table to alter it.
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER ingredients_search_ingredient_insert")
+        Ingredient.objects.create(name="Oregano", household=household)
+        assert search_catalog(household, "oreg") == []
+        call_command("migrate", verbosity=0)
+        assert names(search_catalog(household, "oreg")) == ["Oregano"]
+        Ingredient.objects.create(name="Oregano Flakes", household=household)
+        assert len(search_catalog(household, "oreg")) == 2
+
+
+@pytest.mark.django_db
+class TestSearchView:
+    def test_search_page_lists_results(
+        self, client: Client, user, household: Household, ingredient: Ingredient
+    ):
+        client.login(email=user["email"], password=user["password"])
+        response = cast(
+            HttpResponse,
+            client.get(reverse("ingredients:search"), {"q": ingredient.name[:3]}),
+        )
+        assert response.status_code == 200
+        assertContains(
+            response,
+            reverse("ingredients:edit-ingredient", kwargs={"uuid": ingredient.uuid}),
+        )
+
+    def test_search_without_household(self, client: Client, new_user):
+        client.login(email=new_user["email"], password=new_user["password"])
+        response = client.get(reverse("ingredients:search"), {"q": "anything"})
+        assert response.status_code == 200
+        assert response.context["results"] == []
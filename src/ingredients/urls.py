@@ -20,6 +20,11 @@ ingredients_category_urls = [
         views.delete_category,
         name="delete-category",
     ),
+    path(
+        "categories/page",
+        views.categories_list_page,
+        name="categories-page",
+    ),
     path(
         "categories",
         views.categories_list,
@@ -43,6 +48,31 @@ ingredient_urls = [
         views.edit_ingredient,
         name="edit-ingredient",
     ),
+    path(
+        "page",
+        views.ingredients_list_page,
+        name="ingredients-page",
+    ),
+    path(
+        "import",
+        views.import_ingredients,
+        name="import",
+    ),
+    path(
+        "export",
+        views.export_ingredients,
+        name="export",
+    ),
+    path(
+        "autocomplete",
+        views.autocomplete,
+        name="autocomplete",
+    ),
+    path(
+        "search",
+        views.search,
+        name="search",
+    ),
     path(
         "",
         views.ingredients_list,
@@ -1,82 +1,138 @@
-from uuid import UUID
+from collections.abc import Callable, Iterable
+from typing import Any
 
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, HttpResponseForbidden
-from django.shortcuts import render, redirect, get_object_or_404
+from django.db import transaction
+from django.db.models import F, Value
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import slugify
 
-from households.middleware import HttpRequestWithHousehold
+from base.async_views import arender, async_variant
+from base.pagination import ChainedKeysetPaginator, KeysetPaginator
+from households.cache import aget_current_household, get_current_household
+from households.conditional import household_condition
+from households.decorators import household_object
+from households.models import Household, HouseholdStats
 
+from .autocomplete import suggest
+from .exporting import FORMATS as EXPORT_FORMATS, aexport_catalog, export_catalog
 from .forms import (
+    CatalogImportForm,
     IngredientsCategoryForm,
     IngredientsCategoryDeleteForm,
     IngredientForm,
 )
+from .importing import ImportFormatError, import_catalog
 from .models import IngredientsCategory, Ingredient
+from .search import search_catalog
 
 
 @login_required
-def create_category(request: HttpRequestWithHousehold) -> HttpResponse:
+def create_category(request: HttpRequest) -> HttpResponse:
     form = IngredientsCategoryForm()
     if request.method == "POST":
         form = IngredientsCategoryForm(request.POST)
         if form.is_valid():
-            household = request.household
+            household = get_current_household(request)
             if not household:
                 form.add_error(
                     None,
                     "You must add a household before you add an ingredient category",
                 )
             else:
-                IngredientsCategory.objects.create(
-                    name=form.cleaned_data["name"],
-                    description=form.cleaned_data["description"],
-                    household=household,
-                )
+                with transaction.atomic():
+                    IngredientsCategory.objects.create(
+                        name=form.cleaned_data["name"],
+                        description=form.cleaned_data["description"],
+                        household=household,
+                    )
+                    HouseholdStats.adjust(household, ingredients_categories=1)
                 return redirect(reverse_lazy("ingredients:categories-list"))
     context = {"form": form}
     return render(request, "ingredients/categories_create.html", context=context)
 
 
+def categories_page_context(request: HttpRequest) -> dict[str, Any]:
+    household = get_current_household(request)
+    paginator = KeysetPaginator(IngredientsCategory.objects.for_household(household))
+    # Loaded on first use, which a cached fragment skips.
+    page = SimpleLazyObject(lambda: paginator.page(request.GET.get("cursor")))
+    return {
+        "household": household,
+        "ingredients_categories": SimpleLazyObject(lambda: page.items),
+        "page": page,
+    }
+
+
 @login_required
-def categories_list(request: HttpRequestWithHousehold) -> HttpResponse:
-    ingredients_categories = IngredientsCategory.objects.filter(
-        household=request.household
-    )
-    context = {"ingredients_categories": ingredients_categories}
+@household_condition
+def categories_list(request: HttpRequest) -> HttpResponse:
+    context = categories_page_context(request)
     return render(request, "ingredients/categories_list.html", context=context)
 
 
+@async_variant(categories_list)
+@login_required
+@household_condition
+async def acategories_list(request: HttpRequest) -> HttpResponse:
+    await aget_current_household(request)
+    context = categories_page_context(request)
+    return await arender(request, "ingredients/categories_list.html", context)
+
+
+@login_required
+@household_condition
+def categories_list_page(request: HttpRequest) -> HttpResponse:
+    context = categories_page_context(request)
+    return render(request, "ingredients/partials/categories_page.html", context=context)
+
+
 @login_required
-def delete_category(request: HttpRequestWithHousehold, uuid: UUID) -> HttpResponse:
+@household_object(
+    IngredientsCategory, "ic", "You do not have permission do delete this category"
+)
+def delete_category(request: HttpRequest, ic: IngredientsCategory) -> HttpResponse:
+    household = get_current_household(request)
     form = IngredientsCategoryDeleteForm()
-    ic = get_object_or_404(IngredientsCategory, uuid=uuid)
-    if ic.household != request.household:
-        return HttpResponseForbidden(
-            "You do not have permission do delete this category"
-        )
     if request.method == "POST":
         form = IngredientsCategoryDeleteForm(request.POST)
         if form.is_valid():
-            if form.cleaned_data["delete_ingredients"]:
-                Ingredient.objects.filter(
-                    household=request.household, category=ic
-                ).delete()
-            ic.delete()
+            with transaction.atomic():
+                deleted_ingredients = 0
+                if form.cleaned_data["delete_ingredients"]:
+                    _, deleted = (
+                        Ingredient.objects.for_household(household)
+                        .filter(category=ic)
+                        .delete()
+                    )
+                    deleted_ingredients = deleted.get(Ingredient._meta.label, 0)
+                ic.delete()
+                HouseholdStats.adjust(
+                    household,  # type: ignore
+                    ingredients_categories=-1,
+                    ingredients=-deleted_ingredients,
+                )
             return redirect(reverse_lazy("ingredients:categories-list"))
     context = {"form": form, "category": ic.name}
     return render(request, "ingredients/categories_delete.html", context=context)
 
 
 @login_required
-def edit_category(request: HttpRequestWithHousehold, uuid: UUID) -> HttpResponse:
-    ic = get_object_or_404(IngredientsCategory, uuid=uuid)
+@household_object(
+    IngredientsCategory, "ic", "You do not have permission to edit this category"
+)
+def edit_category(request: HttpRequest, ic: IngredientsCategory) -> HttpResponse:
     form = IngredientsCategoryForm(instance=ic)
     if request.method == "POST":
-        if ic.household != request.household:
-            return HttpResponseForbidden(
-                "You do not have permission to edit this category"
-            )
         form = IngredientsCategoryForm(request.POST)
         if form.is_valid():
             ic.name = form.cleaned_data["name"]
@@ -88,57 +144,140 @@ def edit_category(request: HttpRequestWithHousehold, uuid: UUID) -> HttpResponse
 
 
 @login_required
-def create_ingredient(request: HttpRequestWithHousehold) -> HttpResponse:
-    household = request.household
+def create_ingredient(request: HttpRequest) -> HttpResponse:
+    household = get_current_household(request)
     if not household:
         return render(request, "ingredients/ingredients_create.html")
     form = IngredientForm(household=household)
     if request.method == "POST":
         form = IngredientForm(household=household, data=request.POST)
         if form.is_valid():
-            Ingredient.objects.create(
-                name=form.cleaned_data["name"],
-                category=form.cleaned_data["category"],
-                household=household,
-            )
+            with transaction.atomic():
+                Ingredient.objects.create(
+                    name=form.cleaned_data["name"],
+                    category=form.cleaned_data["category"],
+                    household=household,
+                )
+                HouseholdStats.adjust(household, ingredients=1)
             return redirect(reverse_lazy("ingredients:ingredients-list"))
     context = {"form": form}
     return render(request, "ingredients/ingredients_create.html", context=context)
 
 
-@login_required
-def ingredients_list(request: HttpRequestWithHousehold) -> HttpResponse:
-    ingredients = Ingredient.objects.filter(household=request.household).order_by(
-        "name"
+def ingredient_pages(household: Household | None) -> ChainedKeysetPaginator:
+    """
+    Page through a household's ingredients grouped under their categories,
+    in category order, and then through its uncategorized ones. Each part
+    seeks through the household's (category, name, uuid) index, which no
+    single query ordering by category name could do.
+    """
+    ingredients = Ingredient.objects.for_household(household)
+    categorized = (
+        # A range on the category name, if an empty one, makes SQLite walk
+        # the categories through their name index rather than sort all of
+        # the household's ingredients.
+        ingredients.filter(category__household=household, category__name__gte="")
+        .select_related("category")
+        .only("uuid", "name", "category", "category__uuid", "category__name")
+        .annotate(category_name=F("category__name"))
     )
-    context = {"ingredients": ingredients}
+    uncategorized = (
+        ingredients.filter(category__isnull=True)
+        .only("uuid", "name", "category")
+        .annotate(category_name=Value(""))
+    )
+    return ChainedKeysetPaginator(
+        KeysetPaginator(categorized, keys=("category_name", "name", "uuid")),
+        KeysetPaginator(uncategorized),
+    )
+
+
+def group_by_category(
+    ingredients: Iterable[Ingredient], after: list[str] | None = None
+) -> list[tuple[IngredientsCategory | None, list[Ingredient], bool]]:
+    """
+    Group runs of ingredients of the same category, from a page of
+    `ingredient_pages`. A first group that carries on the category the
+    previous page ended with, as told by the cursor keys `after` it, is
+    flagged as continued, so that it is not headed a second time.
+    """
+    previous = None
+    if after:
+        previous = after[1] if after[0] == "0" else ""
+    groups: list[tuple[str, IngredientsCategory | None, list[Ingredient]]] = []
+    for ingredient in ingredients:
+        name = ingredient.category_name  # type: ignore
+        if groups and groups[-1][0] == name:
+            groups[-1][2].append(ingredient)
+        else:
+            groups.append((name, ingredient.category, [ingredient]))
+    return [
+        (category, items, i == 0 and name == previous)
+        for i, (name, category, items) in enumerate(groups)
+    ]
+
+
+def ingredients_page_context(request: HttpRequest) -> dict[str, Any]:
+    household = get_current_household(request)
+    paginator = ingredient_pages(household)
+    # Loaded on first use, which a cached fragment skips.
+    page = SimpleLazyObject(lambda: paginator.page(request.GET.get("cursor")))
+    return {
+        "household": household,
+        "ingredients": SimpleLazyObject(lambda: page.items),
+        "ingredient_groups": SimpleLazyObject(
+            lambda: group_by_category(page.items, page.after)
+        ),
+        "page": page,
+    }
+
+
+@login_required
+@household_condition
+def ingredients_list(request: HttpRequest) -> HttpResponse:
+    context = ingredients_page_context(request)
     return render(request, "ingredients/ingredients_list.html", context=context)
 
 
+@async_variant(ingredients_list)
 @login_required
-def delete_ingredient(request: HttpRequestWithHousehold, uuid: UUID) -> HttpResponse:
-    ingredient = get_object_or_404(Ingredient, uuid=uuid)
-    if ingredient.household != request.household:
-        return HttpResponseForbidden(
-            "You do not have permission do delete this category"
-        )
+@household_condition
+async def aingredients_list(request: HttpRequest) -> HttpResponse:
+    await aget_current_household(request)
+    context = ingredients_page_context(request)
+    return await arender(request, "ingredients/ingredients_list.html", context)
+
+
+@login_required
+@household_condition
+def ingredients_list_page(request: HttpRequest) -> HttpResponse:
+    context = ingredients_page_context(request)
+    return render(
+        request, "ingredients/partials/ingredients_page.html", context=context
+    )
+
+
+@login_required
+@household_object(
+    Ingredient, "ingredient", "You do not have permission do delete this ingredient"
+)
+def delete_ingredient(request: HttpRequest, ingredient: Ingredient) -> HttpResponse:
     if request.method == "POST":
-        ingredient.delete()
+        household = get_current_household(request)
+        with transaction.atomic():
+            ingredient.delete()
+            HouseholdStats.adjust(household, ingredients=-1)  # type: ignore
         return redirect(reverse_lazy("ingredients:ingredients-list"))
     context = {"ingredient": ingredient}
     return render(request, "ingredients/ingredients_delete.html", context=context)
 
 
 @login_required
-def edit_ingredient(request: HttpRequestWithHousehold, uuid: UUID) -> HttpResponse:
-    ingredient = get_object_or_404(Ingredient, uuid=uuid)
-    household = request.household
-    if ingredient.household != household:
-        return HttpResponseForbidden(
-            "You do not have permission to edit this ingredient"
-        )
-    if not household:
-        return render(request, "ingredients/ingredients_edit.html")
+@household_object(
+    Ingredient, "ingredient", "You do not have permission to edit this ingredient"
+)
+def edit_ingredient(request: HttpRequest, ingredient: Ingredient) -> HttpResponse:
+    household = get_current_household(request)
     form = IngredientForm(household=household, instance=ingredient)
     if request.method == "POST":
         form = IngredientForm(household=household, data=request.POST)
@@ -149,3 +288,75 @@ def edit_ingredient(request: HttpRequestWithHousehold, uuid: UUID) -> HttpRespon
             return redirect(reverse_lazy("ingredients:ingredients-list"))
     context = {"form": form, "ingredient": ingredient}
     return render(request, "ingredients/ingredients_edit.html", context=context)
+
+
+@login_required
+def search(request: HttpRequest) -> HttpResponse:
+    query = request.GET.get("q", "").strip()
+    results = []
+    household = get_current_household(request)
+    if household and query:
+        results = search_catalog(household, query)
+    context = {"query": query, "results": results}
+    return render(request, "ingredients/search.html", context=context)
+
+
+@login_required
+def autocomplete(request: HttpRequest) -> JsonResponse:
+    query = request.GET.get("q", "")
+    suggestions = []
+    household = get_current_household(request)
+    if household:
+        suggestions = suggest(household, query)
+    return JsonResponse({"suggestions": suggestions})
+
+
+@login_required
+def import_ingredients(request: HttpRequest) -> HttpResponse:
+    household = get_current_household(request)
+    if not household:
+        return render(request, "ingredients/import.html")
+    form = CatalogImportForm()
+    result = None
+    if request.method == "POST":
+        form = CatalogImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                result = import_catalog(
+                    household,
+                    form.cleaned_data["file"].file,
+                    form.cleaned_data["format"],
+                )
+            except ImportFormatError as e:
+                form.add_error("file", str(e))
+    context = {"form": form, "result": result}
+    return render(request, "ingredients/import.html", context=context)
+
+
+def export_response(
+    household: Household | None, format: str, export: Callable
+) -> StreamingHttpResponse:
+    if not household or format not in EXPORT_FORMATS:
+        raise Http404
+    content_type, extension = EXPORT_FORMATS[format]
+    filename = f"{slugify(household.name) or 'household'}-ingredients.{extension}"
+    return StreamingHttpResponse(
+        export(household, format),
+        content_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@login_required
+def export_ingredients(request: HttpRequest) -> StreamingHttpResponse:
+    household = get_current_household(request)
+    format = request.GET.get("format", "csv")
+    return export_response(household, format, export_catalog)
+
+
+@async_variant(export_ingredients)
+@login_required
+async def aexport_ingredients(request: HttpRequest) -> StreamingHttpResponse:
+    household = await aget_current_household(request)
+    format = request.GET.get("format", "csv")
+    return export_response(household, format, aexport_catalog)
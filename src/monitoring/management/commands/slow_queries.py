@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.slow_queries import SUMMARY_ORDERS, slow_query_log, summarize
+
+
+class Command(BaseCommand):
+    help = "Summarise the slow-query log by statement, worst first."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=10,
+            help="Number of statements to show (default 10).",
+        )
+        parser.add_argument(
+            "--order",
+            choices=SUMMARY_ORDERS,
+            default="total",
+            help="Rank statements by total, count, max or mean time.",
+        )
+        parser.add_argument("--view", help="Only statements run by this view.")
+        parser.add_argument(
+            "--plans", action="store_true", help="Show the slowest query plan."
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["limit"] < 1:
+            raise CommandError("limit must be at least 1")
+        entries = slow_query_log().read()
+        if options["view"]:
+            entries = (e for e in entries if e.get("view") == options["view"])
+        summaries = summarize(entries, options["order"])
+        if not summaries:
+            self.stdout.write("No slow queries logged")
+            return
+        for summary in summaries[: options["limit"]]:
+            views = ", ".join(
+                f"{view} ({count})" for view, count in summary.views.most_common(3)
+            )
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{summary.fingerprint}  {summary.count} times, "
+                    f"{summary.total_ms:.1f} ms total, {summary.mean_ms:.1f} ms "
+                    f"mean, {summary.max_ms:.1f} ms max"
+                )
+            )
+            self.stdout.write(f"  views: {views}")
+            self.stdout.write(f"  {summary.sql}")
+            if options["plans"] and summary.plan:
+                for step in summary.plan:
+                    self.stdout.write(f"    {step}")
@@ -0,0 +1,271 @@
+"""
+Prometheus text-format metrics, aggregated across worker processes.
+
+Each process counts into its own `ProcessMetrics` and writes it to a
+JSON file of its own under METRICS_DIR at most every
+METRICS_FLUSH_INTERVAL seconds. A scrape sums the files of every
+process, including those that have exited, so that counters keep their
+totals when workers are recycled.
+
+Files are named by the server process that started the worker, the
+worker's pid and a token drawn when the worker starts, so a worker that
+reuses a pid never overwrites another's totals. A worker's first flush
+deletes the files of servers that are no longer running, which are left
+over from before the server was restarted.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from base.cache_backends import stats as cache_stats
+from base.sessions import stats as session_stats
+
+logger = logging.getLogger("monitoring.metrics")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FAMILIES = {
+    "grocereez_requests_total": ("counter", "Requests by view and status."),
+    "grocereez_request_duration_seconds": (
+        "histogram",
+        "Request latency by view.",
+    ),
+    "grocereez_db_queries_total": ("counter", "Database queries by view."),
+    "grocereez_db_duration_seconds_total": (
+        "counter",
+        "Time spent in database queries by view.",
+    ),
+    "grocereez_cache_hits_total": ("counter", "Cache hits by cache."),
+    "grocereez_cache_misses_total": ("counter", "Cache misses by cache."),
+    "grocereez_cache_hit_ratio": ("gauge", "Share of cache reads that hit."),
+    "grocereez_session_writes_total": ("counter", "Sessions written."),
+    "grocereez_session_writes_skipped_total": (
+        "counter",
+        "Session saves skipped because the data had not changed.",
+    ),
+    "grocereez_households": ("gauge", "Households."),
+    "grocereez_households_active": (
+        "gauge",
+        "Households changed within METRICS_ACTIVE_WINDOW seconds.",
+    ),
+}
+
+HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+BUCKET_LABEL = re.compile(r',?le="([^"]*)"')
+
+
+def escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def series(name: str, **labels: object) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+    return f"{name}{{{rendered}}}"
+
+
+def family(key: str) -> str:
+    name = key.partition("{")[0]
+    if name not in FAMILIES:
+        for suffix in HISTOGRAM_SUFFIXES:
+            if name.endswith(suffix) and name.removesuffix(suffix) in FAMILIES:
+                return name.removesuffix(suffix)
+    return name
+
+
+def sort_key(key: str) -> tuple[str, str, float]:
+    """Order series by name and labels, and buckets by their bound."""
+    name, _, labels = key.partition("{")
+    bucket = BUCKET_LABEL.search(labels)
+    return (name, BUCKET_LABEL.sub("", labels), float(bucket[1]) if bucket else 0)
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class ProcessMetrics:
+    """
+    The metrics of this process, as series names mapped to their values.
+    Histograms are stored as their `_bucket`, `_sum` and `_count` series,
+    so every value is summed when processes are aggregated.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Held while writing the file, so that only one thread of a process
+        # flushes at a time.
+        self.flush_lock = threading.Lock()
+        self.values: dict[str, float] = defaultdict(float)
+        self.flushed_at = 0.0
+        self.pid: int | None = None
+        self.name = ""
+
+    def observe_request(
+        self,
+        view: str,
+        status: int,
+        duration: float,
+        queries: int,
+        db_duration: float,
+    ) -> None:
+        name = "grocereez_request_duration_seconds"
+        with self.lock:
+            self.values[
+                series("grocereez_requests_total", view=view, status=status)
+            ] += 1
+            for bound in BUCKETS:
+                key = series(f"{name}_bucket", view=view, le=bound)
+                self.values[key] += 1 if duration <= bound else 0
+            self.values[series(f"{name}_bucket", view=view, le="+Inf")] += 1
+            self.values[series(f"{name}_sum", view=view)] += duration
+            self.values[series(f"{name}_count", view=view)] += 1
+            self.values[series("grocereez_db_queries_total", view=view)] += queries
+            self.values[series("grocereez_db_duration_seconds_total", view=view)] += (
+                db_duration
+            )
+
+    def snapshot(self) -> dict[str, float]:
+        """The values counted here and those counted by other modules."""
+        with self.lock:
+            values = dict(self.values)
+        for cache, counts in cache_stats.snapshot().items():
+            values[series("grocereez_cache_hits_total", cache=cache)] = counts["hits"]
+            values[series("grocereez_cache_misses_total", cache=cache)] = counts[
+                "misses"
+            ]
+        written, skipped = session_stats.snapshot()
+        values["grocereez_session_writes_total"] = written
+        values["grocereez_session_writes_skipped_total"] = skipped
+        return values
+
+    def flush(self, directory: str | Path) -> None:
+        with self.flush_lock:
+            self.write(directory)
+
+    def maybe_flush(self, directory: str | Path, interval: float) -> None:
+        """
+        Flush if `interval` seconds have passed since the last flush. Called
+        on every request, so a failure is logged rather than raised.
+        """
+        if time.monotonic() - self.flushed_at < interval:
+            return
+        with self.flush_lock:
+            if time.monotonic() - self.flushed_at < interval:
+                return
+            try:
+                self.write(directory)
+            except Exception:
+                logger.exception("Could not write metrics to %s", directory)
+                # Wait out the interval before trying again.
+                self.flushed_at = time.monotonic()
+
+    def write(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        if self.pid != os.getpid():
+            # First flush in this process, which may have been forked from
+            # one that already flushed.
+            self.pid = os.getpid()
+            self.name = f"{os.getppid()}-{self.pid}-{uuid.uuid4().hex}"
+            directory.mkdir(parents=True, exist_ok=True)
+            clear_stale(directory)
+        # A name of its own, so that no other writer can replace or delete
+        # the file before it is moved into place.
+        temporary = tempfile.NamedTemporaryFile(
+            "w", dir=directory, prefix=f"{self.name}.", suffix=".tmp", delete=False
+        )
+        try:
+            with temporary:
+                json.dump(self.snapshot(), temporary)
+            os.replace(temporary.name, directory / f"{self.name}.json")
+        except BaseException:
+            Path(temporary.name).unlink(missing_ok=True)
+            raise
+        self.flushed_at = time.monotonic()
+
+
+metrics = ProcessMetrics()
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clear_stale(directory: Path) -> None:
+    """Delete the files written under servers that are no longer running."""
+    for path in [*directory.glob("*.json"), *directory.glob("*.tmp")]:
+        server, _, _ = path.name.partition("-")
+        if server.isdigit() and is_running(int(server)):
+            continue
+        path.unlink(missing_ok=True)
+
+
+def collect(directory: str | Path | None) -> dict[str, float]:
+    """
+    Sum the metrics of every process that has written to `directory`, or
+    return this process's alone without one.
+    """
+    if directory is None:
+        return metrics.snapshot()
+    metrics.flush(directory)
+    totals: dict[str, float] = defaultdict(float)
+    for path in Path(directory).glob("*.json"):
+        try:
+            values = json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        for key, value in values.items():
+            totals[key] += value
+    return totals
+
+
+def hit_ratios(values: dict[str, float]) -> dict[str, float]:
+    ratios = {}
+    for key, hits in values.items():
+        if family(key) != "grocereez_cache_hits_total":
+            continue
+        misses = values.get(key.replace("_hits_", "_misses_"), 0)
+        if hits + misses:
+            labels = key.partition("{")[2]
+            ratios[f"grocereez_cache_hit_ratio{{{labels}"] = hits / (hits + misses)
+    return ratios
+
+
+def render(values: dict[str, float]) -> str:
+    """Render series in the Prometheus text exposition format."""
+    by_family: dict[str, list[str]] = defaultdict(list)
+    for key in values:
+        by_family[family(key)].append(key)
+    lines = []
+    for name, (kind, help) in FAMILIES.items():
+        if name not in by_family:
+            continue
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(
+            f"{key} {format_value(values[key])}"
+            for key in sorted(by_family[name], key=sort_key)
+        )
+    return "\n".join(lines) + "\n"
+
+
+def exposition(directory: str | Path | None, gauges: dict[str, float]) -> str:
+    values = dict(collect(directory))
+    values.update(hit_ratios(values))
+    values.update(gauges)
+    return render(values)
@@ -0,0 +1,276 @@
+import json
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from importlib import import_module
+from pathlib import Path
+from typing import Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.http import HttpRequest, HttpResponse
+
+from base.templatetags.url_helpers import url_name
+
+from .metrics import metrics
+from .profiling import Profile, exclusive
+from .queries import DuplicateQuery, QueryRecorder, record_queries
+from .slow_queries import SlowQueryRecorder
+from .sql import normalize_sql
+
+logger = logging.getLogger("monitoring.requests")
+
+MAX_LOGGED_SQL_LENGTH = 500
+UNMATCHED_VIEW = "unmatched"
+
+
+def milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def server_timing(
+    duration: float, recorder: QueryRecorder, duplicates: list[DuplicateQuery]
+) -> str:
+    metrics = [
+        f"app;dur={milliseconds(duration)}",
+        f'db;dur={milliseconds(recorder.duration)};desc="{recorder.count} queries"',
+    ]
+    if recorder.count:
+        metrics.append(f"db-slowest;dur={milliseconds(recorder.slowest_duration)}")
+    repeated = sum(duplicate.count for duplicate in duplicates)
+    if repeated:
+        metrics.append(f'db-duplicates;desc="{repeated} queries"')
+    return ", ".join(metrics)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the number of queries, their total time, the slowest statement
+    and repeated statements of each request. They are reported in a
+    `Server-Timing` header, when SERVER_TIMING is set, and in a JSON line
+    on the `monitoring.requests` logger. Statements slower than
+    SLOW_QUERY_THRESHOLD milliseconds are written to SLOW_QUERY_LOG with
+    their query plan. Latencies and query counts also feed the metrics
+    served at /metrics.
+
+    Queries run while a streaming response is consumed come after the
+    response has left the middleware, and are not counted. Under ASGI the
+    wrappers are installed on the connection of the request's sync thread,
+    where the ORM runs.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)  # type: ignore
+        start = time.perf_counter()
+        recorder, slow_queries = self.recorders()
+        with record_queries(recorder):
+            response = self.get_response(request)
+        return self.report(request, response, start, recorder, slow_queries)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        recorder, slow_queries = self.recorders()
+        recording = record_queries(recorder)
+        await sync_to_async(recording.__enter__)()
+        try:
+            response = await self.get_response(request)  # type: ignore
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+        return self.report(request, response, start, recorder, slow_queries)
+
+    def recorders(self) -> tuple[QueryRecorder, SlowQueryRecorder | None]:
+        recorder = QueryRecorder()
+        slow_queries = None
+        if settings.SLOW_QUERY_THRESHOLD is not None:
+            slow_queries = SlowQueryRecorder()
+            recorder.slow_threshold = settings.SLOW_QUERY_THRESHOLD / 1000
+            recorder.on_slow_query = slow_queries
+        return recorder, slow_queries
+
+    def report(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        start: float,
+        recorder: QueryRecorder,
+        slow_queries: SlowQueryRecorder | None,
+    ) -> HttpResponse:
+        duration = time.perf_counter() - start
+        if slow_queries is not None:
+            slow_queries.flush(request)
+        metrics.observe_request(
+            url_name(request.resolver_match) or UNMATCHED_VIEW,
+            response.status_code,
+            duration,
+            recorder.count,
+            recorder.duration,
+        )
+        if settings.METRICS_DIR:
+            metrics.maybe_flush(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+        duplicates = recorder.duplicates()
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = server_timing(duration, recorder, duplicates)
+        if logger.isEnabledFor(logging.INFO):
+            entry = self.log_entry(request, response, duration, recorder, duplicates)
+            logger.info(json.dumps(entry))
+        return response
+
+    def log_entry(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        duration: float,
+        recorder: QueryRecorder,
+        duplicates: list[DuplicateQuery],
+    ) -> dict:
+        slowest_sql = recorder.slowest_sql and normalize_sql(recorder.slowest_sql)
+        return {
+            "method": request.method,
+            "path": request.path,
+            "view": url_name(request.resolver_match),
+            "status": response.status_code,
+            "duration_ms": milliseconds(duration),
+            "queries": recorder.count,
+            "db_ms": milliseconds(recorder.duration),
+            "slowest_ms": milliseconds(recorder.slowest_duration),
+            "slowest_sql": slowest_sql and slowest_sql[:MAX_LOGGED_SQL_LENGTH],
+            "duplicates": [
+                {
+                    "fingerprint": duplicate.fingerprint,
+                    "count": duplicate.count,
+                    "sql": duplicate.sql[:MAX_LOGGED_SQL_LENGTH],
+                }
+                for duplicate in duplicates
+            ],
+        }
+
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAMETER = "profile"
+PROFILE_BUSY = "busy"
+PROFILE_FORMATS = ("collapsed", "pstats")
+UNSAFE_PATH_CHARACTERS = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def is_staff(request: HttpRequest) -> bool:
+    """
+    Authenticate the request ahead of the session and authentication
+    middleware, which the profiler wraps.
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    try:
+        user = get_user(request)
+    finally:
+        del request.session
+    return user.is_active and user.is_staff
+
+
+class ProfilerMiddleware:
+    """
+    Profile a request for a staff user who asks for it with an `X-Profile`
+    header or a `profile` query parameter. The profile covers everything
+    inside this middleware, which comes first: the other middleware, the
+    view, template and form rendering and the ORM.
+
+    `collapsed` returns the sampled stacks in place of the response, for
+    flame graph tools, and `pstats` returns the cProfile profile. Any other
+    value saves both under PROFILE_DIR and names the files in the
+    response's `X-Profile` header.
+
+    Streaming responses are profiled up to the point they are returned.
+    The cProfile profile covers the whole process, including the threads
+    that run ORM calls under ASGI and any other request served meanwhile,
+    while the sampled stacks only cover the thread that runs this
+    middleware, the event loop's under ASGI. Only one request is profiled
+    at a time: one that asks while another is being profiled runs
+    unprofiled, and says so with `X-Profile: busy`. Requests from anyone
+    else run unprofiled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)  # type: ignore
+        requested = self.requested(request)
+        if not requested or not is_staff(request):
+            return self.get_response(request)
+
+        with exclusive() as available:
+            if not available:
+                return self.busy_response(self.get_response(request))
+            profile = Profile(settings.PROFILE_SAMPLE_INTERVAL)
+            with profile.run():
+                response = self.get_response(request)
+        return self.profile_response(request, response, requested, profile)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        requested = self.requested(request)
+        if not requested or not await sync_to_async(is_staff)(request):
+            return await self.get_response(request)  # type: ignore
+
+        with exclusive() as available:
+            if not available:
+                response = await self.get_response(request)  # type: ignore
+                return self.busy_response(response)
+            profile = Profile(settings.PROFILE_SAMPLE_INTERVAL)
+            with profile.run():
+                response = await self.get_response(request)  # type: ignore
+        return self.profile_response(request, response, requested, profile)
+
+    def requested(self, request: HttpRequest) -> str | None:
+        return request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAMETER)
+
+    def busy_response(self, response: HttpResponse) -> HttpResponse:
+        response[PROFILE_HEADER] = PROFILE_BUSY
+        return response
+
+    def profile_response(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        requested: str,
+        profile: Profile,
+    ) -> HttpResponse:
+        if requested == "collapsed":
+            response = HttpResponse(
+                profile.collapsed(), content_type="text/plain; charset=utf-8"
+            )
+        elif requested == "pstats":
+            response = HttpResponse(
+                profile.pstats(), content_type="application/octet-stream"
+            )
+            response["Content-Disposition"] = 'attachment; filename="profile.prof"'
+        else:
+            name = self.profile_name(request)
+            profile.save(Path(settings.PROFILE_DIR) / name)
+            response[PROFILE_HEADER] = name
+        if requested in PROFILE_FORMATS:
+            response["Cache-Control"] = "no-store"
+        return response
+
+    def profile_name(self, request: HttpRequest) -> str:
+        view = url_name(request.resolver_match) or request.path
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return f"{timestamp}-{UNSAFE_PATH_CHARACTERS.sub('-', view).strip('-')}"
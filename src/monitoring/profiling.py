@@ -0,0 +1,111 @@
+import cProfile
+import marshal
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+
+# cProfile hooks `sys.monitoring`, which the whole interpreter shares, so
+# only one profile can run at a time. Enabling a second raises ValueError.
+lock = threading.Lock()
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def collapse(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Sample the stack of the thread that started it every `interval`
+    seconds, from a thread of its own. Samples are counted as collapsed
+    stacks, the input format of flame graph tools such as flamegraph.pl
+    and speedscope.
+
+    A sample can only be taken when the sampled thread releases the GIL,
+    which it does at least every `sys.getswitchinterval()` seconds.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.stopped = threading.Event()
+
+    def start(self) -> None:
+        self.thread_id = threading.get_ident()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+@contextmanager
+def exclusive():
+    """
+    Yield whether the caller may profile, which it may until the block
+    ends. Never waits for a profile that is already running.
+    """
+    acquired = lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
+
+
+class Profile:
+    """
+    A deterministic cProfile profile and a sampled one of the same code.
+
+    The cProfile profile records every thread of the process while it runs,
+    so it includes whatever concurrent requests and thread pools did too.
+    The sampled profile only covers the thread that started it.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(interval)
+
+    @contextmanager
+    def run(self):
+        self.sampler.start()
+        self.profiler.enable()
+        try:
+            yield self
+        finally:
+            self.profiler.disable()
+            self.sampler.stop()
+
+    def pstats(self) -> bytes:
+        """The profile in the format written by `pstats.Stats.dump_stats`."""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)  # type: ignore
+
+    def collapsed(self) -> str:
+        return self.sampler.collapsed()
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.with_suffix(".prof").write_bytes(self.pstats())
+        path.with_suffix(".collapsed").write_text(self.collapsed())
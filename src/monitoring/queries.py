@@ -0,0 +1,90 @@
+import time
+from collections import Counter
+from collections.abc import Callable
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+
+from django.db import connections
+
+from .sql import fingerprint, normalize_sql
+
+MAX_REPORTED_DUPLICATES = 5
+
+
+@dataclass
+class DuplicateQuery:
+    fingerprint: str
+    count: int
+    sql: str
+
+
+@dataclass
+class QueryRecorder:
+    """
+    An execute wrapper that tallies the statements a block of code runs.
+
+    Only counts and timings are kept per statement. Statements are
+    compared by their text, which Django keeps free of parameter values,
+    and normalized only when reported. Statements that take at least
+    `slow_threshold` seconds and succeed are also passed to
+    `on_slow_query`.
+    """
+
+    count: int = 0
+    duration: float = 0.0
+    slowest_sql: str | None = None
+    slowest_duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+    slow_threshold: float | None = None
+    on_slow_query: Callable[..., None] | None = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.record(sql, duration)
+        # Only statements that succeeded are passed on, since a failed one
+        # may have left the transaction unusable for explaining it.
+        if (
+            self.on_slow_query is not None
+            and self.slow_threshold is not None
+            and duration >= self.slow_threshold
+        ):
+            self.on_slow_query(sql, params, many, context, duration)
+        return result
+
+    def record(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[sql] += 1
+        if duration > self.slowest_duration:
+            self.slowest_sql = sql
+            self.slowest_duration = duration
+
+    def duplicates(self, limit: int = MAX_REPORTED_DUPLICATES) -> list[DuplicateQuery]:
+        repeated: Counter[str] = Counter()
+        examples: dict[str, str] = {}
+        for sql, count in self.statements.items():
+            key = fingerprint(sql)
+            repeated[key] += count
+            examples.setdefault(key, sql)
+        return [
+            DuplicateQuery(key, count, normalize_sql(examples[key]))
+            for key, count in repeated.most_common(limit)
+            if count > 1
+        ]
+
+
+@contextmanager
+def record_queries(recorder: QueryRecorder | None = None):
+    """
+    Record the statements run on every database connection of the current
+    thread while the block runs.
+    """
+    recorder = recorder or QueryRecorder()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
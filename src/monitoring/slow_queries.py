@@ -0,0 +1,206 @@
+import fcntl
+import json
+import os
+import threading
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpRequest
+
+from base.templatetags.url_helpers import url_name
+
+from .sql import fingerprint, normalize_sql
+
+EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+MAX_PARAMS_SHAPE = 20
+
+
+class SlowQueryLog:
+    """
+    An append-only JSON Lines file that is rotated once it grows past
+    `max_bytes`, keeping `backups` older files as `<path>.1`, `<path>.2`...
+
+    Every worker process appends to the same file, so writes hold an
+    exclusive `flock` on `<path>.lock` as well as the thread lock. Without
+    it, two processes could both find the file full and rotate it twice,
+    shifting a barely written file into the backups.
+    """
+
+    lock = threading.Lock()
+
+    def __init__(self, path: str | Path, max_bytes: int, backups: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def backup_path(self, number: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{number}")
+
+    @property
+    def lock_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.lock")
+
+    def rotate(self) -> None:
+        for number in range(self.backups - 1, 0, -1):
+            if self.backup_path(number).exists():
+                os.replace(self.backup_path(number), self.backup_path(number + 1))
+        if self.backups:
+            os.replace(self.path, self.backup_path(1))
+        else:
+            self.path.unlink()
+
+    def write(self, entry: dict) -> None:
+        line = json.dumps(entry) + "\n"
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.lock_path.open("a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    if self.path.stat().st_size + len(line) > self.max_bytes:
+                        self.rotate()
+                except FileNotFoundError:
+                    pass
+                with self.path.open("a") as f:
+                    f.write(line)
+
+    def read(self) -> Iterator[dict]:
+        """Yield the entries of every file, oldest first."""
+        paths = [self.backup_path(n) for n in range(self.backups, 0, -1)]
+        for path in [*paths, self.path]:
+            try:
+                with path.open() as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+            except FileNotFoundError:
+                continue
+
+
+def slow_query_log() -> SlowQueryLog:
+    return SlowQueryLog(
+        settings.SLOW_QUERY_LOG,
+        settings.SLOW_QUERY_LOG_MAX_BYTES,
+        settings.SLOW_QUERY_LOG_BACKUPS,
+    )
+
+
+def params_shape(params: Any, many: bool) -> list[str] | str | None:
+    """
+    Describe parameters by type, never by value, so that the log holds no
+    user data.
+    """
+    if params is None:
+        return None
+    if many:
+        return "many"
+    if isinstance(params, dict):
+        params = params.values()
+    shape = [type(param).__name__ for param in params]
+    if len(shape) > MAX_PARAMS_SHAPE:
+        return [*shape[:MAX_PARAMS_SHAPE], f"... {len(shape)} in all"]
+    return shape
+
+
+def explain(connection, sql: str, params: Any) -> list[str] | None:
+    """
+    Return the SQLite query plan of a statement, one line per step,
+    indented by depth. The plan is read on a cursor of its own, so that
+    the statement's results are left alone and it is not recorded itself.
+    """
+    if connection.vendor != "sqlite":
+        return None
+    if not sql.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        rows = cursor.fetchall()
+    except connection.Database.Error:
+        return None
+    finally:
+        cursor.close()
+    depths = {0: -1}
+    plan = []
+    for id, parent, _, detail in rows:
+        depths[id] = depths.get(parent, -1) + 1
+        plan.append("  " * depths[id] + detail)
+    return plan
+
+
+@dataclass
+class SlowQueryRecorder:
+    """
+    Collects the statements `QueryRecorder` finds slow during a request,
+    with their plans, and logs them once the request is done and its view
+    is known. Middleware can run queries before the URL is resolved.
+    """
+
+    log: SlowQueryLog = field(default_factory=slow_query_log)
+    entries: list[dict] = field(default_factory=list)
+
+    def __call__(self, sql: str, params: Any, many: bool, context: dict, duration):
+        self.entries.append(
+            {
+                "time": datetime.now(timezone.utc).isoformat(),
+                "fingerprint": fingerprint(sql),
+                "sql": normalize_sql(sql),
+                "params": params_shape(params, many),
+                "duration_ms": round(duration * 1000, 2),
+                "plan": None if many else explain(context["connection"], sql, params),
+            }
+        )
+
+    def flush(self, request: HttpRequest) -> None:
+        view = url_name(request.resolver_match)
+        for entry in self.entries:
+            self.log.write({**entry, "view": view})
+        self.entries = []
+
+
+@dataclass
+class SlowQuerySummary:
+    fingerprint: str
+    sql: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    plan: list[str] | None = None
+    views: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count
+
+    def add(self, entry: dict) -> None:
+        self.count += 1
+        self.total_ms += entry["duration_ms"]
+        if entry["duration_ms"] >= self.max_ms:
+            self.max_ms = entry["duration_ms"]
+            self.plan = entry.get("plan") or self.plan
+        self.views[entry.get("view") or "-"] += 1
+
+
+SUMMARY_ORDERS = {
+    "total": lambda summary: summary.total_ms,
+    "count": lambda summary: summary.count,
+    "max": lambda summary: summary.max_ms,
+    "mean": lambda summary: summary.mean_ms,
+}
+
+
+def summarize(entries: Iterable[dict], order: str = "total") -> list[SlowQuerySummary]:
+    """Group logged statements by fingerprint, worst first."""
+    summaries: dict[str, SlowQuerySummary] = {}
+    for entry in entries:
+        key = entry["fingerprint"]
+        if key not in summaries:
+            summaries[key] = SlowQuerySummary(key, entry["sql"])
+        summaries[key].add(entry)
+    return sorted(summaries.values(), key=SUMMARY_ORDERS[order], reverse=True)
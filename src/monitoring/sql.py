@@ -0,0 +1,25 @@
+import hashlib
+import re
+
+PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Reduce a statement to its shape: literals become placeholders and
+    lists of placeholders collapse to one, so `IN (%s, %s)` and
+    `IN (%s, %s, %s)` normalize alike.
+    """
+    sql = STRING.sub("%s", sql)
+    sql = NUMBER.sub("%s", sql)
+    sql = PLACEHOLDER_LIST.sub("%s, ...", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.md5(normalize_sql(sql).encode(), usedforsecurity=False).hexdigest()[
+        :12
+    ]
@@ -0,0 +1,402 @@
+import json
+import logging
+import marshal
+import os
+import subprocess
+import sys
+import threading
+import time
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+import pytest
+
+from households.models import Household
+from ingredients.models import Ingredient
+
+from . import profiling
+from .middleware import logger
+from .metrics import (
+    ProcessMetrics,
+    collect,
+    hit_ratios,
+    logger as metrics_logger,
+    render,
+    series,
+)
+from .profiling import StackSampler
+from .queries import QueryRecorder, record_queries
+from .slow_queries import SlowQueryLog, explain, params_shape, summarize
+from .sql import fingerprint, normalize_sql
+
+
+class TestNormalizeSql:
+    def test_collapses_placeholder_lists(self):
+        assert normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)') == (
+            'SELECT * FROM "t" WHERE "id" IN (%s, ...)'
+        )
+
+    def test_replaces_literals(self):
+        assert normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b = 10") == (
+            "SELECT * FROM t WHERE a = %s AND b = %s"
+        )
+
+    def test_fingerprint_ignores_list_length(self):
+        assert fingerprint("SELECT 1 WHERE a IN (%s, %s)") == fingerprint(
+            "SELECT 1 WHERE a IN (%s, %s, %s)"
+        )
+
+
+@pytest.mark.django_db
+class TestRecordQueries:
+    def test_counts_queries(self, household: Household):
+        with record_queries() as recorder:
+            list(Household.objects.all())
+            list(Ingredient.objects.all())
+        assert recorder.count == 2
+        assert recorder.duration >= recorder.slowest_duration > 0
+        assert recorder.slowest_sql is not None
+
+    def test_reports_duplicates(self, household: Household):
+        with record_queries() as recorder:
+            for _ in range(3):
+                Household.objects.filter(pk=household.pk).exists()
+            list(Ingredient.objects.all())
+        [duplicate] = recorder.duplicates()
+        assert duplicate.count == 3
+        assert Household._meta.db_table in duplicate.sql
+
+    def test_unwraps_connection(self):
+        with record_queries():
+            pass
+        assert connection.execute_wrappers == []
+
+
+@pytest.mark.django_db
+class TestQueryInstrumentationMiddleware:
+    def test_server_timing_header(self, client: Client, user, household: Household):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("dashboard:index"))
+        metrics = [
+            metric.split(";")[0] for metric in response["Server-Timing"].split(", ")
+        ]
+        assert metrics[:3] == ["app", "db", "db-slowest"]
+
+    def test_counts_queries_under_asgi(self, async_client, user, household: Household):
+        async_client.force_login(user["user"])
+        response = async_to_sync(async_client.get)(reverse("dashboard:index"))
+        [db] = [m for m in response["Server-Timing"].split(", ") if m.startswith("db;")]
+        assert '"0 queries"' not in db
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self, client: Client):
+        response = client.get(reverse("home"))
+        assert "Server-Timing" not in response
+
+    def test_logs_json_line(
+        self, client: Client, user, household: Household, caplog, monkeypatch
+    ):
+        monkeypatch.setattr(logger.parent, "propagate", True)
+        client.login(email=user["email"], password=user["password"])
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            client.get(reverse("households:index"))
+        entry = json.loads(caplog.records[-1].getMessage())
+        assert entry["view"] == "households:index"
+        assert entry["status"] == 200
+        assert entry["queries"] > 0
+        assert entry["slowest_sql"]
+
+
+class TestSlowQueryLog:
+    def test_rotates(self, tmp_path):
+        log = SlowQueryLog(tmp_path / "slow.jsonl", max_bytes=50, backups=2)
+        for i in range(5):
+            log.write({"entry": i, "padding": "x" * 20})
+        assert (tmp_path / "slow.jsonl.2").exists()
+        assert not (tmp_path / "slow.jsonl.3").exists()
+        assert [entry["entry"] for entry in log.read()] == [2, 3, 4]
+        assert (tmp_path / "slow.jsonl.lock").exists()
+
+    def test_read_missing(self, tmp_path):
+        assert list(SlowQueryLog(tmp_path / "slow.jsonl", 100, 1).read()) == []
+
+    def test_params_shape(self):
+        assert params_shape((1, "a", None), many=False) == ["int", "str", "NoneType"]
+        assert params_shape([(1,), (2,)], many=True) == "many"
+        assert params_shape(list(range(30)), many=False)[-1] == "... 30 in all"
+
+    def test_summarize(self):
+        entries = [
+            {"fingerprint": "a", "sql": "A", "duration_ms": 5, "view": "x"},
+            {"fingerprint": "b", "sql": "B", "duration_ms": 20, "plan": ["SCAN b"]},
+            {"fingerprint": "a", "sql": "A", "duration_ms": 10, "view": "y"},
+            {"fingerprint": "a", "sql": "A", "duration_ms": 7, "view": "x"},
+        ]
+        first, second = summarize(entries, order="count")
+        assert (first.fingerprint, first.count, first.max_ms) == ("a", 3, 10)
+        assert first.views.most_common(1) == [("x", 2)]
+        assert second.plan == ["SCAN b"]
+        assert [s.fingerprint for s in summarize(entries, order="max")] == ["b", "a"]
+
+
+@pytest.mark.django_db
+class TestSlowQueries:
+    def test_explain(self, household: Household):
+        queryset = Ingredient.objects.for_household(household).order_by("name")
+        sql, params = queryset.query.sql_with_params()
+        plan = explain(connection, sql, params)
+        assert any("ingredient_household_name_idx" in step for step in plan)
+
+    def test_explain_skips_other_statements(self):
+        assert explain(connection, "PRAGMA optimize", None) is None
+
+    def test_recorder_passes_slow_queries(self, household: Household):
+        slow = []
+        recorder = QueryRecorder(
+            slow_threshold=0, on_slow_query=lambda *args: slow.append(args)
+        )
+        with record_queries(recorder):
+            list(Household.objects.all())
+        [(sql, params, many, context, duration)] = slow
+        assert Household._meta.db_table in sql
+        assert context["connection"].alias == "default"
+
+    def test_recorder_skips_failed_queries(self):
+        slow = []
+        recorder = QueryRecorder(
+            slow_threshold=0, on_slow_query=lambda *args: slow.append(args)
+        )
+        with record_queries(recorder), pytest.raises(DatabaseError):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM missing_table")
+        assert recorder.count == 1
+        assert slow == []
+
+    def test_middleware_logs_slow_queries(
+        self, client: Client, user, household: Household, tmp_path
+    ):
+        path = tmp_path / "slow.jsonl"
+        client.login(email=user["email"], password=user["password"])
+        with override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG=path):
+            client.get(reverse("ingredients:ingredients-list"))
+            entries = list(SlowQueryLog(path, 10**6, 0).read())
+            stdout = StringIO()
+            call_command(
+                "slow_queries", "--view", "ingredients:ingredients-list", stdout=stdout
+            )
+        assert {entry["view"] for entry in entries} == {"ingredients:ingredients-list"}
+        listing = next(e for e in entries if "ingredients_ingredient" in e["sql"])
+        assert listing["plan"]
+        assert all(isinstance(kind, str) for kind in listing["params"])
+        assert listing["fingerprint"] in stdout.getvalue()
+
+    @override_settings(SLOW_QUERY_THRESHOLD=None)
+    def test_command_without_entries(self, tmp_path):
+        stdout = StringIO()
+        with override_settings(SLOW_QUERY_LOG=tmp_path / "slow.jsonl"):
+            call_command("slow_queries", stdout=stdout)
+        assert "No slow queries logged" in stdout.getvalue()
+
+
+def busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestStackSampler:
+    def test_collapsed_stacks(self):
+        sampler = StackSampler(0.001)
+        sampler.start()
+        busy(0.05)
+        sampler.stop()
+        lines = sampler.collapsed().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert any("busy (tests.py:" in line for line in lines)
+
+
+@pytest.fixture
+def staff(user):
+    user["user"].is_staff = True
+    user["user"].save()
+    return user
+
+
+@pytest.mark.django_db
+class TestProfilerMiddleware:
+    def test_collapsed(self, client: Client, staff, household: Household):
+        client.login(email=staff["email"], password=staff["password"])
+        response = client.get(reverse("dashboard:index"), HTTP_X_PROFILE="collapsed")
+        assert response["Content-Type"].startswith("text/plain")
+        assert response["Cache-Control"] == "no-store"
+
+    def test_pstats(self, client: Client, staff, household: Household):
+        client.login(email=staff["email"], password=staff["password"])
+        response = client.get(reverse("dashboard:index"), {"profile": "pstats"})
+        stats = marshal.loads(response.content)
+        assert any(name == "dashboard_view" for _, _, name in stats)
+
+    def test_saved(self, client: Client, staff, household: Household, tmp_path):
+        client.login(email=staff["email"], password=staff["password"])
+        with override_settings(PROFILE_DIR=tmp_path):
+            response = client.get(
+                reverse("ingredients:ingredients-list"), {"profile": "1"}
+            )
+        assert response.status_code == 200
+        name = response["X-Profile"]
+        assert name.endswith("-ingredients-ingredients-list")
+        assert (tmp_path / f"{name}.prof").exists()
+        assert (tmp_path / f"{name}.collapsed").exists()
+
+    def test_pstats_under_asgi(self, async_client, staff, household: Household):
+        async_client.force_login(staff["user"])
+        get = async_to_sync(async_client.get)
+        response = get(reverse("dashboard:index"), {"profile": "pstats"})
+        stats = marshal.loads(response.content)
+        assert any(name == "dashboard_view" for _, _, name in stats)
+
+    def test_busy_while_another_request_is_profiled(
+        self, client: Client, staff, household: Household
+    ):
+        client.login(email=staff["email"], password=staff["password"])
+        with profiling.exclusive() as available:
+            assert available
+            response = client.get(reverse("dashboard:index"), {"profile": "pstats"})
+        assert response.status_code == 200
+        assert response["X-Profile"] == "busy"
+        assert response["Content-Type"].startswith("text/html")
+
+    def test_ignored_for_other_users(self, client: Client, user, household: Household):
+        client.login(email=user["email"], password=user["password"])
+        response = client.get(reverse("dashboard:index"), {"profile": "pstats"})
+        assert response.status_code == 200
+        assert "X-Profile" not in response
+        assert response["Content-Type"].startswith("text/html")
+
+    def test_ignored_for_anonymous_users(self, client: Client):
+        response = client.get(reverse("home"), HTTP_X_PROFILE="collapsed")
+        assert response["Content-Type"].startswith("text/html")
+
+
+class TestMetrics:
+    def test_histogram(self):
+        metrics = ProcessMetrics()
+        metrics.observe_request("home", 200, 0.02, 3, 0.001)
+        metrics.observe_request("home", 200, 0.3, 5, 0.002)
+        values = metrics.snapshot()
+        bucket = "grocereez_request_duration_seconds_bucket"
+        assert values[series(bucket, view="home", le=0.01)] == 0
+        assert values[series(bucket, view="home", le=0.025)] == 1
+        assert values[series(bucket, view="home", le=0.5)] == 2
+        assert values[series(bucket, view="home", le="+Inf")] == 2
+        assert values[series("grocereez_db_queries_total", view="home")] == 8
+
+    def test_render(self):
+        metrics = ProcessMetrics()
+        metrics.observe_request("home", 200, 0.02, 3, 0.001)
+        text = render(metrics.snapshot())
+        assert "# TYPE grocereez_request_duration_seconds histogram\n" in text
+        assert 'grocereez_requests_total{view="home",status="200"} 1\n' in text
+        buckets = [
+            line.split('le="')[1].split('"')[0]
+            for line in text.splitlines()
+            if line.startswith("grocereez_request_duration_seconds_bucket")
+        ]
+        assert buckets[0] == "0.005"
+        assert buckets[-2:] == ["10.0", "+Inf"]
+
+    def test_hit_ratios(self):
+        values = {
+            series("grocereez_cache_hits_total", cache="fragments"): 3,
+            series("grocereez_cache_misses_total", cache="fragments"): 1,
+        }
+        assert hit_ratios(values) == {
+            series("grocereez_cache_hit_ratio", cache="fragments"): 0.75
+        }
+
+    def test_collect_sums_processes(self, tmp_path):
+        server = os.getppid()
+        (tmp_path / f"{server}-1-a.json").write_text(
+            json.dumps({"grocereez_households": 0, "a": 2})
+        )
+        (tmp_path / f"{server}-2-b.json").write_text(json.dumps({"a": 3}))
+        (tmp_path / f"{server}-3-c.json").write_text("{")
+        assert collect(tmp_path)["a"] == 5
+
+    def test_flush_names_files_per_start(self, tmp_path):
+        first, second = ProcessMetrics(), ProcessMetrics()
+        first.flush(tmp_path)
+        second.flush(tmp_path)
+        assert first.name != second.name
+        assert first.name.startswith(f"{os.getppid()}-{os.getpid()}-")
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+    def test_first_flush_clears_stale_files(self, tmp_path):
+        gone = subprocess.run(
+            [sys.executable, "-c", "import os; print(os.getpid())"],
+            capture_output=True,
+            text=True,
+        )
+        stale = tmp_path / f"{gone.stdout.strip()}-1-a.json"
+        stale.write_text(json.dumps({"a": 2}))
+        current = tmp_path / f"{os.getppid()}-1-b.json"
+        current.write_text(json.dumps({"a": 3}))
+        ProcessMetrics().flush(tmp_path)
+        assert not stale.exists()
+        assert current.exists()
+
+    def test_concurrent_flushes(self, tmp_path):
+        metrics = ProcessMetrics()
+        metrics.flush(tmp_path)
+        threads = [
+            threading.Thread(target=metrics.maybe_flush, args=(tmp_path, 0))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [path.name for path in tmp_path.iterdir()] == [f"{metrics.name}.json"]
+
+    def test_failed_flush_is_logged(self, tmp_path, monkeypatch, caplog):
+        metrics = ProcessMetrics()
+        metrics.flush(tmp_path)
+
+        def fail(*args):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "replace", fail)
+        monkeypatch.setattr(metrics_logger.parent, "propagate", True)
+        with caplog.at_level(logging.ERROR, logger=metrics_logger.name):
+            metrics.maybe_flush(tmp_path, 0)
+        assert "Could not write metrics" in caplog.text
+        assert [path.name for path in tmp_path.iterdir()] == [f"{metrics.name}.json"]
+
+
+@pytest.mark.django_db
+class TestMetricsView:
+    def test_metrics(self, client: Client, user, household: Household, tmp_path):
+        client.login(email=user["email"], password=user["password"])
+        client.get(reverse("dashboard:index"))
+        with override_settings(METRICS_DIR=tmp_path, METRICS_FLUSH_INTERVAL=0):
+            response = client.get(reverse("metrics"))
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = response.content.decode()
+        assert 'grocereez_requests_total{view="dashboard:index",status="200"}' in text
+        assert "grocereez_households 1\n" in text
+        assert "grocereez_households_active 1\n" in text
+        assert 'grocereez_cache_hit_ratio{cache="' in text
+        assert "grocereez_session_writes_total " in text
+        assert list(tmp_path.glob("*.json"))
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self, client: Client):
+        assert client.get(reverse("metrics")).status_code == 403
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        assert response.status_code == 200
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from households.models import Household, HouseholdStats
+
+from .metrics import exposition
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@require_GET
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponseForbidden()
+    active_since = timezone.now() - timedelta(seconds=settings.METRICS_ACTIVE_WINDOW)
+    gauges = {
+        "grocereez_households": Household.objects.count(),
+        "grocereez_households_active": HouseholdStats.objects.filter(
+            modified_at__gte=active_since
+        ).count(),
+    }
+    return HttpResponse(
+        exposition(settings.METRICS_DIR, gauges), content_type=CONTENT_TYPE
+    )